@@ -0,0 +1,270 @@
+"""Fixtures for the tests of the tutorial's answer servers.
+
+The servers in tutorial/answer are standalone scripts rather than a package,
+so their directory goes on sys.path, along with tutorial/benchmark for the
+NWS stub. Tests talk to the servers either in-process, through the SDK's
+memory transport, or as child processes over stdio and SSE, the way hosts
+run them. Either way upstream calls go to the stub, never to api.weather.gov.
+"""
+
+import json
+import queue
+import socket
+import subprocess
+import sys
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+ANSWER_DIR = ROOT / "tutorial" / "answer"
+BENCHMARK_DIR = ROOT / "tutorial" / "benchmark"
+sys.path[:0] = [str(ANSWER_DIR), str(BENCHMARK_DIR)]
+
+PROTOCOL_VERSION = "2024-11-05"
+REPLY_TIMEOUT = 30.0
+STALL_SECONDS = 3.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def nws_stub() -> Iterator[str]:
+    """Base URL of an NWS stub shared by the whole session."""
+    pytest.importorskip("uvicorn")
+    from nws_stub import running_stub
+
+    with running_stub(free_port()) as base:
+        yield base
+
+
+@pytest.fixture(scope="session")
+def stalled_stub() -> Iterator[str]:
+    """Base URL of an NWS stub slow enough that waiting on it shows in startup times."""
+    pytest.importorskip("uvicorn")
+    from nws_stub import running_stub
+
+    with running_stub(free_port(), latency=STALL_SECONDS) as base:
+        yield base
+
+
+def server_env(nws_base: str, workdir: Path, **overrides: str) -> dict[str, str]:
+    from harness import server_environment
+
+    return {**server_environment(nws_base, workdir), **overrides}
+
+
+class StdioClient:
+    """A server child process driven over newline-delimited JSON-RPC."""
+
+    def __init__(self, args: list[str], env: dict[str, str], cwd: Path):
+        self.process = subprocess.Popen(
+            [sys.executable, *args],
+            env=env,
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.messages: queue.Queue = queue.Queue()
+        self.notifications: list[dict] = []
+        self.next_id = 0
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self) -> None:
+        for line in self.process.stdout:
+            self.messages.put(json.loads(line))
+
+    def send(self, message: dict) -> None:
+        self.process.stdin.write(json.dumps(message).encode() + b"\n")
+        self.process.stdin.flush()
+
+    def request(self, method: str, params: dict | None = None, timeout: float = REPLY_TIMEOUT) -> dict:
+        """Send a request and return its response, keeping notifications seen meanwhile."""
+        self.next_id += 1
+        message: dict[str, Any] = {"jsonrpc": "2.0", "id": self.next_id, "method": method}
+        if params is not None:
+            message["params"] = params
+        self.send(message)
+        while True:
+            reply = self.messages.get(timeout=timeout)
+            if reply.get("id") == self.next_id:
+                return reply
+            self.notifications.append(reply)
+
+    def initialize(self, timeout: float = REPLY_TIMEOUT) -> dict:
+        reply = self.request(
+            "initialize",
+            {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "tests", "version": "1.0"},
+            },
+            timeout,
+        )
+        self.send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        return reply
+
+    def call_tool(self, name: str, arguments: dict) -> dict:
+        return self.request("tools/call", {"name": name, "arguments": arguments})["result"]
+
+    def close(self) -> None:
+        self.process.stdin.close()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+@pytest.fixture
+def stdio_server(nws_stub, tmp_path):
+    """Start an answer server over stdio: stdio_server("implement_sse.py", *args, env=...)."""
+    clients = []
+
+    def start(script: str, *args: str, env: dict[str, str] | None = None) -> StdioClient:
+        client = StdioClient([str(ANSWER_DIR / script), *args], env or server_env(nws_stub, tmp_path), tmp_path)
+        clients.append(client)
+        return client
+
+    yield start
+    for client in clients:
+        client.close()
+
+
+@contextmanager
+def serving_sse(nws_base: str, workdir: Path, *args: str) -> Iterator[tuple[str, subprocess.Popen]]:
+    """implement_sse serving the SSE transport; yields its base URL and process once ready."""
+    import anyio
+    from harness import start_server, stop_server, wait_ready
+
+    port = free_port()
+    process = start_server(
+        ANSWER_DIR / "implement_sse.py",
+        ["--transport", "sse", "--port", str(port), *args],
+        server_env(nws_base, workdir),
+        workdir,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        anyio.run(wait_ready, f"{base}/ready", process)
+        yield base, process
+    finally:
+        stop_server(process)
+
+
+@pytest.fixture
+def sse_server(request, nws_stub, tmp_path):
+    """Base URL of implement_sse serving the SSE transport, once it reports ready.
+
+    Parametrize it indirectly with a list of extra command line arguments.
+    """
+    with serving_sse(nws_stub, tmp_path, *getattr(request, "param", [])) as (base, _):
+        yield base
+
+
+class SseSession:
+    """One MCP session over SSE: messages are posted, replies read from the event stream."""
+
+    def __init__(self, client, lines):
+        self.client = client
+        self.lines = lines
+        self.endpoint = ""
+
+    async def next_event(self) -> tuple[str, str]:
+        event = data = ""
+        async for line in self.lines:
+            if line.startswith("event:"):
+                event = line.partition(":")[2].strip()
+            elif line.startswith("data:"):
+                data = line.partition(":")[2].strip()
+            elif not line and event:
+                return event, data
+        raise EOFError("SSE stream closed")
+
+    async def replies(self, count: int) -> dict[int, dict]:
+        import anyio
+
+        replies = {}
+        with anyio.fail_after(REPLY_TIMEOUT):
+            while len(replies) < count:
+                event, data = await self.next_event()
+                if event == "message" and "id" in (message := json.loads(data)):
+                    replies[message["id"]] = message
+        return replies
+
+    async def post(self, payload):
+        return await self.client.post(self.endpoint, json=payload)
+
+    async def initialize(self) -> None:
+        """Read the endpoint event, then initialize the session."""
+        event, self.endpoint = await self.next_event()
+        assert event == "endpoint", event
+        await self.post(
+            {
+                "jsonrpc": "2.0",
+                "id": 0,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "tests", "version": "1.0"},
+                },
+            }
+        )
+        await self.replies(1)
+        await self.post({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+
+@asynccontextmanager
+async def connected(module, workdir: Path, warmup=None, **client_options):
+    """implement_sse's server in-process, with a client session connected to it.
+
+    Yields the shared WeatherContext and the ClientSession, once the session
+    is initialized. Every file the server keeps goes to `workdir`.
+    """
+    from harness import build_zone_index
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    async with module.open_weather_context(
+        warmup,
+        zone_index_path=build_zone_index(workdir),
+        gridpoint_store_path=workdir / "gridpoints",
+        gazetteer_path=workdir / "places.idx",
+    ) as ctx:
+        token = module.current_context.set(ctx)
+        ctx.task_group.start_soon(module.client_logs.run)
+        try:
+            async with create_connected_server_and_client_session(module.server, **client_options) as client:
+                yield ctx, client
+        finally:
+            module.current_context.reset(token)
+
+
+@pytest.fixture
+def implement_sse(nws_stub, monkeypatch):
+    """The implement_sse module, pointed at the NWS stub."""
+    pytest.importorskip("mcp")
+    pytest.importorskip("httpx")
+    import implement_sse
+
+    monkeypatch.setattr(implement_sse, "NWS_API_BASE", nws_stub)
+    return implement_sse
+
+
+@pytest.fixture
+def weather_session(implement_sse, tmp_path):
+    """Open `connected` on implement_sse: `async with weather_session(**options) as (ctx, client)`."""
+    return lambda **options: connected(implement_sse, tmp_path, **options)
@@ -0,0 +1,90 @@
+"""get_alerts paging and filtering against the NWS stub."""
+
+import json
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("mcp")
+httpx = pytest.importorskip("httpx")
+
+pytestmark = pytest.mark.anyio
+
+
+async def alerts_json(client, **arguments) -> dict:
+    result = await client.call_tool("get_alerts", {"state": "KS", "output": "json", **arguments})
+    assert not result.isError, result.content[0].text
+    return json.loads(result.content[0].text)
+
+
+async def test_pages_cover_every_alert_once(weather_session, nws_stub):
+    async with weather_session() as (_, client):
+        everything = (await alerts_json(client))["alerts"]
+
+        pages = [await alerts_json(client, limit=3)]
+        # A reissue between pages must not change the pages still to come
+        async with httpx.AsyncClient() as http:
+            (await http.post(f"{nws_stub}/stub/alerts/KS/reissue")).raise_for_status()
+        while "next_cursor" in pages[-1]:
+            pages.append(await alerts_json(client, limit=3, cursor=pages[-1]["next_cursor"]))
+
+    assert [len(page["alerts"]) for page in pages] == [3, 3, 2]
+    assert [alert for page in pages for alert in page["alerts"]] == everything
+
+
+async def test_unknown_cursor_asks_for_a_fresh_page(weather_session, implement_sse):
+    cursor = implement_sse.encode_cursor("0" * 32, 3)
+    async with weather_session() as (_, client):
+        result = await client.call_tool("get_alerts", {"state": "KS", "cursor": cursor})
+
+    assert result.content[0].text.startswith("Cursor expired")
+
+
+async def test_pages_that_cannot_advance_are_rejected(weather_session, implement_sse):
+    async with weather_session() as (ctx, client):
+        first = await alerts_json(client, limit=3)
+        snapshot_id, _ = implement_sse.decode_cursor(first["next_cursor"])
+        # Before the first alert and past the last of the 8 in the snapshot
+        outside = [
+            await client.call_tool(
+                "get_alerts",
+                {"state": "KS", "limit": 3, "cursor": implement_sse.encode_cursor(snapshot_id, offset)},
+            )
+            for offset in (-1, 8)
+        ]
+        with pytest.raises(ValueError, match="Invalid limit"):
+            await implement_sse.get_alerts(ctx, "KS", limit=0, cursor=first["next_cursor"])
+
+    for result in outside:
+        assert result.isError
+        assert "Invalid cursor" in result.content[0].text
+
+
+SEVERITY_RANK = {"Extreme": 4, "Severe": 3, "Moderate": 2, "Minor": 1}
+
+
+@pytest.mark.parametrize(
+    "script, args",
+    [
+        ("implement_sse.py", ["--transport", "stdio"]),
+        ("fastmcp_weather.py", ["--transport", "stdio"]),
+    ],
+)
+def test_filters_and_top_k(stdio_server, nws_stub, script, args):
+    features = [feature["properties"] for feature in httpx.get(f"{nws_stub}/alerts/active/area/TX").json()["features"]]
+    kept = [
+        props
+        for props in features
+        if SEVERITY_RANK[props["severity"]] >= SEVERITY_RANK["Moderate"] and props["urgency"] != "Future"
+    ]
+    kept.sort(key=lambda props: (-SEVERITY_RANK[props["severity"]], datetime.fromisoformat(props["onset"])))
+    client = stdio_server(script, *args)
+    client.initialize()
+
+    filters = {"state": "TX", "severity": "Moderate", "urgency": ["Immediate", "Expected"], "output": "json"}
+    top = json.loads(client.call_tool("get_alerts", {**filters, "limit": 2})["content"][0]["text"])
+    later = client.call_tool("get_alerts", {**filters, "since": "2999-01-01T00:00:00Z"})["content"][0]["text"]
+
+    assert len(kept) >= 2
+    assert [alert["areaDesc"] for alert in top["alerts"]] == [props["areaDesc"] for props in kept[:2]]
+    assert "match the filters" in later
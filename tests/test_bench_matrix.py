@@ -0,0 +1,44 @@
+"""bench_matrix running one small workload in every cell."""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("httpx")
+
+from tests.conftest import free_port  # noqa: E402
+
+
+def test_parse_cell():
+    from bench_matrix import parse_cell
+
+    assert parse_cell("implement_sse:sse") == ("implement_sse", "sse")
+    with pytest.raises(ValueError):
+        parse_cell("implement_weather:sse")
+
+
+@pytest.mark.anyio
+async def test_every_cell_answers_the_workload():
+    from bench_matrix import CELLS, format_table, main_async
+
+    args = SimpleNamespace(
+        calls=20,
+        warmup=4,
+        concurrency=2,
+        only=None,
+        port=free_port(),
+        stub_port=free_port(),
+        stub_latency=0.0,
+        seed=0,
+        timeout=60.0,
+    )
+
+    report = await main_async(args)
+    cells = report["cells"]
+
+    assert [(cell["implementation"], cell["transport"]) for cell in cells] == CELLS
+    for cell in cells:
+        assert (cell["calls"], cell["errors"]) == (20, 0), cell
+        assert cell["startup_s"] > 0
+    assert len(format_table(cells).splitlines()) == len(CELLS) + 1
@@ -0,0 +1,24 @@
+"""bench_startup's guard against a handshake that waits on upstream."""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("httpx")
+
+from tests.conftest import STALL_SECONDS  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_startup_with_cache_keys_stays_under_the_stall(nws_stub, stalled_stub):
+    from bench_startup import measure_server
+
+    # Any wait on the stalled stub alone would use up this budget
+    args = SimpleNamespace(runs=1, timeout=60.0, budget_ms=STALL_SECONDS * 1000)
+
+    result = await measure_server("implement_sse", nws_stub, stalled_stub, args)
+
+    assert result["initialize_with_cache_keys_ms"] is not None
+    assert result["within_budget"], result
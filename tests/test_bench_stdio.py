@@ -0,0 +1,35 @@
+"""bench_stdio driving the stdio servers with pipelined requests."""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("httpx")
+
+from tests.conftest import free_port  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("server", ["implement_sse", "implement_sse_fast", "fastmcp_weather"])
+async def test_every_pipelined_message_is_answered(server):
+    from bench_stdio import DEFAULT_STDIO_MIX, main_async
+
+    args = SimpleNamespace(
+        server=server,
+        mix=DEFAULT_STDIO_MIX,
+        seed=0,
+        stub_port=free_port(),
+        warmup=10,
+        messages=60,
+        pipeline=8,
+        timeout=60.0,
+    )
+
+    report = await main_async(args)
+
+    assert report["messages"] == 60
+    assert report["errors"] == 0
+    assert report["stray_lines"] == 0
+    assert set(report["methods"]) == {"tools/list", "get_forecast", "get_alerts"}
@@ -0,0 +1,39 @@
+"""Log records forwarded to MCP clients as notifications/message."""
+
+import logging
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("httpx")
+
+import anyio  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_logs_only_sent_after_set_level(weather_session, caplog):
+    caplog.set_level(logging.INFO, logger="weather")
+    received = []
+    arrived = anyio.Event()
+
+    async def on_log(params) -> None:
+        received.append((params.level, params.data["msg"]))
+        arrived.set()
+
+    async with weather_session(logging_callback=on_log) as (_, client):
+        await client.call_tool("get_alerts", {"state": "KS"})
+        await anyio.sleep(0.2)
+        assert received == [], "a client that never called logging/setLevel gets no logs"
+
+        await client.set_logging_level("info")
+        await client.call_tool("get_alerts", {"state": "KS"})
+        with anyio.fail_after(5):
+            await arrived.wait()
+        assert ("info", "Fetching alerts") in received
+
+        received.clear()
+        await client.set_logging_level("warning")
+        await client.call_tool("get_alerts", {"state": "KS"})
+        await anyio.sleep(0.2)
+        assert received == []
@@ -0,0 +1,55 @@
+"""Compressed responses, from the NWS stub and from the SSE server."""
+
+import pytest
+
+pytest.importorskip("mcp")
+httpx = pytest.importorskip("httpx")
+
+import anyio  # noqa: E402
+
+from tests.conftest import REPLY_TIMEOUT, free_port  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(scope="module")
+def gzip_stub():
+    pytest.importorskip("uvicorn")
+    from nws_stub import running_stub
+
+    with running_stub(free_port(), gzip=True) as base:
+        yield base
+
+
+async def test_upstream_responses_are_decoded(weather_session, implement_sse, gzip_stub, monkeypatch):
+    monkeypatch.setattr(implement_sse, "NWS_API_BASE", gzip_stub)
+    async with weather_session() as (ctx, client):
+        result = await client.call_tool("get_alerts", {"state": "KS", "output": "compact"})
+        stats = ctx.metrics.upstream_compression
+
+    assert "gzip" in implement_sse.ACCEPT_ENCODING
+    assert result.content[0].text.startswith("event|severity")
+    assert stats.responses == 1
+    assert stats.encoded_bytes < stats.raw_bytes
+
+
+@pytest.mark.parametrize("sse_server", [["--compress", "--compress-min-size", "64"]], indirect=True)
+async def test_sse_server_compresses_and_flushes_events(sse_server):
+    headers = {"Accept-Encoding": "gzip"}
+    async with httpx.AsyncClient(base_url=sse_server, headers=headers, timeout=REPLY_TIMEOUT) as client:
+        async with client.stream("GET", "/sse") as stream:
+            # The endpoint event must arrive while the stream stays open
+            with anyio.fail_after(REPLY_TIMEOUT):
+                async for line in stream.aiter_lines():
+                    if line.startswith("data:"):
+                        break
+            encoding = stream.headers.get("content-encoding")
+
+        first = await client.get("/metrics")
+        second = await client.get("/metrics")
+
+    assert encoding == "gzip"
+    assert first.headers.get("content-encoding") == "gzip"
+    stats = second.json()["response_compression"]
+    assert stats["responses"] >= 1
+    assert stats["bytes_saved"] > 0
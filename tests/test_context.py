@@ -0,0 +1,34 @@
+"""The lifespan contexts the servers share between tool calls."""
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("httpx")
+
+from mcp.shared.memory import create_connected_server_and_client_session  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_sessions_share_one_context(weather_session, implement_sse):
+    async with weather_session() as (ctx, client):
+        await client.call_tool("get_alerts", {"state": "KS"})
+        http = ctx.http
+        async with create_connected_server_and_client_session(implement_sse.server) as other:
+            await other.call_tool("get_alerts", {"state": "MO"})
+
+        assert ctx.http is http
+        assert ctx.metrics.upstream_requests == 2
+
+    assert http.is_closed
+
+
+async def test_session_without_run_server_owns_its_context(nws_stub, monkeypatch):
+    implement_weather = pytest.importorskip("implement_weather")
+    monkeypatch.setattr(implement_weather, "NWS_API_BASE", nws_stub)
+
+    async with create_connected_server_and_client_session(implement_weather.server) as client:
+        result = await client.call_tool("get_alerts", {"state": "KS"})
+
+    assert not result.isError
+    assert "Event: " in result.content[0].text
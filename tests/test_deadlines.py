@@ -0,0 +1,50 @@
+"""Client deadlines and cancellation cutting short calls stuck upstream."""
+
+import time
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("httpx")
+
+from tests.conftest import STALL_SECONDS, server_env  # noqa: E402
+
+
+@pytest.mark.anyio
+async def test_deadline_from_meta_ends_the_call(weather_session, implement_sse, stalled_stub, monkeypatch):
+    monkeypatch.setattr(implement_sse, "NWS_API_BASE", stalled_stub)
+    async with weather_session() as (ctx, client):
+        started = time.monotonic()
+        result = await client.call_tool("get_alerts", {"state": "KS"}, meta={"timeoutMs": 300})
+        elapsed = time.monotonic() - started
+        timed_out = ctx.metrics.tool_calls_timed_out
+
+    assert result.isError
+    assert "did not finish before the client deadline" in result.content[0].text
+    assert elapsed < STALL_SECONDS
+    assert timed_out == 1
+
+
+def test_cancelled_call_is_abandoned(stdio_server, stalled_stub, tmp_path):
+    client = stdio_server("implement_sse.py", "--transport", "stdio", env=server_env(stalled_stub, tmp_path))
+    client.initialize()
+
+    started = time.monotonic()
+    client.send(
+        {
+            "jsonrpc": "2.0",
+            "id": "slow",
+            "method": "tools/call",
+            "params": {"name": "get_alerts", "arguments": {"state": "KS"}},
+        }
+    )
+    time.sleep(0.3)
+    client.send({"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": "slow"}})
+    while (reply := client.messages.get(timeout=STALL_SECONDS)).get("id") != "slow":
+        pass
+    elapsed = time.monotonic() - started
+
+    assert reply["error"]["message"] == "Request cancelled"
+    assert elapsed < STALL_SECONDS
+    # The server is free for the next request
+    assert client.request("ping")["result"] == {}
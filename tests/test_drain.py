@@ -0,0 +1,75 @@
+"""Graceful shutdown of the SSE server on SIGTERM."""
+
+import signal
+
+import pytest
+
+pytest.importorskip("mcp")
+httpx = pytest.importorskip("httpx")
+
+import anyio  # noqa: E402
+
+from tests.conftest import REPLY_TIMEOUT, SseSession, free_port, serving_sse  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+UPSTREAM_SECONDS = 1.0
+
+
+@pytest.fixture(scope="module")
+def slow_stub():
+    """A stub slow enough that a tool call is still running when the signal lands."""
+    pytest.importorskip("uvicorn")
+    from nws_stub import running_stub
+
+    with running_stub(free_port(), latency=UPSTREAM_SECONDS) as base:
+        yield base
+
+
+@pytest.fixture
+def draining_server(slow_stub, tmp_path):
+    with serving_sse(slow_stub, tmp_path) as (base, process):
+        yield base, process
+
+
+async def test_sigterm_finishes_in_flight_calls_then_closes_streams(draining_server):
+    base, process = draining_server
+    async with httpx.AsyncClient(base_url=base, timeout=REPLY_TIMEOUT) as client:
+        async with client.stream("GET", "/sse") as stream:
+            session = SseSession(client, stream.aiter_lines())
+            await session.initialize()
+            await session.post(
+                {
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": "tools/call",
+                    "params": {"name": "get_alerts", "arguments": {"state": "KS"}},
+                }
+            )
+            await anyio.sleep(UPSTREAM_SECONDS / 4)
+            process.send_signal(signal.SIGTERM)
+
+            with anyio.fail_after(REPLY_TIMEOUT):
+                while (ready := await client.get("/ready")).status_code == 200:
+                    await anyio.sleep(0.05)
+            refused = await client.get("/sse")
+            await session.post(
+                {
+                    "jsonrpc": "2.0",
+                    "id": 2,
+                    "method": "tools/call",
+                    "params": {"name": "get_alerts", "arguments": {"state": "KS"}},
+                }
+            )
+            replies = await session.replies(2)
+            with anyio.fail_after(REPLY_TIMEOUT):
+                event, _ = await session.next_event()
+
+    assert ready.status_code == 503
+    assert refused.status_code == 503
+    assert not replies[1]["result"].get("isError"), replies[1]
+    assert replies[1]["result"]["content"][0]["text"]
+    assert replies[2]["result"]["isError"]
+    assert "shutting down" in replies[2]["result"]["content"][0]["text"]
+    assert event == "close"
+    assert await anyio.to_thread.run_sync(process.wait, REPLY_TIMEOUT) == 0
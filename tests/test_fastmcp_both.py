@@ -0,0 +1,49 @@
+"""fastmcp_weather serving a stdio host and SSE clients from one process."""
+
+import time
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("httpx")
+
+from harness import POINTS  # noqa: E402
+from tests.conftest import REPLY_TIMEOUT, free_port, server_env  # noqa: E402
+
+UPSTREAM_SECONDS = 0.5
+
+
+@pytest.fixture(scope="module")
+def slow_stub():
+    pytest.importorskip("uvicorn")
+    from nws_stub import running_stub
+
+    with running_stub(free_port(), latency=UPSTREAM_SECONDS) as base:
+        yield base
+
+
+@pytest.mark.anyio
+async def test_stdio_and_sse_share_one_cache(stdio_server, slow_stub, tmp_path):
+    from bench_matrix import sse_session
+
+    port = free_port()
+    client = stdio_server(
+        "fastmcp_weather.py", "--transport", "both", "--port", str(port), env=server_env(slow_stub, tmp_path)
+    )
+    client.initialize()
+    arguments = {"latitude": POINTS[0][0], "longitude": POINTS[0][1]}
+
+    over_stdio = client.call_tool("get_forecast", arguments)
+    async with sse_session(f"http://127.0.0.1:{port}/sse", client.process, REPLY_TIMEOUT) as session:
+        started = time.monotonic()
+        over_sse = await session.call_tool("get_forecast", arguments)
+        elapsed = time.monotonic() - started
+
+    assert not over_stdio.get("isError") and not over_sse.isError
+    assert over_sse.content[0].text == over_stdio["content"][0]["text"]
+    # Both upstream responses came from the cache the stdio call filled
+    assert elapsed < UPSTREAM_SECONDS
+
+    # Closing stdin ends the process, SSE server included
+    client.process.stdin.close()
+    assert client.process.wait(REPLY_TIMEOUT) == 0
@@ -0,0 +1,76 @@
+"""The MCP gateway in front of a pool of stdio weather servers."""
+
+import sys
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("httpx")
+
+import anyio  # noqa: E402
+from mcp.shared.memory import create_connected_server_and_client_session  # noqa: E402
+
+from tests.conftest import ANSWER_DIR, REPLY_TIMEOUT, server_env  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+
+def test_load_backends_rejects_bad_names(tmp_path):
+    from mcp_gateway import load_backends
+
+    config = tmp_path / "gateway.json"
+    config.write_text('{"mcpServers": {"weather": {"url": "http://127.0.0.1:1/sse", "instances": 2}}}')
+    assert load_backends(config)["weather"].instances == 2
+
+    config.write_text('{"mcpServers": {"a__b": {"url": "http://127.0.0.1:1/sse"}}}')
+    with pytest.raises(ValueError, match="invalid backend name"):
+        load_backends(config)
+
+
+async def test_calls_are_spread_over_the_pool_and_restarted(nws_stub, tmp_path):
+    import mcp_gateway
+
+    env = server_env(nws_stub, tmp_path)
+    spec = mcp_gateway.BackendSpec(
+        command=sys.executable,
+        args=[str(ANSWER_DIR / "implement_sse.py"), "--transport", "stdio"],
+        env={name: env[name] for name in env if name.startswith("WEATHER_")},
+        instances=2,
+        concurrency=1,
+    )
+    async with mcp_gateway.open_gateway_context({"weather": spec}) as ctx:
+        token = mcp_gateway.current_context.set(ctx)
+        try:
+            async with create_connected_server_and_client_session(mcp_gateway.server) as client:
+                tools = {tool.name for tool in (await client.list_tools()).tools}
+                results = []
+
+                async def call(state: str) -> None:
+                    results.append(await client.call_tool("weather__get_alerts", {"state": state}))
+
+                with anyio.fail_after(REPLY_TIMEOUT):
+                    async with anyio.create_task_group() as tg:
+                        for state in ("KS", "MO", "TX", "CA"):
+                            tg.start_soon(call, state)
+                unknown = await client.call_tool("other__get_alerts", {"state": "KS"})
+                backend_error = await client.call_tool("weather__get_forecast", {})
+
+                pool = ctx.pools["weather"]
+                calls = [instance["calls"] for instance in pool.as_dict()["instances"]]
+
+                pool.instances[0].fail()
+                with anyio.fail_after(REPLY_TIMEOUT):
+                    while pool.instances[0].session is None or pool.instances[0].restarts == 0:
+                        await anyio.sleep(0.1)
+                after_restart = await client.call_tool("weather__get_alerts", {"state": "KS"})
+        finally:
+            mcp_gateway.current_context.reset(token)
+
+    assert {"weather__get_alerts", "weather__get_forecast"} <= tools
+    assert len(results) == 4 and not any(result.isError for result in results)
+    # The four get_alerts and the failing get_forecast, on both instances
+    assert sum(calls) == 5 and min(calls) >= 1
+    assert unknown.isError and "Unknown tool" in unknown.content[0].text
+    # The backend's own error comes through as a tool error
+    assert backend_error.isError
+    assert not after_restart.isError
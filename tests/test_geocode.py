@@ -0,0 +1,32 @@
+"""The offline gazetteer behind geocode and the place argument."""
+
+import json
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("httpx")
+
+CHICAGO = (41.8781, -87.6298)
+
+
+@pytest.mark.parametrize(
+    "script, args",
+    [
+        ("implement_sse.py", ["--transport", "stdio"]),
+        ("fastmcp_weather.py", ["--transport", "stdio"]),
+    ],
+)
+def test_forecast_by_place_name(stdio_server, script, args):
+    client = stdio_server(script, *args)
+    client.initialize()
+
+    places = json.loads(client.call_tool("geocode", {"query": "chicago il", "output": "json"})["content"][0]["text"])
+    by_place = client.call_tool("get_forecast", {"place": "Chicago"})["content"][0]["text"]
+    by_point = client.call_tool("get_forecast", {"latitude": CHICAGO[0], "longitude": CHICAGO[1]})["content"][0]["text"]
+    unknown = client.call_tool("get_forecast", {"place": "Qqqqxzz"})
+
+    assert (places["places"][0]["latitude"], places["places"][0]["longitude"]) == CHICAGO
+    assert by_place.startswith(f"Chicago, IL ({CHICAGO[0]}, {CHICAGO[1]})")
+    assert by_place.endswith(by_point)
+    assert unknown.get("isError")
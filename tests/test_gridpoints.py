@@ -0,0 +1,114 @@
+"""The memory-mapped gridpoint tile store and the summaries read from it."""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("mcp")
+httpx = pytest.importorskip("httpx")
+np = pytest.importorskip("numpy")
+
+from gridpoint_store import GridpointStore, current_hour, epoch_hour  # noqa: E402
+from harness import POINTS  # noqa: E402
+
+
+def run(start: datetime, hours: int, value: float | None) -> dict:
+    return {"validTime": f"{start.isoformat()}/PT{hours}H", "value": value}
+
+
+def test_tiles_expand_runs_and_keep_history(tmp_path):
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    store = GridpointStore(tmp_path, layers=("temperature",))
+
+    store.write("ABC", 1, 2, {"temperature": {"uom": "wmoUnit:degC", "values": [run(now, 3, 5.0)]}})
+    later = now + timedelta(hours=2)
+    tile = store.write(
+        "abc", 1, 2, {"temperature": {"uom": "wmoUnit:degC", "values": [run(later, 2, 7.0)]}}
+    )
+
+    assert isinstance(tile.data, np.memmap)
+    assert tile.start == epoch_hour(now.isoformat())
+    # Hours the update no longer covers keep the earlier values
+    assert tile.layer("temperature").tolist() == [5.0, 5.0, 7.0, 7.0]
+    assert GridpointStore(tmp_path, layers=("temperature",)).open("ABC", 1, 2).hours == 4
+
+
+@pytest.mark.anyio
+async def test_gridpoint_summary_is_revalidated_not_refetched(weather_session, nws_stub):
+    latitude, longitude = POINTS[0]
+    async with httpx.AsyncClient() as http:
+        points = (await http.get(f"{nws_stub}/points/{latitude},{longitude}")).json()["properties"]
+        layers = (await http.get(points["forecastGridData"])).json()["properties"]
+    first = current_hour()
+    expected = [
+        value["value"] * 9 / 5 + 32
+        for value in layers["temperature"]["values"]
+        for hour in range(int(value["validTime"].partition("/PT")[2][:-1]))
+        if first <= epoch_hour(value["validTime"].partition("/")[0]) + hour < first + 24
+    ]
+
+    arguments = {"latitude": latitude, "longitude": longitude, "hours": 24, "output": "json", "source": "gridpoints"}
+    async with weather_session() as (ctx, client):
+        summary = json.loads((await client.call_tool("get_forecast_summary", arguments)).content[0].text)
+        # Past the refresh interval the tile is revalidated with If-Modified-Since
+        ctx.gridpoints_checked.clear()
+        again = json.loads((await client.call_tool("get_forecast_summary", arguments)).content[0].text)
+        updates, not_modified = ctx.metrics.gridpoint_updates, ctx.metrics.gridpoint_not_modified
+
+    assert summary["hours"] == len(expected) == 24
+    assert summary["temperature"]["max"] == pytest.approx(max(expected), abs=0.1)
+    assert summary["temperature"]["min"] == pytest.approx(min(expected), abs=0.1)
+    assert again == summary
+    assert (updates, not_modified) == (1, 1)
+
+
+def test_concurrent_writes_of_one_tile(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    store = GridpointStore(tmp_path, layers=("temperature",))
+    properties = {"temperature": {"uom": "wmoUnit:degC", "values": [run(now, 6, 5.0)]}}
+
+    with ThreadPoolExecutor(8) as pool:
+        tiles = list(pool.map(lambda _: store.write("ABC", 1, 2, properties), range(32)))
+
+    assert all(tile.layer("temperature").tolist() == [5.0] * 6 for tile in tiles)
+    assert [path.name for path in tmp_path.iterdir()] == ["ABC_1_2.grid"]
+
+
+@pytest.mark.anyio
+async def test_concurrent_refreshes_share_one_request(weather_session, implement_sse, nws_stub):
+    import anyio
+
+    latitude, longitude = POINTS[0]
+    async with httpx.AsyncClient() as http:
+        points = (await http.get(f"{nws_stub}/points/{latitude},{longitude}")).json()["properties"]
+    cell = (points["gridId"], points["gridX"], points["gridY"])
+
+    async with weather_session() as (ctx, _):
+        store = ctx.open_gridpoints()
+
+        # A failed write is logged, not raised, and retried by the next call
+        def broken_write(*args):
+            raise OSError("disk full")
+
+        store.write, write = broken_write, store.write
+        unwritten = await implement_sse.fetch_gridpoints(ctx, *cell)
+        retried = not ctx.gridpoints_checked
+        store.write = write
+
+        tiles = []
+
+        async def fetch() -> None:
+            tiles.append(await implement_sse.fetch_gridpoints(ctx, *cell))
+
+        async with anyio.create_task_group() as tg:
+            for _ in range(8):
+                tg.start_soon(fetch)
+        requests, updates = ctx.metrics.upstream_requests, ctx.metrics.gridpoint_updates
+
+    assert unwritten is None and retried
+    assert len(tiles) == 8 and all(tile is tiles[0] is not None for tile in tiles)
+    # The failed attempt plus one request shared by the eight concurrent calls
+    assert (requests, updates) == (2, 1)
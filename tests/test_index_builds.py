@@ -0,0 +1,62 @@
+"""Rebuilding the memory-mapped gazetteer and zone index under open readers."""
+
+import json
+
+from gazetteer import BUNDLED_PLACES, Gazetteer, build as build_gazetteer, open_gazetteer
+from zone_index import ZoneIndex, build as build_zone_index
+
+
+def square(ugc: str, lon: float, lat: float) -> dict:
+    ring = [[lon, lat], [lon + 1, lat], [lon + 1, lat + 1], [lon, lat + 1], [lon, lat]]
+    return {"type": "Feature", "properties": {"id": ugc}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+
+
+def test_gazetteer_rebuild_leaves_open_readers_intact(tmp_path):
+    path = tmp_path / "places.idx"
+    build_gazetteer([BUNDLED_PLACES], path)
+    smaller = tmp_path / "places.csv"
+    smaller.write_text("name,state,latitude,longitude,population\nSpringfield,IL,39.7817,-89.6501,114394\n")
+
+    with Gazetteer(path) as before:
+        build_gazetteer([smaller], path)
+
+        assert before.search("Seattle")[0].state == "WA"
+        with Gazetteer(path) as after:
+            assert after.search("Seattle") == []
+            assert after.search("Springfield")[0].state == "IL"
+    assert [file.name for file in tmp_path.iterdir() if file.suffix == ".tmp"] == []
+
+
+def test_gazetteer_follows_changes_to_its_places(tmp_path):
+    path = tmp_path / "places.idx"
+    places = tmp_path / "places.csv"
+    places.write_text("name,state,latitude,longitude,population\nSpringfield,IL,39.7817,-89.6501,114394\n")
+    with open_gazetteer(path, places) as gazetteer:
+        assert gazetteer.search("Springfield")[0].state == "IL"
+
+    places.write_text("name,state,latitude,longitude,population\nSpringfield,MO,37.2090,-93.2923,169176\n")
+    with open_gazetteer(path, places) as gazetteer:
+        assert gazetteer.search("Springfield")[0].state == "MO"
+
+    # Built from other sources, e.g. the Census file: not replaced by the bundled places
+    build_gazetteer([BUNDLED_PLACES], path)
+    with open_gazetteer(path, places) as gazetteer:
+        assert gazetteer.search("Seattle")[0].state == "WA"
+
+
+def test_zone_index_rebuild_leaves_open_readers_intact(tmp_path):
+    path = tmp_path / "zones.idx"
+    first = tmp_path / "first.json"
+    first.write_text(json.dumps({"features": [square("AAZ001", -100, 40), square("AAZ002", -99, 40)]}))
+    second = tmp_path / "second.json"
+    second.write_text(json.dumps({"features": [square("BBZ001", -100, 40)]}))
+    build_zone_index([first], path)
+
+    with ZoneIndex(path) as before:
+        build_zone_index([second], path)
+
+        assert before.lookup(40.5, -98.5) == ["AAZ002"]
+        with ZoneIndex(path) as after:
+            assert after.lookup(40.5, -99.5) == ["BBZ001"]
+            assert after.lookup(40.5, -98.5) == []
+    assert [file.name for file in tmp_path.iterdir() if file.suffix == ".tmp"] == []
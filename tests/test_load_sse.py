@@ -0,0 +1,62 @@
+"""The SSE load generator and the statistics it reports."""
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("httpx")
+
+from harness import DEFAULT_MIX, Workload, latency_summary, parse_mix, percentile  # noqa: E402
+
+
+def test_parse_mix():
+    assert parse_mix("get_forecast=3, get_alerts") == {"get_forecast": 3, "get_alerts": 1}
+    with pytest.raises(ValueError):
+        parse_mix("get_forecast=0")
+
+
+def test_nearest_rank_percentiles():
+    ordered = [float(i) for i in range(1, 101)]
+
+    assert percentile(ordered, 0.5) == 50.0
+    assert percentile(ordered, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
+    assert latency_summary([0.002, 0.001])["max_ms"] == 2.0
+
+
+def test_workload_is_deterministic():
+    calls = [Workload({"get_alerts": 1, "get_forecast": 2}, seed=7).next_call() for _ in range(2)]
+
+    assert calls[0] == calls[1]
+
+
+def test_serving_profiles():
+    from weather_serving import event_loop, module_available, uvicorn_options
+
+    production = uvicorn_options("production")
+
+    assert uvicorn_options("default") == {}
+    assert event_loop("default") == "asyncio"
+    assert production["access_log"] is False
+    # The fast implementations when installed, uvicorn's and asyncio's defaults otherwise
+    assert production.get("http", "h11") == ("httptools" if module_available("httptools") else "h11")
+    assert event_loop("production") == ("uvloop" if module_available("uvloop") else "asyncio")
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "sse_server",
+    [["--serving-profile", "default"], ["--serving-profile", "production"]],
+    ids=["default", "production"],
+    indirect=True,
+)
+async def test_load_run_records_every_call(sse_server):
+    from load_sse import Recorder, run_load
+
+    recorder = Recorder()
+    elapsed = await run_load(f"{sse_server}/sse", 2, 20.0, 1.0, Workload(parse_mix(DEFAULT_MIX)), recorder)
+    report = recorder.report(elapsed)
+
+    assert report["calls"] == 20
+    assert report["errors"] == 0, report["error_samples"]
+    assert sum(tool["calls"] for tool in report["tools"].values()) == 20
+    assert report["latency"]["p50_ms"] > 0
@@ -0,0 +1,43 @@
+"""The json and compact output modes of the answer servers."""
+
+import json
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("httpx")
+
+
+@pytest.fixture(params=["implement_sse", "fastmcp_weather"])
+def server_module(request):
+    return pytest.importorskip(request.param)
+
+
+def test_compact_rows(server_module):
+    items = [{"event": "Flood Warning", "severity": None}, {"event": "Heat Advisory", "severity": "Minor"}]
+
+    text = server_module.render_structured("alerts", items, "compact")
+
+    assert text.splitlines() == ["event|severity", "Flood Warning|", "Heat Advisory|Minor"]
+
+
+@pytest.mark.parametrize("key", ["alerts", "periods"])
+def test_empty_result_is_not_blank(server_module, key):
+    assert server_module.render_structured(key, [], "compact") == f"no {key}"
+    assert json.loads(server_module.render_structured(key, [], "json")) == {key: []}
+
+
+@pytest.mark.parametrize(
+    "script, args",
+    [
+        ("implement_sse.py", ["--transport", "stdio"]),
+        ("fastmcp_weather.py", ["--transport", "stdio"]),
+    ],
+)
+def test_geocode_miss_in_compact_output(stdio_server, script, args):
+    client = stdio_server(script, *args)
+    client.initialize()
+
+    result = client.call_tool("geocode", {"query": "Qqqqxzz", "output": "compact"})
+
+    assert result["content"][0]["text"] == "no places"
@@ -0,0 +1,90 @@
+"""Keep-alive comments and idle reaping of SSE sessions."""
+
+import json
+import time
+
+import pytest
+
+pytest.importorskip("mcp")
+httpx = pytest.importorskip("httpx")
+
+import anyio  # noqa: E402
+
+from tests.conftest import REPLY_TIMEOUT, SseSession  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+IDLE_TIMEOUT = 1.5
+KEEPALIVE = 0.3
+
+
+@pytest.mark.parametrize(
+    "sse_server",
+    [["--sse-idle-timeout", str(IDLE_TIMEOUT), "--sse-keepalive", str(KEEPALIVE)]],
+    indirect=True,
+)
+async def test_idle_session_is_reaped_and_active_one_kept(sse_server):
+    idle: dict = {"comments": 0, "closed_after": None}
+
+    async def watch_idle(client: httpx.AsyncClient) -> None:
+        opened = time.monotonic()
+        try:
+            async with client.stream("GET", "/sse") as stream:
+                async for line in stream.aiter_lines():
+                    if line.startswith(":"):
+                        idle["comments"] += 1
+        except httpx.RemoteProtocolError:
+            pass
+        idle["closed_after"] = time.monotonic() - opened
+
+    async with httpx.AsyncClient(base_url=sse_server, timeout=REPLY_TIMEOUT) as client:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(watch_idle, client)
+            async with client.stream("GET", "/sse") as stream:
+                session = SseSession(client, stream.aiter_lines())
+                await session.initialize()
+                # Posting keeps this session active well past the idle timeout
+                for message_id in range(1, int(3 * IDLE_TIMEOUT / KEEPALIVE)):
+                    await session.post({"jsonrpc": "2.0", "id": message_id, "method": "ping"})
+                    assert message_id in await session.replies(1)
+                    await anyio.sleep(KEEPALIVE)
+                metrics = (await client.get("/metrics")).json()["sse_sessions"]
+
+    # Closed while the active session was still in use
+    assert idle["closed_after"] is not None and idle["closed_after"] >= IDLE_TIMEOUT
+    assert idle["comments"] >= 2
+    assert metrics == {"open": 1, "reaped": {"idle": 1}}
+
+
+@pytest.mark.parametrize(
+    "sse_server",
+    [
+        [
+            "--sse-idle-timeout", str(IDLE_TIMEOUT),
+            "--sse-keepalive", str(KEEPALIVE),
+            "--alert-poll-interval", str(KEEPALIVE),
+        ]
+    ],
+    indirect=True,
+)
+async def test_subscribed_session_is_not_idle(sse_server, nws_stub):
+    async with httpx.AsyncClient(base_url=sse_server, timeout=REPLY_TIMEOUT) as client:
+        async with client.stream("GET", "/sse") as stream:
+            session = SseSession(client, stream.aiter_lines())
+            await session.initialize()
+            subscribe = {"uri": "alerts://OK"}
+            await session.post({"jsonrpc": "2.0", "id": 1, "method": "resources/subscribe", "params": subscribe})
+            assert 1 in await session.replies(1)
+
+            # Nothing is posted from here on, the client only listens
+            await anyio.sleep(2 * IDLE_TIMEOUT)
+            (await client.post(f"{nws_stub}/stub/alerts/OK/reissue")).raise_for_status()
+            with anyio.fail_after(REPLY_TIMEOUT):
+                while True:
+                    event, data = await session.next_event()
+                    if event == "message" and json.loads(data).get("method") == "notifications/resources/updated":
+                        break
+            metrics = (await client.get("/metrics")).json()["sse_sessions"]
+
+    assert json.loads(data)["params"] == subscribe
+    assert metrics == {"open": 1, "reaped": {}}
@@ -0,0 +1,49 @@
+"""The alerts://{state} resources of implement_sse."""
+
+import pytest
+
+pytest.importorskip("mcp")
+httpx = pytest.importorskip("httpx")
+
+import anyio  # noqa: E402
+from pydantic import AnyUrl  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_capabilities_advertise_subscribe(weather_session):
+    async with weather_session() as (_, client):
+        templates = await client.list_resource_templates()
+        capabilities = client.get_server_capabilities()
+
+    assert capabilities.resources.subscribe is True
+    assert [template.uriTemplate for template in templates.resourceTemplates] == ["alerts://{state}"]
+
+
+async def test_subscriber_notified_when_alerts_change(weather_session, nws_stub):
+    updated: list[str] = []
+    changed = anyio.Event()
+
+    async def on_message(message) -> None:
+        root = getattr(message, "root", None)
+        if getattr(root, "method", None) == "notifications/resources/updated":
+            updated.append(str(root.params.uri))
+            changed.set()
+
+    async with weather_session(message_handler=on_message) as (ctx, client):
+        # The process-wide poller sleeps a minute first, run a faster one
+        ctx.alert_feed.interval = 0.1
+        ctx.task_group.start_soon(ctx.alert_feed.run)
+        await client.subscribe_resource(AnyUrl("alerts://KS"))
+
+        await anyio.sleep(0.5)
+        assert updated == [], "unchanged alerts must not notify"
+
+        async with httpx.AsyncClient() as http:
+            (await http.post(f"{nws_stub}/stub/alerts/KS/reissue")).raise_for_status()
+        with anyio.fail_after(10):
+            await changed.wait()
+
+        await client.unsubscribe_resource(AnyUrl("alerts://KS"))
+
+    assert updated == ["alerts://KS"]
@@ -0,0 +1,71 @@
+"""ToolScheduler's weighted sharing of the server-wide tool slots."""
+
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("httpx")
+
+import anyio  # noqa: E402
+from tool_scheduler import UNKNOWN_TOOL_BUCKET, ToolPolicy, ToolScheduler  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+CALLS_PER_TOOL = 200
+COUNTED = 100
+
+
+async def admissions(scheduler, names: list[str]) -> list[str]:
+    """Tools in the order their calls got a slot, with every call queued up front."""
+    order = []
+
+    async def call(name: str) -> None:
+        async with scheduler.slot(name):
+            order.append(name)
+            await anyio.sleep(0.001)
+
+    async with anyio.create_task_group() as tg:
+        for name in names:
+            tg.start_soon(call, name)
+    return order
+
+
+@pytest.mark.parametrize("capacity", [2, 8])
+async def test_backlogged_tools_share_slots_by_weight(capacity):
+    policies = {
+        "fast": ToolPolicy(max_concurrency=32, weight=4.0),
+        "slow": ToolPolicy(max_concurrency=32, weight=1.0),
+    }
+    scheduler = ToolScheduler(policies, capacity)
+    names = [name for _ in range(CALLS_PER_TOOL) for name in ("slow", "fast")]
+
+    order = await admissions(scheduler, names)
+
+    # Both tools still have calls waiting during the first COUNTED admissions
+    share = Counter(order[capacity : capacity + COUNTED])
+    assert 75 <= share["fast"] <= 85, share
+    assert share["slow"] >= 15, share
+
+
+async def test_idle_tool_gets_no_saved_credit():
+    policies = {
+        "fast": ToolPolicy(max_concurrency=32, weight=1.0),
+        "slow": ToolPolicy(max_concurrency=32, weight=1.0),
+    }
+    scheduler = ToolScheduler(policies, 2)
+    await admissions(scheduler, ["fast"] * CALLS_PER_TOOL)
+
+    order = await admissions(scheduler, [name for _ in range(CALLS_PER_TOOL) for name in ("fast", "slow")])
+
+    share = Counter(order[2 : 2 + COUNTED])
+    assert 45 <= share["slow"] <= 55, share
+
+
+async def test_unknown_tools_share_one_stats_bucket():
+    scheduler = ToolScheduler(capacity=4)
+
+    await admissions(scheduler, ["get_alerts"] + [f"made-up-{i}" for i in range(50)])
+
+    assert set(scheduler.as_dict()["tools"]) == {"get_alerts", UNKNOWN_TOOL_BUCKET}
+    assert scheduler.as_dict()["tools"][UNKNOWN_TOOL_BUCKET]["calls"] == 50
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("httpx")
+
+from tests.conftest import REPLY_TIMEOUT  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "script, args",
+    [
+        ("implement_weather.py", []),
+        ("implement_sse.py", ["--transport", "stdio"]),
+        ("implement_sse.py", ["--transport", "stdio", "--stdio-framing", "fast"]),
+        ("fastmcp_weather.py", ["--transport", "stdio"]),
+    ],
+)
+def test_stdio_server_answers_forecast(stdio_server, script, args):
+    client = stdio_server(script, *args)
+    assert "tools" in client.initialize()["result"]["capabilities"]
+    tools = {tool["name"] for tool in client.request("tools/list")["result"]["tools"]}
+    assert {"get_alerts", "get_forecast"} <= tools
+
+    result = client.call_tool("get_forecast", {"latitude": 38.8898, "longitude": -77.0091})
+    assert not result.get("isError")
+    assert "Temperature:" in result["content"][0]["text"]
+
+
+def test_fast_stdio_answers_pipelined_requests(stdio_server):
+    client = stdio_server("implement_sse.py", "--transport", "stdio", "--stdio-framing", "fast")
+    client.initialize()
+
+    # Several messages in one write, the last one split across two
+    lines = b"".join(
+        json.dumps({"jsonrpc": "2.0", "id": 100 + i, "method": "ping"}).encode() + b"\n" for i in range(20)
+    )
+    client.process.stdin.write(lines[:-10])
+    client.process.stdin.flush()
+    client.process.stdin.write(lines[-10:])
+    client.process.stdin.flush()
+
+    replies = [client.messages.get(timeout=REPLY_TIMEOUT) for _ in range(20)]
+    assert sorted(reply["id"] for reply in replies) == list(range(100, 120))
+    assert all(reply["result"] == {} for reply in replies)
@@ -0,0 +1,36 @@
+"""JSON-RPC batches posted to the SSE transport's message endpoint."""
+
+import pytest
+
+pytest.importorskip("mcp")
+httpx = pytest.importorskip("httpx")
+
+from tests.conftest import REPLY_TIMEOUT, SseSession  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_every_batch_element_is_answered(sse_server):
+    async with httpx.AsyncClient(base_url=sse_server, timeout=REPLY_TIMEOUT) as client:
+        async with client.stream("GET", "/sse") as stream:
+            session = SseSession(client, stream.aiter_lines())
+            await session.initialize()
+
+            batch = [
+                {"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+                {"jsonrpc": "2.0", "id": 2, "method": "ping"},
+                {
+                    "jsonrpc": "2.0",
+                    "id": 3,
+                    "method": "tools/call",
+                    "params": {"name": "get_alerts", "arguments": {"state": "KS"}},
+                },
+                {"jsonrpc": "2.0", "id": 4, "method": "ping"},
+            ]
+            response = await session.post(batch)
+            replies = await session.replies(len(batch))
+
+    assert response.status_code == 202, response.text
+    assert sorted(replies) == [1, 2, 3, 4]
+    assert all("error" not in reply for reply in replies.values())
+    assert replies[3]["result"]["content"][0]["text"]
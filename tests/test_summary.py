@@ -0,0 +1,81 @@
+"""get_forecast_summary's reduction of forecast series."""
+
+import json
+
+import pytest
+
+pytest.importorskip("mcp")
+httpx = pytest.importorskip("httpx")
+np = pytest.importorskip("numpy")
+
+from harness import POINTS  # noqa: E402
+
+
+def period(start: str, temperature: int, precipitation: int, wind: str) -> dict:
+    return {
+        "startTime": start,
+        "temperature": temperature,
+        "temperatureUnit": "F",
+        "probabilityOfPrecipitation": {"value": precipitation},
+        "windSpeed": wind,
+    }
+
+
+def test_summary_of_hourly_periods(implement_sse):
+    periods = [
+        period("2026-01-01T00:00", 35, 10, "5 mph"),
+        period("2026-01-01T01:00", 30, 60, "10 to 20 mph"),
+        period("2026-01-01T02:00", 33, 80, "15 mph"),
+    ]
+
+    summary = implement_sse.summarize_hourly(periods, window=2)
+
+    assert summary["hours"] == 3
+    assert summary["temperature"] == {"min": 30.0, "max": 35.0, "mean": 32.7}
+    assert [crossing["to"] for crossing in summary["freezing_crossings"]] == ["below", "above"]
+    assert summary["wet_hours"] == 2
+    assert summary["wettest_window"] == {"start": "2026-01-01T01:00", "hours": 2, "mean": 70.0}
+
+
+@pytest.mark.parametrize("output", ["text", "json", "compact"])
+def test_empty_window_summarizes_zero_hours(implement_sse, output):
+    empty = np.array([], dtype=float)
+    summaries = [
+        implement_sse.summarize_hourly([]),
+        # e.g. a gridpoint tile whose hours all lie before now
+        implement_sse.summarize_series(empty.astype("datetime64[h]").astype(str), empty, empty, empty, "F", 3),
+    ]
+
+    for summary in summaries:
+        assert summary["hours"] == 0
+        assert summary["from"] is None and summary["wettest_window"] is None
+        assert summary["temperature"] == {"min": None, "max": None, "mean": None}
+
+        text = implement_sse.format_summary(summary, output)
+        if output == "json":
+            assert json.loads(text)["hours"] == 0
+        else:
+            assert text in ("No forecast hours to summarize.", "no periods")
+
+
+@pytest.mark.anyio
+async def test_summary_tool_matches_the_hourly_forecast(weather_session, nws_stub):
+    latitude, longitude = POINTS[0]
+    async with httpx.AsyncClient() as http:
+        points = (await http.get(f"{nws_stub}/points/{latitude},{longitude}")).json()["properties"]
+        periods = (await http.get(points["forecastHourly"])).json()["properties"]["periods"][:24]
+    temperatures = [period["temperature"] for period in periods]
+
+    async with weather_session() as (_, client):
+        tools = {tool.name for tool in (await client.list_tools()).tools}
+        result = await client.call_tool(
+            "get_forecast_summary",
+            {"latitude": latitude, "longitude": longitude, "hours": 24, "output": "json"},
+        )
+    summary = json.loads(result.content[0].text)
+
+    assert "get_forecast_summary" in tools
+    assert summary["hours"] == 24
+    assert summary["from"] == periods[0]["startTime"]
+    assert summary["temperature"]["min"] == min(temperatures)
+    assert summary["temperature"]["max"] == max(temperatures)
@@ -0,0 +1,60 @@
+"""Startup warm-up and the key usage counts it is planned from."""
+
+import json
+import time
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("httpx")
+
+import anyio  # noqa: E402
+from weather_cache import ResponseCache  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_initialize_does_not_wait_for_a_stalled_warmup(
+    implement_sse, weather_session, stalled_stub, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(implement_sse, "NWS_API_BASE", stalled_stub)
+    keys = tmp_path / "cache_keys.json"
+    keys.write_text(
+        json.dumps([f"{stalled_stub}/alerts/active/area/KS", f"{stalled_stub}/points/38.8898,-77.0091"])
+    )
+    warmup = implement_sse.Warmup(keys_path=keys)
+
+    started = time.monotonic()
+    async with weather_session(warmup=warmup) as (ctx, client):
+        initialized = time.monotonic() - started
+        tools = await client.list_tools()
+        warming = not ctx.warmup.done
+
+    assert initialized < 1.0
+    assert warming
+    assert tools.tools
+
+
+async def test_warmup_fills_the_cache(implement_sse, weather_session, nws_stub, tmp_path):
+    url = f"{nws_stub}/alerts/active/area/KS"
+    keys = tmp_path / "cache_keys.json"
+    keys.write_text(json.dumps([url]))
+    warmup = implement_sse.Warmup(keys_path=keys)
+
+    async with weather_session(warmup=warmup) as (ctx, _):
+        with anyio.fail_after(10):
+            while not ctx.warmup.done:
+                await anyio.sleep(0.01)
+
+        assert url in ctx.cache.entries
+
+
+def test_key_uses_stay_bounded():
+    cache = ResponseCache(max_entries=4)
+    for i in range(1000):
+        cache.get("https://api.weather.gov/points/hot")
+        cache.get(f"https://api.weather.gov/points/{i}")
+
+        assert len(cache.uses) <= cache.max_uses
+
+    assert cache.top_keys(1) == ["https://api.weather.gov/points/hot"]
@@ -0,0 +1,49 @@
+"""The offline zone index against the zones the NWS stub reports."""
+
+import json
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from harness import POINTS, build_zone_index  # noqa: E402
+from zone_index import ZoneIndex  # noqa: E402
+
+
+def test_lookup_matches_points_zones(nws_stub, tmp_path):
+    with ZoneIndex(build_zone_index(tmp_path)) as index:
+        for latitude, longitude in POINTS:
+            properties = httpx.get(f"{nws_stub}/points/{latitude},{longitude}").json()["properties"]
+            expected = {properties["forecastZone"].rpartition("/")[2], properties["county"].rpartition("/")[2]}
+
+            assert set(index.lookup(latitude, longitude)) == expected, (latitude, longitude)
+
+
+def test_lookup_outside_every_zone(tmp_path):
+    with ZoneIndex(build_zone_index(tmp_path)) as index:
+        assert index.lookup(64.8378, -147.7164) == []
+
+
+def test_alerts_at_point_uses_the_zone_index(stdio_server, nws_stub):
+    pytest.importorskip("mcp")
+    from nws_stub import zone_codes
+
+    # The stub issues alert i for zone Z{i} and county C{i} of the state: this
+    # point's state feed holds alerts for its own zones and for zones elsewhere
+    latitude, longitude = POINTS[1]
+    zones = set(zone_codes(latitude, longitude))
+    feed = httpx.get(f"{nws_stub}/alerts/active/area/{min(zones)[:2]}").json()["features"]
+    inside = sorted(f["properties"]["areaDesc"] for f in feed if set(f["properties"]["geocode"]["UGC"]) & zones)
+    client = stdio_server("implement_sse.py", "--transport", "stdio")
+    client.initialize()
+    tools = {tool["name"] for tool in client.request("tools/list")["result"]["tools"]}
+
+    result = client.call_tool(
+        "get_alerts_at_point", {"latitude": latitude, "longitude": longitude, "output": "json"}
+    )
+
+    assert "get_alerts_at_point" in tools
+    assert not result.get("isError")
+    assert inside and len(inside) < len(feed)
+    alerts = json.loads(result["content"][0]["text"])["alerts"]
+    assert sorted(alert["areaDesc"] for alert in alerts) == inside
@@ -0,0 +1,126 @@
+"""A lower-overhead drop-in for mcp.server.stdio.stdio_server.
+
+    from fast_stdio import stdio_server
+
+    async with stdio_server() as (read_stream, write_stream):
+        await server.run(read_stream, write_stream, server.create_initialization_options())
+
+The streams carry the same SessionMessage objects as the SDK's transport,
+each wrapping one JSONRPCMessage; only the framing underneath differs:
+
+- The SDK reads stdin a line at a time through a TextIOWrapper in a worker
+  thread, one thread round trip and a str decode per message. Here stdin is
+  read in large chunks into one reusable buffer, and every complete line in
+  a chunk is parsed straight from bytes, so a pipelining host costs one
+  thread round trip per chunk rather than per message.
+- Replies are serialized straight to bytes by pydantic-core, and whatever is
+  queued when the writer wakes up goes out in a single write, instead of a
+  write and a flush per message.
+
+JSON stays with pydantic-core: the messages are pydantic models, and its
+Rust parser and serializer work on bytes directly, where another JSON
+library would add a round trip through Python dicts.
+"""
+
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import BinaryIO
+
+import anyio
+import anyio.lowlevel
+import anyio.to_thread
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from pydantic import TypeAdapter
+
+import mcp.types as types
+from mcp.shared.message import SessionMessage
+
+READ_SIZE = 64 * 1024
+# Replies coalesced into one write at most
+WRITE_BATCH = 64
+
+message_adapter: TypeAdapter[types.JSONRPCMessage] = TypeAdapter(types.JSONRPCMessage)
+
+
+def write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+@asynccontextmanager
+async def stdio_server(stdin: BinaryIO | None = None, stdout: BinaryIO | None = None):
+    """Server transport over the process' stdin and stdout, or the given binary files."""
+    stdin_fd = (stdin or sys.stdin.buffer).fileno()
+    stdout_fd = (stdout or sys.stdout.buffer).fileno()
+    if stdout is None:
+        # Anything buffered would otherwise end up after our own writes
+        sys.stdout.flush()
+
+    read_stream: MemoryObjectReceiveStream[SessionMessage | Exception]
+    read_stream_writer: MemoryObjectSendStream[SessionMessage | Exception]
+
+    write_stream: MemoryObjectSendStream[SessionMessage]
+    write_stream_reader: MemoryObjectReceiveStream[SessionMessage]
+
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+
+    async def deliver(line: bytes | bytearray) -> None:
+        if not line.strip():
+            return
+        try:
+            message = types.JSONRPCMessage.model_validate_json(line)
+        except Exception as exc:
+            await read_stream_writer.send(exc)
+            return
+        await read_stream_writer.send(SessionMessage(message))
+
+    async def stdin_reader():
+        buffer = bytearray()
+        try:
+            async with read_stream_writer:
+                while True:
+                    # A blocked read must not keep the process alive on shutdown
+                    chunk = await anyio.to_thread.run_sync(
+                        os.read, stdin_fd, READ_SIZE, abandon_on_cancel=True
+                    )
+                    if not chunk:
+                        break
+                    if not buffer and chunk.endswith(b"\n") and chunk.count(b"\n") == 1:
+                        # The common case of one whole message per read, no copy at all
+                        await deliver(chunk)
+                        continue
+                    buffer += chunk
+                    start = 0
+                    while (end := buffer.find(b"\n", start)) != -1:
+                        await deliver(buffer[start:end])
+                        start = end + 1
+                    # Keep only the incomplete tail, once per chunk rather than per line
+                    del buffer[:start]
+                # A last message without a trailing newline
+                await deliver(buffer)
+        except anyio.ClosedResourceError:
+            await anyio.lowlevel.checkpoint()
+
+    async def stdout_writer():
+        try:
+            async with write_stream_reader:
+                async for item in write_stream_reader:
+                    payloads = [message_adapter.dump_json(item.message, by_alias=True, exclude_none=True)]
+                    while len(payloads) < WRITE_BATCH:
+                        try:
+                            queued = write_stream_reader.receive_nowait()
+                        except (anyio.WouldBlock, anyio.EndOfStream):
+                            break
+                        payloads.append(message_adapter.dump_json(queued.message, by_alias=True, exclude_none=True))
+                    payloads.append(b"")
+                    await anyio.to_thread.run_sync(write_all, stdout_fd, b"\n".join(payloads))
+        except anyio.ClosedResourceError:
+            await anyio.lowlevel.checkpoint()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(stdin_reader)
+        tg.start_soon(stdout_writer)
+        yield read_stream, write_stream
@@ -1,24 +1,86 @@
 from contextlib import asynccontextmanager
 from collections.abc import AsyncIterator
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
 from mcp.server.fastmcp import FastMCP, Context
-from starlette.applications import Starlette
-from starlette.routing import Mount
-import uvicorn
+import logging
+import os
+from pathlib import Path
+from typing import Any, Literal
+
 import httpx
-from typing import Any
+import uvicorn
+
+from weather_alerts import AlertFilter, sort_alerts
+from weather_cache import ResponseCache
+from weather_logging import setup_logging
+from weather_output import alert_summary, period_summary, render_structured
+from weather_serving import SERVING_PROFILES, run_with_profile, uvicorn_options
 
 # Constants for the National Weather Service API
-NWS_API_BASE = "https://api.weather.gov"
+NWS_API_BASE = os.environ.get("WEATHER_NWS_API_BASE", "https://api.weather.gov")
 USER_AGENT = "weather-app/1.0"
+GAZETTEER_PATH = Path(os.environ.get("WEATHER_GAZETTEER", Path(__file__).with_name("places.idx")))
+
+logger = logging.getLogger("weather.upstream")
+
+
+@dataclass
+class WeatherContext:
+    """Resources the tools share, reached through ctx.request_context.lifespan_context."""
+
+    cache: ResponseCache
+    http: httpx.AsyncClient | None = None
+    # Offline place name lookup, see gazetteer.py
+    gazetteer: Any = None
+
+    def client(self) -> httpx.AsyncClient:
+        """The pooled upstream client, created by the first request.
+
+        Building it loads the CA bundle, which would otherwise delay the
+        initialize response of every freshly spawned stdio server.
+        """
+        if self.http is None:
+            self.http = httpx.AsyncClient(
+                headers={"User-Agent": USER_AGENT, "Accept": "application/geo+json"},
+                timeout=30.0,
+            )
+        return self.http
+
 
 @asynccontextmanager
-async def server_lifespan(server: FastMCP) -> AsyncIterator[str]:
+async def open_weather_context() -> AsyncIterator[WeatherContext]:
+    from gazetteer import open_gazetteer
+
+    # One pooled client instead of one per request
+    weather = WeatherContext(cache=ResponseCache())
+    try:
+        weather.gazetteer = open_gazetteer(GAZETTEER_PATH)
+    except (OSError, ValueError) as e:
+        logger.warning("Gazetteer unavailable", extra={"path": str(GAZETTEER_PATH), "error": str(e)})
     try:
-        ## This is just example. actual code,
-        ## Using yield with time consuming resource, like db connection
-        yield server.name
+        yield weather
     finally:
-        pass
+        if weather.http is not None:
+            await weather.http.aclose()
+        if weather.gazetteer is not None:
+            weather.gazetteer.close()
+
+
+# Set while serving several transports from one process, so every session
+# of every transport shares one connection pool and cache
+current_context: ContextVar[WeatherContext] = ContextVar("weather_context")
+
+
+@asynccontextmanager
+async def server_lifespan(server: FastMCP) -> AsyncIterator[WeatherContext]:
+    # FastMCP enters this once per session, i.e. per SSE connection
+    weather = current_context.get(None)
+    if weather is not None:
+        yield weather
+        return
+    async with open_weather_context() as weather:
+        yield weather
 
 
 # Create FastMCP instance with SSE support
@@ -69,17 +131,20 @@ async def run_server(transport: str = "stdio", port: int = 9009) -> None:
                 read_stream, write_stream, server.create_initialization_options()
             )
 
-async def make_nws_request(url: str) -> dict[str, Any] | None:
-    """Make a request to the NWS API with proper error handling."""
-    headers = {"User-Agent": USER_AGENT, "Accept": "application/geo+json"}
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Error making request: {e}")
-            return None
+async def make_nws_request(weather: WeatherContext, url: str) -> dict[str, Any] | None:
+    """Make a request to the NWS API with proper error handling, cached while fresh."""
+    data = weather.cache.get(url)
+    if data is not None:
+        return data
+    try:
+        response = await weather.client().get(url)
+        response.raise_for_status()
+        data = response.json()
+    except Exception as e:
+        logger.warning("NWS request failed", extra={"url": url, "error": str(e)})
+        return None
+    weather.cache.put(url, data)
+    return data
 
 
 def format_alert(feature: dict) -> str:
@@ -93,24 +158,107 @@ Description: {props.get('description', 'No description available')}
 Instructions: {props.get('instruction', 'No specific instructions provided')}
 """
 
-async def run_sse(port: int = 9009) -> None:
-    starlette_app = Starlette(routes=[Mount("/", app=mcp.sse_app())])
-    config = uvicorn.Config(starlette_app, host="0.0.0.0", port=port)  # noqa: S104
-    app = uvicorn.Server(config)
-    # Use server.serve() instead of run() to stay in the same event loop
-    await app.serve()
+
+OutputMode = Literal["text", "json", "compact"]
+Severity = Literal["Extreme", "Severe", "Moderate", "Minor", "Unknown"]
+Urgency = Literal["Immediate", "Expected", "Future", "Past", "Unknown"]
+
+
+def sse_server(port: int = 9009, serving_profile: str = "default") -> uvicorn.Server:
+    from starlette.applications import Starlette
+    from starlette.middleware import Middleware
+    from starlette.routing import Mount
+
+    from jsonrpc_batch import BatchMiddleware
+
+    starlette_app = Starlette(
+        debug=SERVING_PROFILES[serving_profile]["debug"],
+        routes=[Mount("/", app=mcp.sse_app())],
+        # JSON-RPC batches on the message endpoint
+        middleware=[Middleware(BatchMiddleware)],
+    )
+    config = uvicorn.Config(
+        starlette_app,
+        host="0.0.0.0",  # noqa: S104
+        port=port,
+        log_config=None,
+        **uvicorn_options(serving_profile),
+    )
+    return uvicorn.Server(config)
+
+
+async def run_sse(port: int = 9009, serving_profile: str = "default") -> None:
+    async with open_weather_context() as weather:
+        current_context.set(weather)
+        # Use server.serve() instead of run() to stay in the same event loop
+        await sse_server(port, serving_profile).serve()
+
+
+async def run_both(port: int = 9009, serving_profile: str = "default") -> None:
+    """Serve the stdio host and SSE clients from one event loop.
+
+    Both transports share one WeatherContext, so a forecast fetched for
+    the desktop host is a cache hit for remote agents and the other way
+    round. The process exits when the host closes stdin, as it would
+    with stdio alone, or when uvicorn is told to shut down.
+    """
+    import anyio
+
+    async with open_weather_context() as weather:
+        current_context.set(weather)
+        app = sse_server(port, serving_profile)
+        async with anyio.create_task_group() as tg:
+
+            async def serve_sse() -> None:
+                await app.serve()
+                tg.cancel_scope.cancel()
+
+            tg.start_soon(serve_sse)
+            await mcp.run_stdio_async()
+            # Let uvicorn drain open SSE connections before the pool closes
+            app.should_exit = True
+
+
+def select_alerts(
+    features: list[dict],
+    severity: Severity | None,
+    event: str | None,
+    urgency: list[Urgency] | None,
+    since: str | None,
+    limit: int | None,
+) -> list[dict]:
+    """Filter on the decoded features, then sort most severe and soonest first."""
+    selected = sort_alerts(AlertFilter(severity, event, urgency, since).apply(features))
+    return selected if limit is None else selected[:limit]
+
 
 @mcp.tool()
-async def get_alerts(state: str, ctx: Context) -> str:
-    """Get weather alerts for a US state.
+async def get_alerts(
+    state: str,
+    ctx: Context,
+    severity: Severity | None = None,
+    event: str | None = None,
+    urgency: list[Urgency] | None = None,
+    since: str | None = None,
+    limit: int | None = None,
+    output: OutputMode = "text",
+) -> str:
+    """Get weather alerts for a US state, most severe first.
 
     Args:
         state: Two-letter US state code (e.g. CA, NY)
         ctx: FastMCP context for progress reporting and logging
+        severity: Only alerts at least this severe
+        event: Only alerts whose event contains this text, e.g. Flood
+        urgency: Only alerts with one of these urgencies
+        since: Only alerts sent at or after this ISO 8601 time
+        limit: Return at most this many alerts
+        output: text for readable prose, json or compact for only the essential fields
     """
-    ctx.info(f"Fetching alerts for state: {state}")
+    await ctx.info(f"Fetching alerts for state: {state}")
+    weather: WeatherContext = ctx.request_context.lifespan_context
     url = f"{NWS_API_BASE}/alerts/active/area/{state}"
-    data = await make_nws_request(url)
+    data = await make_nws_request(weather, url)
 
     if not data or "features" not in data:
         return f"Unable to fetch alerts or no alerts found for {state}."
@@ -118,67 +266,137 @@ async def get_alerts(state: str, ctx: Context) -> str:
     if not data["features"]:
         return "No active alerts for this state."
 
-    alerts = [format_alert(feature) for feature in data["features"]]
+    features = select_alerts(data["features"], severity, event, urgency, since, limit)
+    if not features:
+        return "No active alerts for this state match the filters."
+
+    if output != "text":
+        return render_structured(
+            "alerts", [alert_summary(feature) for feature in features], output
+        )
+
+    alerts = [format_alert(feature) for feature in features]
     return "\n--\n".join(alerts)
 
 @mcp.tool()
-async def get_forecast(latitude: float, longitude: float, ctx: Context) -> str:
+async def geocode(query: str, ctx: Context, limit: int = 5, output: OutputMode = "text") -> str:
+    """Find the coordinates of a US city or town by name, offline.
+
+    Misspellings and name prefixes are matched too.
+
+    Args:
+        query: Place name, optionally with its state. ex. Springfield, IL
+        ctx: FastMCP context for progress reporting and logging
+        limit: Maximum number of places to return, best match first
+        output: text for readable prose, json or compact for only the essential fields
+    """
+    weather: WeatherContext = ctx.request_context.lifespan_context
+    if weather.gazetteer is None:
+        return "Gazetteer is not available on this server."
+    places = weather.gazetteer.search(query, max(1, limit))
+    if output != "text":
+        return render_structured("places", [asdict(place) for place in places], output)
+    if not places:
+        return f"No place matching {query}."
+    return "\n".join(
+        f"{place.label}: {place.latitude}, {place.longitude} (population {place.population})"
+        for place in places
+    )
+
+
+@mcp.tool()
+async def get_forecast(
+    ctx: Context,
+    latitude: float | None = None,
+    longitude: float | None = None,
+    place: str | None = None,
+    output: OutputMode = "text",
+) -> str:
     """Get weather forecast for a location.
 
     Args:
+        ctx: FastMCP context for progress reporting and logging
         latitude: Latitude of the location
         longitude: Longitude of the location
-        ctx: FastMCP context for progress reporting and logging
+        place: US place name, optionally with its state, instead of latitude and longitude
+        output: text for readable prose, json or compact for only the essential fields
     """
-    ctx.info(f"Fetching forecast for location: {latitude}, {longitude}")
+    weather: WeatherContext = ctx.request_context.lifespan_context
+    label = None
+    if latitude is None or longitude is None:
+        if not place or weather.gazetteer is None:
+            raise ValueError("Provide latitude and longitude, or place")
+        places = weather.gazetteer.search(place, 1)
+        if not places:
+            raise ValueError(f"Unknown place: {place}, try geocode to find it")
+        latitude, longitude, label = places[0].latitude, places[0].longitude, places[0].label
+    await ctx.info(f"Fetching forecast for location: {latitude}, {longitude}")
 
     # First get the Forecast grid endpoint
     points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
-    points_data = await make_nws_request(points_url)
+    points_data = await make_nws_request(weather, points_url)
 
     if not points_data:
         return "Unable to fetch forecast data for this location."
 
     # Get the forecast URL from the points response
     forecast_url = points_data["properties"]["forecast"]
-    forecast_data = await make_nws_request(forecast_url)
+    forecast_data = await make_nws_request(weather, forecast_url)
 
     if not forecast_data:
         return "Unable to fetch detailed forecast."
 
     # Format the periods into a readable forecast
-    periods = forecast_data["properties"]["periods"]
-    forecasts = []
+    periods = forecast_data["properties"]["periods"][:5]  # Only show next 5 periods
+    if output != "text":
+        return render_structured(
+            "periods", [period_summary(period) for period in periods], output
+        )
 
-    for period in periods[:5]:  # Only show next 5 periods
+    forecasts = []
+    for period in periods:
         forecast = f"""
 {period['name']}:
 Temperature: {period['temperature']}°{period['temperatureUnit']}
 Wind: {period['windSpeed']} {period['windDirection']}
 Forecast: {period['detailedForecast']}
-        """
+"""
         forecasts.append(forecast)
+    if label is not None:
+        # Say which place was picked, the name may have matched several
+        forecasts.insert(0, f"{label} ({latitude}, {longitude})")
     return "\n--\n".join(forecasts)
 def main():
     """Run the FastMCP server"""
-    import asyncio
     import argparse
 
     parser = argparse.ArgumentParser(description="Run the FastMCP Weather Server")
     parser.add_argument(
         "--transport",
-        choices=["stdio", "sse"],
+        choices=["stdio", "sse", "both"],
         default="stdio",
-        help="Transport type to use",
+        help="Transport type to use, both serves stdio and SSE from one process",
     )
     parser.add_argument(
         "--port", type=int, default=8000, help="Port to use for SSE transport"
     )
+    parser.add_argument(
+        "--serving-profile",
+        choices=list(SERVING_PROFILES),
+        default="default",
+        help="HTTP serving profile for the SSE transport",
+    )
     args = parser.parse_args()
-    if args.transport == "sse":
-        asyncio.run(run_sse(port=args.port))
-    else:
-        mcp.run()
+    # Replaces FastMCP's own handlers, stdout stays reserved for stdio JSON-RPC
+    listener = setup_logging()
+    try:
+        if args.transport in ("sse", "both"):
+            run = run_sse if args.transport == "sse" else run_both
+            run_with_profile(run(port=args.port, serving_profile=args.serving_profile), args.serving_profile)
+        else:
+            mcp.run()
+    finally:
+        listener.stop()
 
 if __name__ == "__main__":
     main()
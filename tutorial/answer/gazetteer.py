@@ -0,0 +1,375 @@
+"""Offline gazetteer resolving US place names to coordinates.
+
+Like the zone index, the gazetteer is a single binary file that is
+memory-mapped, so turning "Springfield, IL" into a latitude/longitude is a
+local lookup taking microseconds, with no upstream call. It holds:
+
+- the places sorted by normalized name, for exact and prefix matches by
+  binary search;
+- a trigram index, for fuzzy matches of misspelled names.
+
+The servers build it on first start from the bundled us_places.csv, the
+larger cities and every state capital, and rebuild it whenever that file
+changes. For every incorporated place and
+census-designated place, build it from the Census Bureau's national places
+gazetteer (https://www.census.gov/geographies/reference-files/time-series/geo/gazetteer-files.html),
+together with the bundled file, whose populations rank places sharing a name:
+
+    python gazetteer.py build 2023_Gaz_place_national.txt us_places.csv -o places.idx
+    python gazetteer.py search places.idx "springfeld, il"
+
+The servers leave a gazetteer built this way as it is.
+"""
+
+import csv
+import hashlib
+import mmap
+import os
+import re
+import struct
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+MAGIC = b"GAZT"
+VERSION = 2
+BUNDLED_PLACES = Path(__file__).with_name("us_places.csv")
+DEFAULT_LIMIT = 5
+# Prefix matches looked at before ranking, bounds the cost of short queries
+PREFIX_SCAN = 500
+FUZZY_CANDIDATES = 50
+# Dice coefficient over trigrams a fuzzy match needs
+FUZZY_MIN_SIMILARITY = 0.5
+
+ALPHABET = " abcdefghijklmnopqrstuvwxyz0123456789"
+SYMBOL = {char: code for code, char in enumerate(ALPHABET)}
+TRIGRAMS = len(ALPHABET) ** 3
+ABBREVIATIONS = {"saint": "st", "sainte": "ste", "mount": "mt", "fort": "ft"}
+# Census place names end in their legal/statistical area description
+AREA_SUFFIXES = ("city", "town", "village", "borough", "CDP", "municipality", "comunidad", "zona urbana")
+STATES = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR", "california": "CA",
+    "colorado": "CO", "connecticut": "CT", "delaware": "DE", "district of columbia": "DC",
+    "florida": "FL", "georgia": "GA", "hawaii": "HI", "idaho": "ID", "illinois": "IL",
+    "indiana": "IN", "iowa": "IA", "kansas": "KS", "kentucky": "KY", "louisiana": "LA",
+    "maine": "ME", "maryland": "MD", "massachusetts": "MA", "michigan": "MI", "minnesota": "MN",
+    "mississippi": "MS", "missouri": "MO", "montana": "MT", "nebraska": "NE", "nevada": "NV",
+    "new hampshire": "NH", "new jersey": "NJ", "new mexico": "NM", "new york": "NY",
+    "north carolina": "NC", "north dakota": "ND", "ohio": "OH", "oklahoma": "OK", "oregon": "OR",
+    "pennsylvania": "PA", "puerto rico": "PR", "rhode island": "RI", "south carolina": "SC",
+    "south dakota": "SD", "tennessee": "TN", "texas": "TX", "utah": "UT", "vermont": "VT",
+    "virginia": "VA", "washington": "WA", "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY",
+}  # fmt: skip
+STATE_CODES = set(STATES.values())
+
+# magic, version, places, strings size, postings, digest of the bundled
+# places it was built from (0 when built from other sources)
+HEADER = struct.Struct("<4sIIIIQ")
+# key offset, key length, name offset, name length, state, latitude,
+# longitude, population, distinct trigrams of the key
+PLACE = struct.Struct("<IHIH2sffIH")
+
+
+def normalize(name: str) -> str:
+    """Lowercase ASCII words, so "St. Louis" and "saint louis" share a key."""
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+    words = re.sub(r"[^a-z0-9]+", " ", text.replace("'", "")).split()
+    return " ".join(ABBREVIATIONS.get(word, word) for word in words)
+
+
+def trigrams(key: str) -> set[int]:
+    """Codes of the letter triples of a normalized key, padded by a space each side."""
+    padded = f" {key} "
+    return {
+        (SYMBOL[padded[i]] * len(ALPHABET) + SYMBOL[padded[i + 1]]) * len(ALPHABET) + SYMBOL[padded[i + 2]]
+        for i in range(len(padded) - 2)
+    }
+
+
+def split_state(query: str) -> tuple[str, str | None]:
+    """Split "Portland, ME", "Portland ME" or "Portland, Maine" into name and state code."""
+    name, comma, tail = query.rpartition(",")
+    if comma:
+        state = tail.strip()
+        if state.upper() in STATE_CODES:
+            return name, state.upper()
+        if normalize(state) in STATES:
+            return name, STATES[normalize(state)]
+    name, _, last = query.strip().rpartition(" ")
+    # Without a comma only an upper case code counts, "portland or" is ambiguous
+    if name and last in STATE_CODES:
+        return name, last
+    return query, None
+
+
+@dataclass(frozen=True)
+class Place:
+    name: str
+    state: str
+    latitude: float
+    longitude: float
+    population: int
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}, {self.state}"
+
+
+def read_places(source: Path) -> list[Place]:
+    """Places from our CSV format or a Census gazetteer file (tab separated)."""
+    places = []
+    with open(source, newline="", encoding="utf-8") as f:
+        if source.suffix == ".csv":
+            for row in csv.DictReader(f):
+                places.append(
+                    Place(
+                        row["name"],
+                        row["state"],
+                        float(row["latitude"]),
+                        float(row["longitude"]),
+                        int(row.get("population") or 0),
+                    )
+                )
+            return places
+        reader = csv.DictReader(f, delimiter="\t")
+        # The last column header carries trailing whitespace in some years
+        reader.fieldnames = [field.strip() for field in reader.fieldnames or []]
+        for row in reader:
+            name = row["NAME"]
+            for suffix in AREA_SUFFIXES:
+                if name.endswith(f" {suffix}"):
+                    name = name[: -len(suffix) - 1]
+                    break
+            places.append(Place(name, row["USPS"], float(row["INTPTLAT"]), float(row["INTPTLONG"]), 0))
+    return places
+
+
+def places_digest(path: Path) -> int:
+    """Fingerprint of a places file's content, never 0."""
+    return int.from_bytes(hashlib.sha256(path.read_bytes()).digest()[:8], "little") or 1
+
+
+def build(sources: list[Path], output: Path, bundled_digest: int = 0) -> int:
+    """Write the gazetteer for every place in `sources`, returning the place count.
+
+    A place listed by several sources is kept once, with its largest population.
+    `bundled_digest` is recorded in the header; `open_gazetteer` passes the
+    digest of the bundled places, so it can tell when they changed.
+    """
+    merged: dict[tuple[str, str], Place] = {}
+    for source in sources:
+        for place in read_places(Path(source)):
+            key = (normalize(place.name), place.state)
+            if key[0] and (key not in merged or place.population > merged[key].population):
+                merged[key] = place
+    if not merged:
+        raise ValueError("No places found")
+    entries = sorted(merged.items(), key=lambda item: (item[0][0], -item[1].population, item[0][1]))
+
+    strings = bytearray()
+    records = bytearray()
+    postings: list[list[int]] = [[] for _ in range(TRIGRAMS)]
+    for index, ((key, state), place) in enumerate(entries):
+        key_bytes = key.encode("ascii")
+        name_bytes = place.name.encode("utf-8")
+        codes = trigrams(key)
+        records += PLACE.pack(
+            len(strings),
+            len(key_bytes),
+            len(strings) + len(key_bytes),
+            len(name_bytes),
+            state.encode("ascii"),
+            place.latitude,
+            place.longitude,
+            place.population,
+            len(codes),
+        )
+        strings += key_bytes + name_bytes
+        for code in codes:
+            postings[code].append(index)
+
+    # CSR layout: trigram t owns entries[offsets[t]:offsets[t + 1]]
+    offsets = [0]
+    for ids in postings:
+        offsets.append(offsets[-1] + len(ids))
+    ids = [index for trigram in postings for index in trigram]
+
+    # Servers starting together may each build it, so every build has its own file
+    tmp = Path(output).with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(entries), len(strings), len(ids), bundled_digest))
+        f.write(records)
+        f.write(strings)
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(struct.pack(f"<{len(ids)}I", *ids))
+    # Readers keep their old mapping until they reopen, never a torn file
+    os.replace(tmp, output)
+    return len(entries)
+
+
+class Gazetteer:
+    """Read-only, memory-mapped view of a gazetteer written by `build`."""
+
+    def __init__(self, path: Path | str):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.place_count, strings_size, posting_count, self.bundled_digest = (
+            HEADER.unpack_from(self._mmap, 0)
+        )
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not a gazetteer: {path}")
+
+        view = memoryview(self._mmap)
+        self._places_at = HEADER.size
+        self._strings_at = self._places_at + self.place_count * PLACE.size
+        offsets_at = self._strings_at + strings_size
+        postings_at = offsets_at + (TRIGRAMS + 1) * 4
+        self._offsets = view[offsets_at:postings_at].cast("I")
+        self._postings = view[postings_at : postings_at + posting_count * 4].cast("I")
+        self._keys = _Keys(self)
+
+    def close(self) -> None:
+        for name in ("_offsets", "_postings"):
+            if hasattr(self, name):
+                getattr(self, name).release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "Gazetteer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.place_count
+
+    def _record(self, index: int) -> tuple:
+        return PLACE.unpack_from(self._mmap, self._places_at + index * PLACE.size)
+
+    def key(self, index: int) -> bytes:
+        key_at, key_length = self._record(index)[:2]
+        start = self._strings_at + key_at
+        return self._mmap[start : start + key_length]
+
+    def place(self, index: int) -> Place:
+        _, _, name_at, name_length, state, latitude, longitude, population, _ = self._record(index)
+        start = self._strings_at + name_at
+        name = self._mmap[start : start + name_length].decode("utf-8")
+        return Place(name, state.decode("ascii"), round(latitude, 4), round(longitude, 4), population)
+
+    def _prefixed(self, prefix: bytes) -> list[int]:
+        """Indexes of places whose key starts with `prefix`, at most PREFIX_SCAN."""
+        found = []
+        for index in range(bisect_left(self._keys, prefix), self.place_count):
+            if len(found) == PREFIX_SCAN or not self.key(index).startswith(prefix):
+                break
+            found.append(index)
+        return found
+
+    def _similar(self, key: str) -> list[tuple[float, int]]:
+        """(similarity, index) of the places sharing most trigrams with `key`."""
+        codes = trigrams(key)
+        shared: Counter[int] = Counter()
+        for code in codes:
+            shared.update(self._postings[self._offsets[code] : self._offsets[code + 1]])
+        scored = []
+        for index, count in shared.most_common(FUZZY_CANDIDATES):
+            similarity = 2 * count / (len(codes) + self._record(index)[8])
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                scored.append((similarity, index))
+        # Equally similar names go to the larger place
+        return sorted(scored, key=lambda item: (-item[0], -self._record(item[1])[7]))
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list[Place]:
+        """Best matches for a place name, optionally followed by its state.
+
+        Exact names come first, then names starting with the query, each
+        ranked by population; fuzzy matches only fill what is left.
+        """
+        name, state = split_state(query)
+        key = normalize(name)
+        if not key:
+            return []
+
+        def wanted(index: int) -> bool:
+            return state is None or self._record(index)[4].decode("ascii") == state
+
+        prefix = key.encode("ascii")
+        candidates = [index for index in self._prefixed(prefix) if wanted(index)]
+        candidates.sort(key=lambda index: (self.key(index) != prefix, -self._record(index)[7]))
+        results = candidates[:limit]
+        if len(results) < limit:
+            seen = set(results)
+            for _, index in self._similar(key):
+                if index not in seen and wanted(index):
+                    results.append(index)
+                    if len(results) == limit:
+                        break
+        return [self.place(index) for index in results]
+
+
+class _Keys:
+    """The sorted keys as a sequence, for bisect."""
+
+    def __init__(self, gazetteer: Gazetteer):
+        self.gazetteer = gazetteer
+
+    def __len__(self) -> int:
+        return len(self.gazetteer)
+
+    def __getitem__(self, index: int) -> bytes:
+        return self.gazetteer.key(index)
+
+
+def open_gazetteer(path: Path, places: Path = BUNDLED_PLACES) -> Gazetteer | None:
+    """Memory-map the gazetteer at `path`, building it from `places` first if needed.
+
+    It is rebuilt when it is missing, in an older format, or was built from
+    a different version of `places`. One built from other sources is kept.
+    """
+    if not places.exists():
+        return Gazetteer(path) if path.exists() else None
+    digest = places_digest(places)
+    if path.exists():
+        try:
+            gazetteer = Gazetteer(path)
+        except ValueError:
+            # Written by an older version, rebuilt below
+            pass
+        else:
+            if gazetteer.bundled_digest in (0, digest):
+                return gazetteer
+            gazetteer.close()
+    build([places], path, digest)
+    return Gazetteer(path)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or query the offline gazetteer")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="Build a gazetteer from place files")
+    build_parser.add_argument("sources", nargs="+", type=Path, help="Census gazetteer .txt or name,state,latitude,longitude,population .csv files")
+    build_parser.add_argument("-o", "--output", type=Path, default=Path("places.idx"))
+    search_parser = commands.add_parser("search", help="Print the best matches for a place name")
+    search_parser.add_argument("gazetteer", type=Path)
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build(args.sources, args.output)
+        print(f"Indexed {count} places into {args.output}")
+    else:
+        with Gazetteer(args.gazetteer) as gazetteer:
+            for place in gazetteer.search(args.query, args.limit):
+                print(f"{place.label}\t{place.latitude}\t{place.longitude}")
+
+
+if __name__ == "__main__":
+    main()
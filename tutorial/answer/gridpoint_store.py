@@ -0,0 +1,206 @@
+"""Columnar, memory-mapped store for NWS gridpoint time series.
+
+`/gridpoints/{office}/{x},{y}` returns every forecast layer as a list of
+`{"validTime": "2025-03-01T06:00:00+00:00/PT3H", "value": 4.4}` runs. We
+expand them once into hourly float32 columns and keep one file per grid
+cell:
+
+    magic | header length | JSON header | padding | float32[layers][hours]
+
+Reading a tile maps the file and hands out each layer as a NumPy view, so
+repeated and neighbouring queries (every point in the same 2.5km cell)
+cost no download, no JSON parsing and no copy.
+"""
+
+import json
+import os
+import re
+import struct
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"NWSG"
+VERSION = 1
+ALIGNMENT = 64
+HISTORY_HOURS = 7 * 24
+DEFAULT_LAYERS = (
+    "temperature",
+    "probabilityOfPrecipitation",
+    "quantitativePrecipitation",
+    "windSpeed",
+    "windGust",
+    "relativeHumidity",
+    "skyCover",
+)
+DURATION = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?)?")
+
+
+def epoch_hour(timestamp: str) -> int:
+    """Hours since the epoch of an ISO 8601 timestamp."""
+    return int(datetime.fromisoformat(timestamp).timestamp()) // 3600
+
+
+def current_hour() -> int:
+    return int(datetime.now(timezone.utc).timestamp()) // 3600
+
+
+def duration_hours(duration: str) -> int:
+    match = DURATION.fullmatch(duration)
+    if not match:
+        raise ValueError(f"Unsupported duration: {duration}")
+    days, hours, minutes = (int(part or 0) for part in match.groups())
+    return max(1, days * 24 + hours + (1 if minutes else 0))
+
+
+def expand_layer(values: list[dict], base: int, hours: int) -> np.ndarray:
+    """Spread validTime runs over an hourly column starting at `base`."""
+    column = np.full(hours, np.nan, dtype=np.float32)
+    if not values:
+        return column
+    starts = np.empty(len(values), dtype=np.int64)
+    counts = np.empty(len(values), dtype=np.int64)
+    for i, entry in enumerate(values):
+        start, _, duration = entry["validTime"].partition("/")
+        starts[i] = epoch_hour(start) - base
+        counts[i] = duration_hours(duration)
+    data = np.array([np.nan if v["value"] is None else v["value"] for v in values], dtype=np.float32)
+    # Hour index of every expanded slot: run start plus position inside the run
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    index = np.repeat(starts, counts) + offsets
+    inside = (index >= 0) & (index < hours)
+    column[index[inside]] = np.repeat(data, counts)[inside]
+    return column
+
+
+def layer_bounds(properties: dict, layers: tuple[str, ...]) -> tuple[int, int]:
+    """First hour and hour count covered by any of `layers`."""
+    first, last = None, None
+    for name in layers:
+        for entry in properties.get(name, {}).get("values", []):
+            start, _, duration = entry["validTime"].partition("/")
+            begin = epoch_hour(start)
+            end = begin + duration_hours(duration)
+            first = begin if first is None else min(first, begin)
+            last = end if last is None else max(last, end)
+    if first is None:
+        raise ValueError("Gridpoint data has none of the requested layers")
+    return first, last - first
+
+
+class GridTile:
+    """One grid cell mapped from disk; layers are zero-copy views."""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            magic, header_size = struct.unpack("<4sI", f.read(8))
+            if magic != MAGIC:
+                raise ValueError(f"Not a gridpoint tile: {path}")
+            header = json.loads(f.read(header_size))
+        if header["version"] != VERSION:
+            raise ValueError(f"Unsupported gridpoint tile version: {path}")
+        self.path = path
+        self.layers: list[str] = header["layers"]
+        self.units: dict[str, str] = header["units"]
+        self.start: int = header["start"]
+        self.hours: int = header["hours"]
+        self.last_modified: str | None = header.get("last_modified")
+        self.data = np.memmap(
+            path,
+            dtype=np.float32,
+            mode="r",
+            offset=header["data_offset"],
+            shape=(len(self.layers), self.hours),
+        )
+
+    def layer(self, name: str) -> np.ndarray:
+        return self.data[self.layers.index(name)]
+
+    def window(self, first_hour: int, hours: int) -> dict[str, np.ndarray]:
+        """Views of every layer for `hours` hours starting at `first_hour`."""
+        begin = min(max(0, first_hour - self.start), self.hours)
+        end = min(self.hours, begin + hours)
+        return {name: self.data[i, begin:end] for i, name in enumerate(self.layers)}
+
+    def times(self, first_hour: int, hours: int) -> np.ndarray:
+        begin = min(max(first_hour, self.start), self.start + self.hours)
+        end = min(self.start + self.hours, begin + hours)
+        return np.arange(begin, end).astype("datetime64[h]")
+
+
+class GridpointStore:
+    """Directory of GridTile files keyed by office and grid cell."""
+
+    def __init__(self, root: Path, layers: tuple[str, ...] = DEFAULT_LAYERS):
+        self.root = Path(root)
+        self.layers = layers
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._tiles: dict[tuple[str, int, int], GridTile] = {}
+
+    def path(self, office: str, x: int, y: int) -> Path:
+        return self.root / f"{office.upper()}_{x}_{y}.grid"
+
+    def open(self, office: str, x: int, y: int) -> GridTile | None:
+        key = (office.upper(), x, y)
+        tile = self._tiles.get(key)
+        if tile is None and self.path(*key).exists():
+            tile = self._tiles[key] = GridTile(self.path(*key))
+        return tile
+
+    def write(
+        self, office: str, x: int, y: int, properties: dict, last_modified: str | None = None
+    ) -> GridTile:
+        """Store fresh gridpoint properties, keeping history the update no longer covers."""
+        start, hours = layer_bounds(properties, self.layers)
+        previous = self.open(office, x, y)
+        if previous is not None:
+            # Hours the update no longer covers (mostly the past) stay useful
+            end = max(start + hours, previous.start + previous.hours)
+            start = max(min(start, previous.start), current_hour() - HISTORY_HOURS)
+            hours = end - start
+
+        data = np.full((len(self.layers), hours), np.nan, dtype=np.float32)
+        units = {}
+        for i, name in enumerate(self.layers):
+            layer = properties.get(name, {})
+            units[name] = layer.get("uom", "")
+            data[i] = expand_layer(layer.get("values", []), start, hours)
+            if previous is not None and name in previous.layers:
+                old = previous.window(start, hours)[name]
+                offset = previous.start - start
+                target = data[i, max(0, offset) : max(0, offset) + len(old)]
+                missing = np.isnan(target)
+                target[missing] = old[: len(target)][missing]
+
+        self._save(self.path(office, x, y), data, units, start, hours, last_modified)
+        key = (office.upper(), x, y)
+        self._tiles[key] = GridTile(self.path(*key))
+        return self._tiles[key]
+
+    def _save(self, path: Path, data, units, start, hours, last_modified) -> None:
+        header = {
+            "version": VERSION,
+            "layers": list(self.layers),
+            "units": units,
+            "start": start,
+            "hours": hours,
+            "last_modified": last_modified,
+            "data_offset": 0,
+        }
+        # The offset is part of the header, so size it with a placeholder first
+        encoded = json.dumps(header).encode()
+        offset = -(-(8 + len(encoded) + 16) // ALIGNMENT) * ALIGNMENT
+        header["data_offset"] = offset
+        encoded = json.dumps(header).encode()
+
+        # Unique per write, concurrent writers of one tile must not share it
+        tmp = path.with_suffix(f".{os.getpid()}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(struct.pack("<4sI", MAGIC, len(encoded)))
+            f.write(encoded)
+            f.write(b"\0" * (offset - 8 - len(encoded)))
+            f.write(np.ascontiguousarray(data, dtype="<f4").tobytes())
+        # Readers keep their old mapping until they reopen, never a torn file
+        os.replace(tmp, path)
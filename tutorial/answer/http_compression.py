@@ -0,0 +1,193 @@
+"""Compression of upstream responses and of the SSE server's own responses.
+
+Upstream, httpx advertises every coding in `available_encodings` and decodes
+the responses. Downstream, `CompressionMiddleware` compresses HTTP responses
+with the best coding the client accepts, flushing SSE streams after every
+event so messages are not held back.
+"""
+
+import zlib
+
+COMPRESS_MIN_SIZE = 1024
+
+
+def available_encodings() -> list[str]:
+    """Content codings we can decode, best ratio first.
+
+    httpx always handles gzip and deflate; brotli and zstd are only
+    advertised when their optional decoder packages are installed.
+    """
+    encodings = []
+    try:
+        import zstandard  # noqa: F401
+
+        encodings.append("zstd")
+    except ImportError:
+        pass
+    try:
+        import brotli  # noqa: F401
+
+        encodings.append("br")
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+
+            encodings.append("br")
+        except ImportError:
+            pass
+    return encodings + ["gzip", "deflate"]
+
+
+class CompressionStats:
+    """Byte counters for one side of the compression story."""
+
+    def __init__(self):
+        self.responses = 0
+        self.raw_bytes = 0
+        self.encoded_bytes = 0
+
+    def record(self, raw: int, encoded: int) -> None:
+        self.responses += 1
+        self.raw_bytes += raw
+        self.encoded_bytes += encoded
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.raw_bytes - self.encoded_bytes
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "responses": self.responses,
+            "raw_bytes": self.raw_bytes,
+            "encoded_bytes": self.encoded_bytes,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+
+class _Encoder:
+    """Incremental compressor for one response in a single content coding."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "zstd":
+            import zstandard
+
+            self._zstd = zstandard
+            self._obj = zstandard.ZstdCompressor().compressobj()
+        elif encoding == "br":
+            try:
+                import brotli
+            except ImportError:
+                import brotlicffi as brotli
+            self._obj = brotli.Compressor()
+        else:
+            self._obj = zlib.compressobj(wbits=31 if encoding == "gzip" else 15)
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        """Compress a chunk; with `flush` everything so far is emitted right away."""
+        if self.encoding == "zstd":
+            out = self._obj.compress(data)
+            return out + self._obj.flush(self._zstd.COMPRESSOBJ_FLUSH_BLOCK) if flush else out
+        if self.encoding == "br":
+            out = self._obj.process(data)
+            return out + self._obj.flush() if flush else out
+        out = self._obj.compress(data)
+        return out + self._obj.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        if self.encoding == "zstd":
+            return self._obj.flush()
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """Pick the best coding we can produce that the client accepts."""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(coding.strip().lower())
+    for encoding in available_encodings():
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing HTTP responses larger than `minimum_size`.
+
+    Unlike a buffering gzip middleware, SSE streams are flushed after every
+    event, so clients still receive each message as soon as it is sent while
+    the shared compression window makes repeated JSON keys nearly free.
+    """
+
+    def __init__(self, app, stats: CompressionStats, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.stats = stats
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: dict | None = None
+        encoder: _Encoder | None = None
+        streaming = False
+        raw = encoded = 0
+
+        async def send_compressed(message) -> None:
+            nonlocal start, encoder, streaming, raw, encoded
+            if message["type"] == "http.response.start":
+                # Hold the headers back until we know whether to compress
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                response_headers = dict(start["headers"])
+                content_type = response_headers.get(b"content-type", b"")
+                streaming = content_type.startswith(b"text/event-stream")
+                small = not more_body and len(body) < self.minimum_size
+                if b"content-encoding" in response_headers or (small and not streaming):
+                    await send(start)
+                    start = None
+                    await send(message)
+                    return
+                encoder = _Encoder(encoding)
+                start["headers"] = [
+                    (key, value)
+                    for key, value in start["headers"]
+                    if key.lower() != b"content-length"
+                ] + [(b"content-encoding", encoding.encode()), (b"vary", b"accept-encoding")]
+                await send(start)
+                start = None
+
+            if encoder is None:
+                await send(message)
+                return
+
+            chunk = encoder.compress(body, flush=streaming)
+            if not more_body:
+                chunk += encoder.finish()
+            raw += len(body)
+            encoded += len(chunk)
+            if not more_body:
+                self.stats.record(raw, encoded)
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,190 +1,1342 @@
 from contextlib import asynccontextmanager
+from collections import OrderedDict
 from collections.abc import AsyncIterator
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
 from mcp.server import Server
-from mcp.types import Tool, TextContent
+from mcp.server.session import ServerSession
+from mcp.types import Resource, ResourceTemplate, ServerCapabilities, SubscribeRequest, Tool, TextContent
+from pathlib import Path
+from pydantic import AnyUrl
 from typing import Any, Sequence
+from urllib.parse import parse_qsl
+import anyio
+import anyio.abc
+import anyio.to_thread
+import base64
 import httpx
+import json
+import logging
+import os
+import re
+import time
+import uuid
+
+from http_compression import COMPRESS_MIN_SIZE, CompressionMiddleware, CompressionStats, available_encodings
+from jsonrpc_batch import BatchMiddleware, BatchStats
+from sse_sessions import (
+    SSE_IDLE_TIMEOUT,
+    SSE_KEEPALIVE_INTERVAL,
+    SSE_MAX_LIFETIME,
+    Drain,
+    SessionReaper,
+)
+from tool_scheduler import TOOL_CONCURRENCY, TOOL_POLICIES, ToolPolicy, ToolScheduler
+from weather_alerts import SEVERITY_RANK, URGENCIES, AlertFilter, sort_alerts
+from weather_cache import ALERT_POLL_INTERVAL, RateLimiter, ResponseCache
+from weather_logging import ClientLogHandler, parse_module_level, setup_logging
+from weather_output import OUTPUT_MODES, alert_summary, period_summary, render_structured
+from weather_serving import SERVING_PROFILES, module_available, run_with_profile, uvicorn_options
+
+NWS_API_BASE = os.environ.get("WEATHER_NWS_API_BASE", "https://api.weather.gov")
+USER_AGENT = "weather-app/1.0"
+UPSTREAM_TIMEOUT = 30.0
+UPSTREAM_MAX_CONNECTIONS = 20
+ALERT_SNAPSHOT_TTL = 300.0
+ALERT_SNAPSHOT_LIMIT = 128
+CACHE_KEYS_PATH = Path(
+    os.environ.get("WEATHER_CACHE_KEYS", Path(__file__).with_name(".weather_cache_keys.json"))
+)
+ZONE_INDEX_PATH = Path(
+    os.environ.get("WEATHER_ZONE_INDEX", Path(__file__).with_name("zones.idx"))
+)
+GRIDPOINT_STORE_PATH = Path(
+    os.environ.get("WEATHER_GRIDPOINT_STORE", Path(__file__).with_name("gridpoints"))
+)
+GAZETTEER_PATH = Path(
+    os.environ.get("WEATHER_GAZETTEER", Path(__file__).with_name("places.idx"))
+)
+GEOCODE_LIMIT = 5
+GRIDPOINT_REFRESH_INTERVAL = 900.0
+SUMMARY_HOURS = 24
+SUMMARY_WINDOW = 3
+PRECIPITATION_THRESHOLD = 50  # percent
+WARMUP_TIMEOUT = 5.0
+FORECAST_SOURCES = ("hourly", "gridpoints")
+OUTPUT_SCHEMA = {
+    "type": "string",
+    "enum": list(OUTPUT_MODES),
+    "default": "text",
+    "description": "text for readable prose, json or compact for only the essential fields",
+}
+PLACE_SCHEMA = {
+    "type": "string",
+    "description": "US place name, optionally with its state. ex. Springfield, IL",
+}
+
+
+logger = logging.getLogger("weather.server")
+upstream_logger = logging.getLogger("weather.upstream")
+# Records from the weather loggers also reach the client of the request that logged them
+client_logs = ClientLogHandler()
+logging.getLogger("weather").addHandler(client_logs)
+
+ACCEPT_ENCODING = ", ".join(available_encodings())
+
+
+class Metrics:
+    """Counters reported by the /metrics route."""
+
+    def __init__(self):
+        self.upstream_requests = 0
+        self.upstream_errors = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.gridpoint_updates = 0
+        self.gridpoint_not_modified = 0
+        self.tool_calls_cancelled = 0
+        self.tool_calls_timed_out = 0
+        self.rate_tokens_released = 0
+        self.upstream_compression = CompressionStats()
+        self.response_compression = CompressionStats()
+        self.batches = BatchStats()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "upstream_requests": self.upstream_requests,
+            "upstream_errors": self.upstream_errors,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "gridpoint_updates": self.gridpoint_updates,
+            "gridpoint_not_modified": self.gridpoint_not_modified,
+            "tool_calls_cancelled": self.tool_calls_cancelled,
+            "tool_calls_timed_out": self.tool_calls_timed_out,
+            "rate_tokens_released": self.rate_tokens_released,
+            "upstream_compression": self.upstream_compression.as_dict(),
+            "response_compression": self.response_compression.as_dict(),
+            "batches": self.batches.as_dict(),
+        }
+
+
+def alert_id(feature: dict) -> str:
+    """Stable identifier of an alert feature."""
+    return feature.get("id") or feature["properties"].get("id", "")
+
+
+class AlertFeed:
+    """Shared poller behind the alerts://{state} resources.
+
+    Each subscribed state is fetched once per interval no matter how many
+    sessions watch it, and subscribers only get `resources/updated` when the
+    alerts actually changed.
+    """
+
+    def __init__(self, ctx: "WeatherContext", interval: float = ALERT_POLL_INTERVAL):
+        self.ctx = ctx
+        self.interval = interval
+        # state -> {alert id -> feature}
+        self.snapshots: dict[str, dict[str, dict]] = {}
+        self.fetched_at: dict[str, float] = {}
+        self.subscribers: dict[str, set[ServerSession]] = {}
+
+    async def refresh(self, state: str) -> bool:
+        """Fetch alerts for `state`, returning True if they differ from the last poll."""
+        url = f"{NWS_API_BASE}/alerts/active/area/{state}"
+        data = await make_nws_request(self.ctx, url)
+        if not data or "features" not in data:
+            return False
+
+        current = {alert_id(feature): feature for feature in data["features"]}
+        previous = self.snapshots.get(state, {})
+        self.snapshots[state] = current
+        self.fetched_at[state] = time.monotonic()
+        self.ctx.cache.put(url, data)
+        if current.keys() != previous.keys():
+            return True
+        # Same ids, but an alert may have been re-issued with new content
+        return any(
+            feature["properties"].get("sent") != previous[key]["properties"].get("sent")
+            for key, feature in current.items()
+        )
+
+    async def current(self, state: str) -> dict[str, dict]:
+        """Alerts for `state`, refetched if the last poll is older than the interval."""
+        if time.monotonic() - self.fetched_at.get(state, float("-inf")) > self.interval:
+            await self.refresh(state)
+        return self.snapshots.get(state, {})
+
+    async def subscribe(self, state: str, session: ServerSession) -> None:
+        self.subscribers.setdefault(state, set()).add(session)
+        if state not in self.snapshots:
+            # Prime the snapshot so the first poll only reports real changes
+            await self.refresh(state)
+
+    def unsubscribe(self, state: str, session: ServerSession) -> None:
+        sessions = self.subscribers.get(state)
+        if sessions is None:
+            return
+        sessions.discard(session)
+        if not sessions:
+            del self.subscribers[state]
+            self.snapshots.pop(state, None)
+            self.fetched_at.pop(state, None)
+
+    async def notify(self, state: str) -> None:
+        uri = AnyUrl(f"alerts://{state}")
+        for session in list(self.subscribers.get(state, ())):
+            try:
+                await session.send_resource_updated(uri)
+            except Exception:
+                # The client went away without unsubscribing
+                self.unsubscribe(state, session)
+
+    async def run(self) -> None:
+        while True:
+            await anyio.sleep(self.interval)
+            for state in list(self.subscribers):
+                if await self.refresh(state):
+                    await self.notify(state)
+
+
+class AlertSnapshots:
+    """Alert lists captured by the first page of a paginated get_alerts.
+
+    Follow-up pages are cut from the same snapshot, so they need no upstream
+    refetch and stay consistent even if NWS publishes new alerts meanwhile.
+    """
+
+    def __init__(self, ttl: float = ALERT_SNAPSHOT_TTL, limit: int = ALERT_SNAPSHOT_LIMIT):
+        self.ttl = ttl
+        self.limit = limit
+        # snapshot id -> (created at, state, features)
+        self.snapshots: OrderedDict[str, tuple[float, str, list[dict]]] = OrderedDict()
+
+    def save(self, state: str, features: list[dict]) -> str:
+        snapshot_id = uuid.uuid4().hex
+        self.snapshots[snapshot_id] = (time.monotonic(), state, features)
+        while len(self.snapshots) > self.limit:
+            self.snapshots.popitem(last=False)
+        return snapshot_id
+
+    def load(self, snapshot_id: str, state: str) -> list[dict] | None:
+        entry = self.snapshots.get(snapshot_id)
+        if entry is None:
+            return None
+        created, snapshot_state, features = entry
+        if snapshot_state != state or time.monotonic() - created > self.ttl:
+            del self.snapshots[snapshot_id]
+            return None
+        return features
+
+
+class Warmup:
+    """Prefetches the configured keys once, in the background after startup.
+
+    Everything is fetched concurrently and bounded by `timeout`. Sessions
+    never wait for it, so a slow upstream cannot hold up the initialize
+    handshake; the SSE readiness probe fails until it is done.
+    """
+
+    def __init__(
+        self,
+        states: Sequence[str] = (),
+        points: Sequence[tuple[float, float]] = (),
+        keys_path: Path | None = None,
+        timeout: float = WARMUP_TIMEOUT,
+    ):
+        self.states = [state.upper() for state in states]
+        self.points = list(points)
+        self.keys_path = keys_path
+        self.timeout = timeout
+        self.done = False
+        self._lock: anyio.Lock | None = None
+
+    def urls(self) -> list[str]:
+        urls = [f"{NWS_API_BASE}/alerts/active/area/{state}" for state in self.states]
+        if self.keys_path is not None:
+            urls.extend(ResponseCache.load_keys(self.keys_path, NWS_API_BASE))
+        return list(dict.fromkeys(urls))
+
+    async def warm_point(self, ctx: "WeatherContext", latitude: float, longitude: float) -> None:
+        points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
+        points_data = await cached_nws_request(ctx, points_url)
+        if points_data:
+            await cached_nws_request(ctx, points_data["properties"]["forecast"])
+
+    async def run(self, ctx: "WeatherContext") -> None:
+        if self.done:
+            return
+        if self._lock is None:
+            # Created on first use, primitives need a running event loop
+            self._lock = anyio.Lock()
+        async with self._lock:
+            if self.done:
+                return
+            with anyio.move_on_after(self.timeout):
+                async with anyio.create_task_group() as tg:
+                    for url in self.urls():
+                        tg.start_soon(cached_nws_request, ctx, url)
+                    for latitude, longitude in self.points:
+                        tg.start_soon(self.warm_point, ctx, latitude, longitude)
+            self.done = True
+
+
+@dataclass
+class WeatherContext:
+    """Every resource the weather server shares between sessions and tools.
+
+    It is created once per process by `open_weather_context`, handed to each
+    session as its lifespan context, and reached from handlers through
+    `server.request_context.lifespan_context`.
+    """
+
+    task_group: anyio.abc.TaskGroup
+    cache: ResponseCache = field(default_factory=ResponseCache)
+    rate_limiter: RateLimiter = field(default_factory=RateLimiter)
+    metrics: Metrics = field(default_factory=Metrics)
+    alert_snapshots: AlertSnapshots = field(default_factory=AlertSnapshots)
+    warmup: Warmup = field(default_factory=Warmup)
+    drain: Drain = field(default_factory=Drain)
+    reaper: SessionReaper = field(default_factory=SessionReaper)
+    scheduler: ToolScheduler = field(default_factory=ToolScheduler)
+    zone_index: Any = None
+    gazetteer: Any = None
+    gridpoint_store_path: Path | None = None
+    # Opened by the first gridpoints request, see `open_gridpoints`
+    gridpoints: Any = None
+    # When each gridpoint tile was last confirmed fresh with the NWS
+    gridpoints_checked: dict[tuple[str, int, int], float] = field(default_factory=dict)
+    # One refresh per tile at a time, see `fetch_gridpoints`
+    gridpoint_locks: dict[tuple[str, int, int], anyio.Lock] = field(default_factory=dict)
+    cache_keys_path: Path | None = None
+    http: httpx.AsyncClient | None = None
+    alert_feed: AlertFeed = field(init=False)
+
+    def __post_init__(self):
+        self.alert_feed = AlertFeed(self)
+
+    def client(self) -> httpx.AsyncClient:
+        """The pooled upstream client, created by the first request.
+
+        Building it loads the CA bundle, which would otherwise delay the
+        initialize response of a freshly spawned stdio server.
+        """
+        if self.http is None:
+            self.http = httpx.AsyncClient(
+                headers={
+                    "User-Agent": USER_AGENT,
+                    "Accept": "application/geo+json",
+                    "Accept-Encoding": ACCEPT_ENCODING,
+                },
+                timeout=UPSTREAM_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=UPSTREAM_MAX_CONNECTIONS,
+                    max_keepalive_connections=UPSTREAM_MAX_CONNECTIONS,
+                ),
+            )
+        return self.http
+
+    def open_gridpoints(self):
+        """The gridpoint tile store, None without numpy.
+
+        Opened on first use rather than at startup, as it imports numpy.
+        """
+        if self.gridpoints is None and self.gridpoint_store_path is not None:
+            self.gridpoints = open_gridpoint_store(self.gridpoint_store_path)
+        return self.gridpoints
+
+
+def open_zone_index(path: Path = ZONE_INDEX_PATH):
+    """Memory-map the prebuilt zone index, see zone_index.py for building it."""
+    if not path.exists():
+        return None
+    from zone_index import ZoneIndex
+
+    return ZoneIndex(path)
+
+
+def open_gazetteer(path: Path = GAZETTEER_PATH):
+    """Memory-map the place gazetteer, built from the bundled places on first start."""
+    from gazetteer import open_gazetteer
+
+    try:
+        return open_gazetteer(path)
+    except (OSError, ValueError) as e:
+        logger.warning("Gazetteer unavailable", extra={"path": str(path), "error": str(e)})
+        return None
+
+
+def open_gridpoint_store(path: Path = GRIDPOINT_STORE_PATH):
+    """Tile store behind the gridpoints forecast source, see gridpoint_store.py."""
+    if not module_available("numpy"):
+        return None
+    from gridpoint_store import GridpointStore
+
+    return GridpointStore(path)
+
 
 @asynccontextmanager
-async def server_lifespan(server: Server) -> AsyncIterator[str]:
+async def open_weather_context(
+    warmup: Warmup | None = None,
+    cache_keys_path: Path | None = None,
+    reaper: SessionReaper | None = None,
+    scheduler: ToolScheduler | None = None,
+    zone_index_path: Path = ZONE_INDEX_PATH,
+    gridpoint_store_path: Path = GRIDPOINT_STORE_PATH,
+    gazetteer_path: Path = GAZETTEER_PATH,
+    alert_poll_interval: float = ALERT_POLL_INTERVAL,
+) -> AsyncIterator[WeatherContext]:
+    """Create the shared resources and tear them down in reverse order.
+
+    The upstream client and the gridpoint store are only created when
+    first needed, keeping this cheap on the path to the initialize response.
+    """
+    zone_index = open_zone_index(zone_index_path)
+    gazetteer = open_gazetteer(gazetteer_path)
+    ctx: WeatherContext | None = None
     try:
-        ## This is just example. actual code,
-        ## Using yield with time consuming resource, like db connection
-        yield server.name
+        async with anyio.create_task_group() as tg:
+            ctx = WeatherContext(
+                task_group=tg,
+                warmup=warmup or Warmup(),
+                reaper=reaper or SessionReaper(),
+                scheduler=scheduler or ToolScheduler(),
+                zone_index=zone_index,
+                gazetteer=gazetteer,
+                gridpoint_store_path=gridpoint_store_path,
+                cache_keys_path=cache_keys_path,
+            )
+            ctx.alert_feed.interval = alert_poll_interval
+            # One poller for the whole process, shared by every session
+            tg.start_soon(ctx.alert_feed.run)
+            tg.start_soon(ctx.warmup.run, ctx)
+            try:
+                yield ctx
+            finally:
+                tg.cancel_scope.cancel()
+                if cache_keys_path is not None:
+                    # Next start warms up whatever was hot in this run
+                    ctx.cache.save_keys(cache_keys_path)
     finally:
-        pass
+        try:
+            if ctx is not None and ctx.http is not None:
+                await ctx.http.aclose()
+        finally:
+            if zone_index is not None:
+                zone_index.close()
+            if gazetteer is not None:
+                gazetteer.close()
+
+
+# Set by run_server for the lifetime of the process; uvicorn's connection
+# tasks are started from inside it, so every SSE session sees the same value
+current_context: ContextVar[WeatherContext] = ContextVar("weather_context")
+
+
+@asynccontextmanager
+async def server_lifespan(server: Server) -> AsyncIterator[WeatherContext]:
+    ctx = current_context.get(None)
+    if ctx is None:
+        # Running outside run_server (e.g. in a test), own a private context
+        async with open_weather_context() as ctx:
+            yield ctx
+        return
+    yield ctx
+
+
+class WeatherServer(Server):
+    """Server that also advertises the resource subscriptions it handles.
+
+    The SDK reports `subscribe: false` whatever handlers are registered, and
+    clients that honor it would never subscribe to the alert feed.
+    """
+
+    def get_capabilities(self, *args, **kwargs) -> ServerCapabilities:
+        capabilities = super().get_capabilities(*args, **kwargs)
+        if capabilities.resources is not None and SubscribeRequest in self.request_handlers:
+            capabilities.resources.subscribe = True
+        return capabilities
+
+
+server = WeatherServer("weather", lifespan=server_lifespan)
+
+
+@server.set_logging_level()
+async def set_logging_level(level: str) -> None:
+    client_logs.set_level(server.request_context.session, level)
+
+
+def state_from_uri(uri: AnyUrl) -> str:
+    """Extract the state code from an alerts://{state} uri."""
+    scheme, _, state = str(uri).partition("://")
+    if scheme != "alerts" or not state.strip("/"):
+        raise ValueError(f"Unknown resource: {uri}")
+    return state.strip("/").upper()
+
+
+@server.list_resources()
+async def list_resources() -> list[Resource]:
+    ctx: WeatherContext = server.request_context.lifespan_context
+    return [
+        Resource(
+            uri=AnyUrl(f"alerts://{state}"),
+            name=f"Weather alerts for {state}",
+            mimeType="text/plain",
+        )
+        for state in ctx.alert_feed.snapshots
+    ]
+
+
+@server.list_resource_templates()
+async def list_resource_templates() -> list[ResourceTemplate]:
+    # list_resources only names the states already watched, any state works
+    return [
+        ResourceTemplate(
+            uriTemplate="alerts://{state}",
+            name="Weather alerts for a US state",
+            description="Active NWS alerts for a two-letter US state code, updated when subscribed",
+            mimeType="text/plain",
+        )
+    ]
+
+
+@server.read_resource()
+async def read_resource(uri: AnyUrl) -> str:
+    ctx: WeatherContext = server.request_context.lifespan_context
+    features = await ctx.alert_feed.current(state_from_uri(uri))
+    if not features:
+        return "No active alerts for this state."
+    return "\n--\n".join(format_alert(feature) for feature in features.values())
+
+
+def sse_session_id() -> str | None:
+    """MCP session id of the SSE connection the current request came in on."""
+    request = server.request_context.request
+    return None if request is None else request.query_params.get("session_id")
+
+
+@server.subscribe_resource()
+async def subscribe_resource(uri: AnyUrl) -> None:
+    ctx: WeatherContext = server.request_context.lifespan_context
+    await ctx.alert_feed.subscribe(state_from_uri(uri), server.request_context.session)
+    session_id = sse_session_id()
+    if session_id is not None:
+        # The client now waits for updates, which is not being idle
+        ctx.reaper.subscribe(session_id, str(uri))
 
 
-server = Server("weather", lifespan=server_lifespan)
+@server.unsubscribe_resource()
+async def unsubscribe_resource(uri: AnyUrl) -> None:
+    ctx: WeatherContext = server.request_context.lifespan_context
+    ctx.alert_feed.unsubscribe(state_from_uri(uri), server.request_context.session)
+    session_id = sse_session_id()
+    if session_id is not None:
+        ctx.reaper.unsubscribe(session_id, str(uri))
 
 
 @server.list_tools()
 async def list_tools() -> list[Tool]:
-    tools = []
-    ctx = server.request_context.lifespan_context
-
-    if ctx and "weather":
-        tools.extend(
-            [
-                Tool(
-                    name="get_alerts",
-                    description="Get weather alerts for a US state",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "state": {
-                                "type": "string",
-                                "description": "Two-letter US state code (e.g. CA, NY)",
-                            }
-                        },
-                        "required": ["state"],
+    ctx: WeatherContext = server.request_context.lifespan_context
+    point = {
+        "latitude": {
+            "type": "number",
+            "description": "Latitude of the location. ex. 38.8898",
+        },
+        "longitude": {
+            "type": "number",
+            "description": "Longitude of the location. ex. -77.009056",
+        },
+    }
+    point_required = ["latitude", "longitude"]
+    if ctx.gazetteer is not None:
+        # A place name stands in for the coordinates
+        point["place"] = PLACE_SCHEMA
+        point_required = []
+    tools = [
+        Tool(
+            name="get_alerts",
+            description="Get weather alerts for a US state",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "state": {
+                        "type": "string",
+                        "description": "Two-letter US state code (e.g. CA, NY)",
+                    },
+                    "severity": {
+                        "type": "string",
+                        "enum": list(SEVERITY_RANK),
+                        "description": "Only alerts at least this severe",
+                    },
+                    "event": {
+                        "type": "string",
+                        "description": "Only alerts whose event contains this text, e.g. Flood",
+                    },
+                    "urgency": {
+                        "type": "array",
+                        "items": {"type": "string", "enum": list(URGENCIES)},
+                        "description": "Only alerts with one of these urgencies",
+                    },
+                    "since": {
+                        "type": "string",
+                        "description": "Only alerts sent at or after this ISO 8601 time",
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": (
+                            "Maximum number of alerts to return per page; alerts are "
+                            "sorted most severe first, then by onset"
+                        ),
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": (
+                            "Opaque cursor returned by a previous page, which keeps "
+                            "that page's filters"
+                        ),
                     },
+                    "output": OUTPUT_SCHEMA,
+                },
+                "required": ["state"],
+            },
+        ),
+        Tool(
+            name="get_forecast",
+            description="Get weather forecast for a location",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    **point,
+                    "output": OUTPUT_SCHEMA,
+                },
+                "required": point_required,
+            },
+        ),
+    ]
+    if module_available("numpy"):
+        tools.append(
+            Tool(
+                name="get_forecast_summary",
+                description=(
+                    "Get a compact numeric summary of the hourly forecast for a location: "
+                    "temperature, precipitation chance and wind ranges, threshold "
+                    "crossings and the worst rolling window"
                 ),
-                Tool(
-                    name="get_forecast",
-                    description="Get weather forecast for a location",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "latitude": {
-                                "type": "number",
-                                "description": "Latitude of the location. ex. 38.8898",
-                            },
-                            "longitude": {
-                                "type": "number",
-                                "description": "Longitude of the location. ex. -77.009056",
-                            },
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        **point,
+                        "hours": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "maximum": 156,
+                            "default": SUMMARY_HOURS,
+                            "description": "How many hours ahead to summarize",
                         },
-                        "required": ["latitude", "longitude"],
+                        "window": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "default": SUMMARY_WINDOW,
+                            "description": "Rolling window length in hours",
+                        },
+                        "source": {
+                            "type": "string",
+                            "enum": list(FORECAST_SOURCES),
+                            "default": "hourly",
+                            "description": (
+                                "hourly: the hourly forecast; gridpoints: raw gridpoint "
+                                "layers kept in a local tile store, cheapest for repeated "
+                                "and nearby locations"
+                            ),
+                        },
+                        "output": OUTPUT_SCHEMA,
+                    },
+                    "required": point_required,
+                },
+            )
+        )
+    if ctx.zone_index is not None:
+        tools.append(
+            Tool(
+                name="get_alerts_at_point",
+                description="Get weather alerts affecting a specific location",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        **point,
+                        "output": OUTPUT_SCHEMA,
                     },
+                    "required": point_required,
+                },
+            )
+        )
+    if ctx.gazetteer is not None:
+        tools.append(
+            Tool(
+                name="geocode",
+                description=(
+                    "Find the coordinates of a US city or town by name, offline; "
+                    "misspellings and name prefixes are matched too"
                 ),
-            ]
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "query": PLACE_SCHEMA,
+                        "limit": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "default": GEOCODE_LIMIT,
+                            "description": "Maximum number of places to return, best match first",
+                        },
+                        "output": OUTPUT_SCHEMA,
+                    },
+                    "required": ["query"],
+                },
+            )
         )
     return tools
 
 
+def request_timeout(meta) -> float | None:
+    """Seconds the client still waits for this request, if it told us.
+
+    Clients pass either `_meta.timeoutMs` (relative) or `_meta.deadline`
+    (Unix time in seconds) with a request.
+    """
+    extra = (meta.model_extra or {}) if meta is not None else {}
+    if extra.get("timeoutMs") is not None:
+        return max(0.0, float(extra["timeoutMs"]) / 1000)
+    if extra.get("deadline") is not None:
+        return max(0.0, float(extra["deadline"]) - time.time())
+    return None
+
+
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
+    ctx: WeatherContext = server.request_context.lifespan_context
+    if ctx.drain.draining:
+        raise RuntimeError("Server is shutting down, please retry on another instance")
+    # notifications/cancelled cancels this handler's scope, and the deadline
+    # adds one of its own; either way every await below, down to the upstream
+    # HTTP calls, is interrupted instead of running to its own timeout
+    timeout = request_timeout(server.request_context.meta)
+    with ctx.drain.track(), client_logs.bind(server.request_context.session):
+        try:
+            with anyio.fail_after(timeout):
+                # Queue time counts against the deadline too
+                async with ctx.scheduler.slot(name):
+                    return await dispatch_tool(ctx, name, arguments)
+        except TimeoutError:
+            ctx.metrics.tool_calls_timed_out += 1
+            logger.warning("Tool call missed its deadline", extra={"tool": name, "timeout": timeout})
+            raise TimeoutError(f"{name} did not finish before the client deadline") from None
+        except anyio.get_cancelled_exc_class():
+            ctx.metrics.tool_calls_cancelled += 1
+            raise
+
+
+async def dispatch_tool(
+    ctx: WeatherContext, name: str, arguments: dict
+) -> Sequence[TextContent]:
     # return [TextContent(type="text", text="test~")]
     if name == "get_alerts":
-        result = await get_alerts(arguments["state"])
+        result = await get_alerts(
+            ctx,
+            arguments["state"],
+            arguments.get("limit"),
+            arguments.get("cursor"),
+            arguments.get("output", "text"),
+            AlertFilter(
+                arguments.get("severity"),
+                arguments.get("event"),
+                arguments.get("urgency"),
+                arguments.get("since"),
+            ),
+        )
         return [TextContent(type="text", text=result)]
-    elif name == "get_forecast":
-        result = await get_forecast(arguments["latitude"], arguments["longitude"])
+    elif name == "geocode":
+        result = geocode(
+            ctx, arguments["query"], arguments.get("limit", GEOCODE_LIMIT), arguments.get("output", "text")
+        )
         return [TextContent(type="text", text=result)]
-    raise ValueError(f"Unknown tool: {name}")
 
+    output = arguments.get("output", "text")
+    latitude, longitude, place = resolve_point(ctx, arguments)
+    if name == "get_forecast":
+        result = await get_forecast(ctx, latitude, longitude, output)
+    elif name == "get_forecast_summary":
+        result = await get_forecast_summary(
+            ctx,
+            latitude,
+            longitude,
+            arguments.get("hours", SUMMARY_HOURS),
+            arguments.get("window", SUMMARY_WINDOW),
+            output,
+            arguments.get("source", "hourly"),
+        )
+    elif name == "get_alerts_at_point":
+        result = await get_alerts_at_point(ctx, latitude, longitude, output)
+    else:
+        raise ValueError(f"Unknown tool: {name}")
+    if place is not None and output == "text":
+        # Say which place was picked, the name may have matched several
+        result = f"{place.label} ({latitude}, {longitude})\n{result}"
+    return [TextContent(type="text", text=result)]
 
-async def get_alerts(state: str) -> str:
-    """Get weather alerts for a US state
+
+def resolve_point(ctx: WeatherContext, arguments: dict) -> tuple[float, float, Any]:
+    """Latitude and longitude of a tool call, from its coordinates or its place name.
+
+    Returns the gazetteer entry too when the place name was used.
+    """
+    if arguments.get("latitude") is not None and arguments.get("longitude") is not None:
+        return arguments["latitude"], arguments["longitude"], None
+    if not arguments.get("place") or ctx.gazetteer is None:
+        raise ValueError("Provide latitude and longitude, or place")
+    places = ctx.gazetteer.search(arguments["place"], 1)
+    if not places:
+        raise ValueError(f"Unknown place: {arguments['place']}, try geocode to find it")
+    return places[0].latitude, places[0].longitude, places[0]
+
+
+def geocode(ctx: WeatherContext, query: str, limit: int = GEOCODE_LIMIT, output: str = "text") -> str:
+    """Find US places by name in the offline gazetteer.
 
     Args:
+        ctx: Shared server resources
+        query: Place name, optionally followed by its state
+        limit: Maximum number of places to return
+        output: One of "text", "json" or "compact"
+    """
+    if ctx.gazetteer is None:
+        return "Gazetteer is not available on this server."
+    places = ctx.gazetteer.search(query, max(1, limit))
+    if output != "text":
+        return render_structured("places", [asdict(place) for place in places], output)
+    if not places:
+        return f"No place matching {query}."
+    return "\n".join(
+        f"{place.label}: {place.latitude}, {place.longitude} (population {place.population})"
+        for place in places
+    )
+
+
+def encode_cursor(snapshot_id: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{snapshot_id}:{offset}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        snapshot_id, offset = base64.urlsafe_b64decode(cursor).decode().split(":")
+        return snapshot_id, int(offset)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+async def get_alerts(
+    ctx: WeatherContext,
+    state: str,
+    limit: int | None = None,
+    cursor: str | None = None,
+    output: str = "text",
+    filters: "AlertFilter | None" = None,
+) -> str:
+    """Get weather alerts for a US state, most severe first
+
+    Args:
+        ctx: Shared server resources
         state: Two-letter US state code (e.g. CA, NY)
+        limit: Maximum number of alerts per page, all of them if omitted
+        cursor: Cursor returned by the previous page
+        output: One of "text", "json" or "compact"
+        filters: Severity, event, urgency and time filters, ignored with a cursor
     """
 
-    url = f"{NWS_API_BASE}/alerts/active/area/{state}"
-    data = await make_nws_request(url)
+    if limit is not None and limit < 1:
+        # An empty page would hand back a cursor to itself
+        raise ValueError(f"Invalid limit: {limit}, must be at least 1")
+    if cursor:
+        snapshot_id, offset = decode_cursor(cursor)
+        features = ctx.alert_snapshots.load(snapshot_id, state)
+        if features is None:
+            return "Cursor expired. Call get_alerts again without a cursor."
+        if not 0 <= offset < len(features):
+            raise ValueError(f"Invalid cursor: {cursor}")
+    else:
+        logger.info("Fetching alerts", extra={"state": state})
+        url = f"{NWS_API_BASE}/alerts/active/area/{state}"
+        data = await cached_nws_request(ctx, url)
 
-    if not data or "features" not in data:
-        return f"url: {url}, Unable to fetch alerts or no alerts found."
+        if not data or "features" not in data:
+            return f"url: {url}, Unable to fetch alerts or no alerts found."
 
-    if not data["features"]:
-        return "No active alerts for this state."
+        if not data["features"]:
+            return "No active alerts for this state."
+
+        # Filter and sort the decoded features, so only the kept ones get formatted
+        features = sort_alerts((filters or AlertFilter()).apply(data["features"]))
+        if not features:
+            return "No active alerts for this state match the filters."
+        offset = 0
+        snapshot_id = None
+
+    end = len(features) if limit is None else offset + limit
+    page = features[offset:end]
+    next_cursor = None
+    if end < len(features):
+        if snapshot_id is None:
+            snapshot_id = ctx.alert_snapshots.save(state, features)
+        next_cursor = encode_cursor(snapshot_id, end)
+
+    if output != "text":
+        return render_structured(
+            "alerts", [alert_summary(feature) for feature in page], output, next_cursor
+        )
+
+    result = "\n--\n".join(format_alert(feature) for feature in page)
+    if next_cursor:
+        result += (
+            f"\n--\nShowing alerts {offset + 1}-{end} of {len(features)}. "
+            f"next_cursor: {next_cursor}"
+        )
+    return result
+
+
+def alert_zones(feature: dict) -> set[str]:
+    """UGC codes an alert applies to."""
+    props = feature["properties"]
+    zones = set(props.get("geocode", {}).get("UGC", []))
+    zones.update(url.rsplit("/", 1)[-1] for url in props.get("affectedZones", []))
+    return zones
+
+
+async def get_alerts_at_point(
+    ctx: WeatherContext, latitude: float, longitude: float, output: str = "text"
+) -> str:
+    """Get weather alerts affecting a location.
+
+    The point is resolved to its forecast and county zones with the local
+    zone index, and only alerts issued for those zones are returned.
+
+    Args:
+        ctx: Shared server resources
+        latitude: Latitude of the location
+        longitude: Longitude of the location
+        output: One of "text", "json" or "compact"
+    """
+    if ctx.zone_index is None:
+        return "Zone index is not available on this server."
+
+    zones = set(ctx.zone_index.lookup(latitude, longitude))
+    if not zones:
+        return "This location is not inside any NWS zone."
 
-    alerts = [format_alert(feature) for feature in data["features"]]
-    return "\n--\n".join(alerts)
+    features = []
+    # UGC codes start with the state, so one alert list covers every zone
+    for state in sorted({zone[:2] for zone in zones}):
+        snapshot = await ctx.alert_feed.current(state)
+        features.extend(
+            feature
+            for feature in snapshot.values()
+            if alert_zones(feature) & zones
+        )
+
+    if output != "text":
+        return render_structured(
+            "alerts", [alert_summary(feature) for feature in features], output
+        )
+    if not features:
+        return f"No active alerts for this location ({', '.join(sorted(zones))})."
+    return "\n--\n".join(format_alert(feature) for feature in features)
 
 
-async def get_forecast(latitude: float, longitude: float) -> str:
+async def get_forecast(
+    ctx: WeatherContext, latitude: float, longitude: float, output: str = "text"
+) -> str:
     """Get weather forecast for a location.
 
     Args:
+        ctx: Shared server resources
         latitude: Latitude of the location
         longitude: Longitude of the location
+        output: One of "text", "json" or "compact"
     """
 
+    logger.info("Fetching forecast", extra={"latitude": latitude, "longitude": longitude})
     # First get the Forecast grid endpoint
     points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
-    points_data = await make_nws_request(points_url)
+    points_data = await cached_nws_request(ctx, points_url)
 
     if not points_data:
         return "Unable to fetch forecast data for this location."
 
     # Get the forecast URL from the points response
     forecast_url = points_data["properties"]["forecast"]
-    forecast_data = await make_nws_request(forecast_url)
+    forecast_data = await cached_nws_request(ctx, forecast_url)
 
     if not forecast_data:
         return "Unable to fetch detailed forecast."
 
     # Format the periods into a readable forecast
-    periods = forecast_data["properties"]["periods"]
-    forecasts = []
+    periods = forecast_data["properties"]["periods"][:5]  # Only show next 5 period
+    if output != "text":
+        return render_structured(
+            "periods", [period_summary(period) for period in periods], output
+        )
 
-    for period in periods[:5]:  # Only show next 5 period
-        forecast = f"""                                                            
-{period['name']}:                                                                  
-Temperature: {period['temperature']}°{period['temperatureUnit']}                   
-Wind: {period['windSpeed']} {period['windDirection']}                              
-Forecast: {period['detailedForecast']}                                             
-        """
+    forecasts = []
+    for period in periods:
+        forecast = f"""
+{period['name']}:
+Temperature: {period['temperature']}°{period['temperatureUnit']}
+Wind: {period['windSpeed']} {period['windDirection']}
+Forecast: {period['detailedForecast']}
+"""
         forecasts.append(forecast)
     return "\n--\n".join(forecasts)
 
 
-# async def run():
-#     async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-#         print("server is running...")
-#         await server.run(
-#             read_stream,
-#             write_stream,
-#             InitializationOptions(
-#                 server_name="weather",
-#                 server_version="0.1.0",
-#                 capabilities=server.get_capabilities(
-#                     notification_options=NotificationOptions(),
-#                     experimental_capabilities={},
-#                 ),
-#             ),
-#         )
-#     # Constants for the National Weather Service API                              |
-
-
-async def run_server(transport: str = "stdio", port: int = 9009) -> None:
+def wind_speed(value: str) -> float:
+    """Upper bound of an NWS wind speed string like "5 to 10 mph"."""
+    numbers = re.findall(r"\d+(?:\.\d+)?", value or "")
+    return max(map(float, numbers)) if numbers else 0.0
+
+
+def summarize_hourly(periods: list[dict], window: int = SUMMARY_WINDOW) -> dict[str, Any]:
+    """Reduce hourly forecast periods to a few numbers, with NumPy."""
+    import numpy as np
+
+    return summarize_series(
+        np.array([period["startTime"] for period in periods]),
+        np.array([period["temperature"] for period in periods], dtype=float),
+        np.array(
+            [(period.get("probabilityOfPrecipitation") or {}).get("value") or 0 for period in periods],
+            dtype=float,
+        ),
+        np.array([wind_speed(period.get("windSpeed", "")) for period in periods]),
+        periods[0].get("temperatureUnit", "F") if periods else "F",
+        window,
+    )
+
+
+def summarize_gridpoints(tile, hours: int, window: int = SUMMARY_WINDOW) -> dict[str, Any]:
+    """Summarize the next `hours` hours of a gridpoint tile.
+
+    The layers are views into the mapped file; only the unit conversions
+    allocate.
+    """
+    from gridpoint_store import current_hour
+
+    first = current_hour()
+    layers = tile.window(first, hours)
+    temperature = layers["temperature"]
+    if tile.units.get("temperature", "").endswith("degC"):
+        temperature = temperature * 9 / 5 + 32
+    wind = layers["windSpeed"]
+    if tile.units.get("windSpeed", "").endswith("km_h-1"):
+        wind = wind * 0.621371
+    return summarize_series(
+        tile.times(first, hours).astype(str),
+        temperature,
+        layers["probabilityOfPrecipitation"],
+        wind,
+        "F",
+        window,
+    )
+
+
+def summarize_series(starts, temperature, precipitation, wind, unit: str, window: int) -> dict[str, Any]:
+    """Statistics shared by both forecast sources.
+
+    Every statistic is a whole-array operation, so the cost barely depends
+    on how many hours are summarized. Missing hours are NaN and ignored, and
+    an empty series, e.g. a tile that ends before the current hour, gives a
+    summary of zero hours.
+    """
+    import numpy as np
+
+    freezing = 32.0 if unit == "F" else 0.0
+
+    def stats(series) -> dict[str, float | None]:
+        if np.isnan(series).all():
+            return {"min": None, "max": None, "mean": None}
+        return {
+            "min": round(float(np.nanmin(series)), 1),
+            "max": round(float(np.nanmax(series)), 1),
+            "mean": round(float(np.nanmean(series)), 1),
+        }
+
+    def worst_window(series) -> dict[str, Any] | None:
+        size = min(window, len(series))
+        if size == 0:
+            return None
+        rolling = np.convolve(np.nan_to_num(series), np.ones(size) / size, mode="valid")
+        peak = int(rolling.argmax())
+        return {"start": str(starts[peak]), "hours": size, "mean": round(float(rolling[peak]), 1)}
+
+    # Hours at which the temperature crosses freezing, in either direction
+    known = np.flatnonzero(~np.isnan(temperature))
+    below = temperature[known] < freezing
+    crossings = known[np.flatnonzero(below[1:] != below[:-1]) + 1]
+    wet = np.flatnonzero(np.nan_to_num(precipitation) >= PRECIPITATION_THRESHOLD)
+
+    return {
+        "from": str(starts[0]) if len(starts) else None,
+        "to": str(starts[-1]) if len(starts) else None,
+        "hours": len(starts),
+        "temperature_unit": unit,
+        "temperature": stats(temperature),
+        "precipitation_chance": stats(precipitation),
+        "wind_mph": stats(wind),
+        "freezing_crossings": [
+            {"at": str(starts[i]), "to": "below" if temperature[i] < freezing else "above"}
+            for i in crossings
+        ],
+        "wet_hours": int(wet.size),
+        "first_wet_hour": str(starts[wet[0]]) if wet.size else None,
+        "wettest_window": worst_window(precipitation),
+        "windiest_window": worst_window(wind),
+    }
+
+
+def format_summary(summary: dict[str, Any], output: str) -> str:
+    if output not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode: {output}")
+    if output == "json":
+        return json.dumps(summary, ensure_ascii=False, separators=(",", ":"))
+    if not summary["hours"]:
+        return "no periods" if output == "compact" else "No forecast hours to summarize."
+
+    def line(stats: dict[str, float]) -> str:
+        return f"{stats['min']}/{stats['max']}/{stats['mean']}"
+
+    unit = summary["temperature_unit"]
+    crossings = ", ".join(
+        f"{crossing['at']} {crossing['to']}" for crossing in summary["freezing_crossings"]
+    )
+    wettest = summary["wettest_window"]
+    windiest = summary["windiest_window"]
+    if output == "compact":
+        return "\n".join(
+            [
+                f"from|{summary['from']}|to|{summary['to']}",
+                f"temp_{unit}_min/max/mean|{line(summary['temperature'])}",
+                f"precip_pct_min/max/mean|{line(summary['precipitation_chance'])}",
+                f"wind_mph_min/max/mean|{line(summary['wind_mph'])}",
+                f"freezing_crossings|{crossings}",
+                f"wet_hours|{summary['wet_hours']}|first|{summary['first_wet_hour'] or ''}",
+                f"wettest_{wettest['hours']}h|{wettest['start']}|{wettest['mean']}",
+                f"windiest_{windiest['hours']}h|{windiest['start']}|{windiest['mean']}",
+            ]
+        )
+    return f"""
+{summary['hours']} hours from {summary['from']} to {summary['to']} (min/max/mean):
+Temperature: {line(summary['temperature'])} °{unit}
+Precipitation chance: {line(summary['precipitation_chance'])} %
+Wind: {line(summary['wind_mph'])} mph
+Freezing crossings: {crossings or 'none'}
+Hours with precipitation chance >= {PRECIPITATION_THRESHOLD}%: {summary['wet_hours']}, first at {summary['first_wet_hour'] or 'none'}
+Wettest {wettest['hours']}h window: from {wettest['start']}, mean {wettest['mean']} %
+Windiest {windiest['hours']}h window: from {windiest['start']}, mean {windiest['mean']} mph
+"""
+
+
+async def get_forecast_summary(
+    ctx: WeatherContext,
+    latitude: float,
+    longitude: float,
+    hours: int = SUMMARY_HOURS,
+    window: int = SUMMARY_WINDOW,
+    output: str = "text",
+    source: str = "hourly",
+) -> str:
+    """Summarize the hourly forecast for a location.
+
+    Args:
+        ctx: Shared server resources
+        latitude: Latitude of the location
+        longitude: Longitude of the location
+        hours: How many hours ahead to summarize
+        window: Rolling window length in hours
+        output: One of "text", "json" or "compact"
+        source: "hourly" or "gridpoints"
+    """
+    if source not in FORECAST_SOURCES:
+        raise ValueError(f"Unknown forecast source: {source}")
+    points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
+    points_data = await cached_nws_request(ctx, points_url)
+
+    if not points_data:
+        return "Unable to fetch forecast data for this location."
+
+    if source == "gridpoints" and ctx.open_gridpoints() is not None:
+        properties = points_data["properties"]
+        tile = await fetch_gridpoints(
+            ctx, properties["gridId"], properties["gridX"], properties["gridY"]
+        )
+        if tile is None:
+            return "Unable to fetch gridpoint forecast."
+        return format_summary(summarize_gridpoints(tile, hours, max(1, window)), output)
+
+    hourly_data = await cached_nws_request(ctx, points_data["properties"]["forecastHourly"])
+
+    if not hourly_data or not hourly_data["properties"].get("periods"):
+        return "Unable to fetch hourly forecast."
+
+    periods = hourly_data["properties"]["periods"][:hours]
+    return format_summary(summarize_hourly(periods, max(1, window)), output)
+
+
+async def run_server(
+    transport: str = "stdio",
+    port: int = 9009,
+    compress: bool = False,
+    compress_min_size: int | None = None,
+    warmup_states: Sequence[str] = (),
+    warmup_points: Sequence[tuple[float, float]] = (),
+    cache_keys_path: Path | None = CACHE_KEYS_PATH,
+    serving_profile: str = "default",
+    sse_idle_timeout: float = SSE_IDLE_TIMEOUT,
+    sse_keepalive_interval: float = SSE_KEEPALIVE_INTERVAL,
+    sse_max_lifetime: float = SSE_MAX_LIFETIME,
+    tool_policies: dict[str, ToolPolicy] | None = None,
+    tool_concurrency: int = TOOL_CONCURRENCY,
+    stdio_framing: str = "default",
+    alert_poll_interval: float = ALERT_POLL_INTERVAL,
+) -> None:
     """Run the MCP server with the specified transport."""
+    warmup = Warmup(warmup_states, warmup_points, cache_keys_path)
+    reaper = SessionReaper(sse_idle_timeout, sse_keepalive_interval, sse_max_lifetime)
+    scheduler = ToolScheduler({**TOOL_POLICIES, **(tool_policies or {})}, tool_concurrency)
+    async with open_weather_context(
+        warmup, cache_keys_path, reaper, scheduler, alert_poll_interval=alert_poll_interval
+    ) as ctx:
+        current_context.set(ctx)
+        ctx.task_group.start_soon(client_logs.run)
+        logger.info("Starting weather server", extra={"transport": transport, "port": port})
+        await serve(ctx, transport, port, compress, compress_min_size, serving_profile, stdio_framing)
+
+
+async def serve(
+    ctx: WeatherContext,
+    transport: str,
+    port: int,
+    compress: bool,
+    compress_min_size: int | None,
+    serving_profile: str = "default",
+    stdio_framing: str = "default",
+) -> None:
     if transport == "sse":
         from mcp.server.sse import SseServerTransport
         from starlette.applications import Starlette
+        from starlette.middleware import Middleware
         from starlette.requests import Request
+        from starlette.responses import JSONResponse, PlainTextResponse
         from starlette.routing import Mount, Route
 
         sse = SseServerTransport("/messages/")
+        drain = ctx.drain
+        reaper = ctx.reaper
+
+        async def handle_sse(request: Request) -> PlainTextResponse | None:
+            if drain.draining:
+                return PlainTextResponse("Server is shutting down", status_code=503)
+            with anyio.CancelScope() as scope:
+                session = reaper.open(scope, request._send)
+                drain.sessions[scope] = session.send
+                try:
+                    async with sse.connect_sse(
+                        request.scope, request.receive, session.send
+                    ) as streams:
+                        await server.run(
+                            streams[0], streams[1], server.create_initialization_options()
+                        )
+                finally:
+                    drain.sessions.pop(scope, None)
+                    reaper.close(session)
+
+        async def handle_messages(scope, receive, send) -> None:
+            # A client posting to its session is what keeps it from being idle
+            for name, value in parse_qsl(scope["query_string"].decode()):
+                if name == "session_id":
+                    reaper.touch(value)
+            await sse.handle_post_message(scope, receive, send)
+
+        async def handle_ready(request: Request) -> PlainTextResponse:
+            if drain.draining:
+                return PlainTextResponse("draining", status_code=503)
+            if not ctx.warmup.done:
+                # Route traffic here once the first calls would hit a warm cache
+                return PlainTextResponse("warming up", status_code=503)
+            return PlainTextResponse("ready")
+
+        async def handle_metrics(request: Request) -> JSONResponse:
+            return JSONResponse(
+                {
+                    **ctx.metrics.as_dict(),
+                    "sse_sessions": ctx.reaper.as_dict(),
+                    "tool_scheduler": ctx.scheduler.as_dict(),
+                }
+            )
 
-        async def handle_sse(request: Request) -> None:
-            async with sse.connect_sse(
-                request.scope, request.receive, request._send
-            ) as streams:
-                await server.run(
-                    streams[0], streams[1], server.create_initialization_options()
+        # Lets chatty clients post several messages to /messages/ at once
+        middleware = [Middleware(BatchMiddleware, stats=ctx.metrics.batches)]
+        if compress:
+            middleware.append(
+                Middleware(
+                    CompressionMiddleware,
+                    stats=ctx.metrics.response_compression,
+                    minimum_size=compress_min_size or COMPRESS_MIN_SIZE,
                 )
+            )
 
+        profile = SERVING_PROFILES[serving_profile]
         starlette_app = Starlette(
-            debug=True,
+            debug=profile["debug"],
             routes=[
                 Route("/sse", endpoint=handle_sse),
-                Mount("/messages/", app=sse.handle_post_message),
+                Route("/metrics", endpoint=handle_metrics),
+                Route("/ready", endpoint=handle_ready),
+                Mount("/messages/", app=handle_messages),
             ],
+            middleware=middleware,
         )
 
+        import asyncio
         import uvicorn
 
+        loop = asyncio.get_running_loop()
+
+        class DrainingServer(uvicorn.Server):
+            def handle_exit(self, sig, frame) -> None:
+                # The first SIGTERM/SIGINT drains, a second one exits right away
+                if drain.draining:
+                    super().handle_exit(sig, frame)
+                else:
+                    loop.call_soon_threadsafe(drain.begin)
+
         # Set up uvicorn config
-        config = uvicorn.Config(starlette_app, host="0.0.0.0", port=port)  # noqa: S104
-        app = uvicorn.Server(config)
+        config = uvicorn.Config(
+            starlette_app,
+            host="0.0.0.0",  # noqa: S104
+            port=port,
+            # Keep uvicorn's own handlers off, its records go through our queue
+            log_config=None,
+            **uvicorn_options(serving_profile),
+        )
+        app = DrainingServer(config)
+        # Cache keys are flushed when the context closes after serve() returns
+        ctx.task_group.start_soon(drain.run, lambda: setattr(app, "should_exit", True))
+        ctx.task_group.start_soon(reaper.run)
         # Use server.serve() instead of run() to stay in the same event loop
         await app.serve()
     else:
-        from mcp.server.stdio import stdio_server
+        if stdio_framing == "fast":
+            # Chunked reads and coalesced writes, see fast_stdio.py
+            from fast_stdio import stdio_server
+        else:
+            from mcp.server.stdio import stdio_server
 
         async with stdio_server() as (read_stream, write_stream):
             await server.run(
@@ -192,46 +1344,213 @@ async def run_server(transport: str = "stdio", port: int = 9009) -> None:
             )
 
 
-NWS_API_BASE = "https://api.weather.gov"
-USER_AGENT = "weather-app/1.0"
+async def upstream_get(ctx: WeatherContext, url: str, headers: dict | None = None) -> httpx.Response:
+    """Rate-limited GET to the NWS API.
+
+    When the caller is cancelled before the request went out, e.g. while
+    waiting for a pooled connection, its rate-limit token is given back.
+    The connection itself is released by httpx on cancellation.
+    """
+    await ctx.rate_limiter.acquire()
+    ctx.metrics.upstream_requests += 1
+    sent = False
 
+    async def trace(event: str, info: dict) -> None:
+        nonlocal sent
+        if event.endswith("send_request_headers.started"):
+            sent = True
 
-async def make_nws_request(url: str) -> dict[str, Any] | None:
+    try:
+        return await ctx.client().get(url, headers=headers, extensions={"trace": trace})
+    except anyio.get_cancelled_exc_class():
+        if not sent:
+            ctx.rate_limiter.release()
+            ctx.metrics.rate_tokens_released += 1
+        raise
+
+
+async def make_nws_request(ctx: WeatherContext, url: str) -> dict[str, Any] | None:
     """Make a request to the NWS API with proper error handling."""
-    headers = {"User-Agent": USER_AGENT, "Accept": "application/geo+json"}
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Error making request: {e}")
-            return None
+    try:
+        response = await upstream_get(ctx, url)
+        response.raise_for_status()
+        ctx.metrics.upstream_compression.record(
+            len(response.content), response.num_bytes_downloaded
+        )
+        return response.json()
+    except Exception as e:
+        ctx.metrics.upstream_errors += 1
+        upstream_logger.warning("NWS request failed", extra={"url": url, "error": str(e)})
+        return None
+
+
+def fresh_gridpoints(ctx: WeatherContext, key: tuple[str, int, int]):
+    """The stored tile for `key` if it was checked within GRIDPOINT_REFRESH_INTERVAL."""
+    tile = ctx.gridpoints.open(*key)
+    checked = ctx.gridpoints_checked.get(key)
+    if tile is not None and checked is not None:
+        if time.monotonic() - checked < GRIDPOINT_REFRESH_INTERVAL:
+            return tile
+    return None
+
+
+async def fetch_gridpoints(ctx: WeatherContext, office: str, x: int, y: int):
+    """Gridpoint tile for a forecast cell, refreshed incrementally.
+
+    A tile checked within GRIDPOINT_REFRESH_INTERVAL is used as is. Older
+    tiles are revalidated with If-Modified-Since, so an unchanged forecast
+    costs a 304 and no parsing; a changed one is merged into the tile.
+    Concurrent calls for one cell share a single upstream request.
+    """
+    key = (office.upper(), x, y)
+    tile = fresh_gridpoints(ctx, key)
+    if tile is not None:
+        return tile
+    lock = ctx.gridpoint_locks.setdefault(key, anyio.Lock())
+    async with lock:
+        # Whoever held the lock may have refreshed the tile meanwhile
+        tile = fresh_gridpoints(ctx, key)
+        if tile is not None:
+            return tile
+        return await refresh_gridpoints(ctx, key)
+
+
+async def refresh_gridpoints(ctx: WeatherContext, key: tuple[str, int, int]):
+    """Revalidate or refetch the tile for `key`, falling back to the stale one."""
+    office, x, y = key
+    tile = ctx.gridpoints.open(*key)
+    headers = {}
+    if tile is not None and tile.last_modified:
+        headers["If-Modified-Since"] = tile.last_modified
+    try:
+        response = await upstream_get(
+            ctx, f"{NWS_API_BASE}/gridpoints/{office}/{x},{y}", headers=headers
+        )
+        if response.status_code == 304 and tile is not None:
+            ctx.metrics.gridpoint_not_modified += 1
+            ctx.gridpoints_checked[key] = time.monotonic()
+            return tile
+        response.raise_for_status()
+        ctx.metrics.upstream_compression.record(
+            len(response.content), response.num_bytes_downloaded
+        )
+        properties = response.json()["properties"]
+    except Exception as e:
+        ctx.metrics.upstream_errors += 1
+        upstream_logger.warning(
+            "NWS request failed", extra={"url": f"gridpoints/{office}/{x},{y}", "error": str(e)}
+        )
+        # A stale tile still beats no answer
+        return tile
+
+    try:
+        # Expanding and writing the layers is CPU and disk work, keep it off the loop
+        tile = await anyio.to_thread.run_sync(
+            ctx.gridpoints.write, *key, properties, response.headers.get("Last-Modified")
+        )
+    except Exception as e:
+        logger.warning(
+            "Gridpoint tile write failed", extra={"tile": f"{office}/{x},{y}", "error": str(e)}
+        )
+        # Not marked as checked, so the next call tries again
+        return tile
+    ctx.metrics.gridpoint_updates += 1
+    ctx.gridpoints_checked[key] = time.monotonic()
+    return tile
+
+
+async def cached_nws_request(ctx: WeatherContext, url: str) -> dict[str, Any] | None:
+    """make_nws_request, served from the response cache while fresh."""
+    data = ctx.cache.get(url)
+    if data is not None:
+        ctx.metrics.cache_hits += 1
+        return data
+    ctx.metrics.cache_misses += 1
+    data = await make_nws_request(ctx, url)
+    if data is not None:
+        ctx.cache.put(url, data)
+    return data
 
 
 def format_alert(feature: dict) -> str:
     """Format an alert feature into a readable string."""
     props = feature["properties"]
-    return f"""                                                               
-Event: {props.get('event', 'Unknown')}                                        
-Area: {props.get('areaDesc', 'Unknown')}                                      
-Severity: {props.get('severity', 'Unknown')}                                  
-Description: {props.get('description', 'No description available')}           
-Instructions: {props.get('instruction', 'No specific instructions provided')} 
+    return f"""
+Event: {props.get('event', 'Unknown')}
+Area: {props.get('areaDesc', 'Unknown')}
+Severity: {props.get('severity', 'Unknown')}
+Description: {props.get('description', 'No description available')}
+Instructions: {props.get('instruction', 'No specific instructions provided')}
 """
 
 
+def parse_point(value: str) -> tuple[float, float]:
+    latitude, longitude = value.split(",")
+    return float(latitude), float(longitude)
+
+
+def parse_tool_policy(value: str) -> tuple[str, ToolPolicy]:
+    """NAME=LIMIT[:WEIGHT], e.g. get_forecast_summary=2:0.5"""
+    name, _, policy = value.partition("=")
+    limit, _, weight = policy.partition(":")
+    default = TOOL_POLICIES.get(name) or ToolPolicy()
+    return name, ToolPolicy(int(limit), float(weight) if weight else default.weight)
+
+
 def main(
 ):
-    import asyncio
     import argparse
     parser = argparse.ArgumentParser(description="Run the MCP Weather Server")
     parser.add_argument("--transport", choices=["stdio", "sse"], default="stdio", help="Transport type to use")
     parser.add_argument("--port", type=int, default=8000, help="Port to use for SSE transport")
+    parser.add_argument("--compress", action="store_true", help="Compress HTTP responses (SSE transport)")
+    parser.add_argument("--compress-min-size", type=int, default=COMPRESS_MIN_SIZE, help="Smallest response body to compress, in bytes")
+    parser.add_argument("--warmup-state", action="append", default=[], help="State whose alerts are prefetched at startup, repeatable")
+    parser.add_argument("--warmup-point", action="append", default=[], type=parse_point, help="LAT,LON whose forecast is prefetched at startup, repeatable")
+    parser.add_argument("--cache-keys", type=Path, default=CACHE_KEYS_PATH, help="File the hottest cache keys are saved to and warmed up from")
+    parser.add_argument("--serving-profile", choices=list(SERVING_PROFILES), default="default", help="HTTP serving profile for the SSE transport")
+    parser.add_argument("--sse-idle-timeout", type=float, default=SSE_IDLE_TIMEOUT, help="Close SSE sessions whose client sent nothing for this many seconds")
+    parser.add_argument("--sse-keepalive", type=float, default=SSE_KEEPALIVE_INTERVAL, help="Seconds between keep-alive comments on SSE streams")
+    parser.add_argument("--sse-max-lifetime", type=float, default=SSE_MAX_LIFETIME, help="Close SSE sessions older than this many seconds")
+    parser.add_argument("--alert-poll-interval", type=float, default=ALERT_POLL_INTERVAL, help="Seconds between polls of the alerts that sessions are subscribed to")
+    parser.add_argument("--log-level", default="INFO", help="Level of the weather loggers' output")
+    parser.add_argument("--log-file", type=Path, help="Write logs here instead of stderr")
+    parser.add_argument("--log-module-level", action="append", default=[], type=parse_module_level, help="Per-logger NAME=LEVEL, e.g. weather.upstream=DEBUG, repeatable")
+    parser.add_argument("--log-format", choices=["json", "text"], default="json", help="Log line format")
+    parser.add_argument("--tool-policy", action="append", default=[], type=parse_tool_policy, help="Per-tool NAME=LIMIT[:WEIGHT] overriding the scheduler registry, repeatable")
+    parser.add_argument("--tool-concurrency", type=int, default=TOOL_CONCURRENCY, help="Tool calls running at once across all tools")
+    parser.add_argument("--stdio-framing", choices=["default", "fast"], default="default", help="stdio transport: the SDK's, or fast_stdio's chunked reads and coalesced writes")
     args = parser.parse_args()
 
-    asyncio.run(run_server(transport=args.transport, port=args.port))
+    listener = setup_logging(
+        args.log_level,
+        args.log_file,
+        dict(args.log_module_level),
+        json_format=args.log_format == "json",
+    )
+    try:
+        run_with_profile(
+            run_server(
+                transport=args.transport,
+                port=args.port,
+                compress=args.compress,
+                compress_min_size=args.compress_min_size,
+                warmup_states=args.warmup_state,
+                warmup_points=args.warmup_point,
+                cache_keys_path=args.cache_keys,
+                serving_profile=args.serving_profile,
+                sse_idle_timeout=args.sse_idle_timeout,
+                sse_keepalive_interval=args.sse_keepalive,
+                sse_max_lifetime=args.sse_max_lifetime,
+                tool_policies=dict(args.tool_policy),
+                tool_concurrency=args.tool_concurrency,
+                stdio_framing=args.stdio_framing,
+                alert_poll_interval=args.alert_poll_interval,
+            ),
+            args.serving_profile,
+        )
+    finally:
+        listener.stop()
 
 if __name__ == "__main__":
     main()
-
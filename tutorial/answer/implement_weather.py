@@ -4,6 +4,7 @@
 
 from contextlib import asynccontextmanager
 from collections.abc import AsyncIterator
+from dataclasses import dataclass
 from mcp.server import Server
 import mcp.server.stdio
 from mcp.server.models import InitializationOptions
@@ -11,22 +12,33 @@ from mcp.server.lowlevel.server import NotificationOptions
 from mcp.types import Tool, TextContent
 from typing import Any, Sequence, Text
 import httpx
+import logging
+import os
 
-NWS_API_BASE = "https://api.weather.gov"
+from weather_logging import setup_logging
+
+NWS_API_BASE = os.environ.get("WEATHER_NWS_API_BASE", "https://api.weather.gov")
 USER_AGENT = "weather-app/1.0"
 
+logger = logging.getLogger("weather.server")
+
+
+@dataclass
+class WeatherContext:
+    """Resources the server shares between tool calls."""
+
+    http: httpx.AsyncClient
 
-async def make_nws_request(url: str) -> dict[str, Any] | None:
+
+async def make_nws_request(ctx: WeatherContext, url: str) -> dict[str, Any] | None:
     """Make a request to the NWS API with proper error handling."""
-    headers = {"User-Agent": USER_AGENT, "Accept": "application/geo+json"}
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, timeout=5.0)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Error making request: {e}")
-            return None
+    try:
+        response = await ctx.http.get(url)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        logger.warning("NWS request failed", extra={"url": url, "error": str(e)})
+        return None
 
 
 def format_alert(feature: dict) -> str:
@@ -42,27 +54,29 @@ Instructions: {props.get('instruction', 'No specific instruction provided')}
 
 
 @asynccontextmanager
-async def server_lifespan(server: Server) -> AsyncIterator[str]:
-    try:
-        ## this is just example. actually code,
-        ## use yield with consuming resource, like db connection
-        yield server.name
-    finally:
-        pass
+async def server_lifespan(server: Server) -> AsyncIterator[WeatherContext]:
+    # One pooled client for the whole session instead of one per request,
+    # closed when the session ends
+    async with httpx.AsyncClient(
+        headers={"User-Agent": USER_AGENT, "Accept": "application/geo+json"},
+        timeout=5.0,
+    ) as http:
+        yield WeatherContext(http=http)
 
 
 server = Server("weather", lifespan=server_lifespan)
 
 
-async def get_alerts(state: str) -> str:
+async def get_alerts(ctx: WeatherContext, state: str) -> str:
     """Get weather alerts for a US state
 
     Args:
+        ctx: Shared server resources
         state: Two-letter US state code (e.g. CA, NY)
     """
 
     url = f"{NWS_API_BASE}/alerts/active/area/{state}"
-    data = await make_nws_request(url)
+    data = await make_nws_request(ctx, url)
 
     if not data or "features" not in data:
         return f"url: {url}, Unable to fetch alerts or no alerts found."
@@ -74,24 +88,25 @@ async def get_alerts(state: str) -> str:
     return "\n--\n".join(alerts)
 
 
-async def get_forecast(latitude: float, longitude: float) -> str:
+async def get_forecast(ctx: WeatherContext, latitude: float, longitude: float) -> str:
     """Get weather forecast for a location.
 
     Args:
+        ctx: Shared server resources
         latitude: Latitude of the location
         logitude: Longitude of the location
     """
 
     # First get the Forecast grid endpoint
     points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
-    points_data = await make_nws_request(points_url)
+    points_data = await make_nws_request(ctx, points_url)
 
     if not points_data:
         return "Unable to fetch forecast data for this location."
 
     # Get the forecast URL from the points response
     forecast_url = points_data["properties"]["forecast"]
-    forecast_data = await make_nws_request(forecast_url)
+    forecast_data = await make_nws_request(ctx, forecast_url)
 
     if not forecast_data:
         return "Unable to fetch detailed forecast."
@@ -114,58 +129,52 @@ Forecast: {period['detailedForecast']}
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
     # return [TextContent(type="text", text="test~")]
+    ctx: WeatherContext = server.request_context.lifespan_context
     if name == "get_alerts":
-        result = await get_alerts(arguments["state"])
+        result = await get_alerts(ctx, arguments["state"])
         return [TextContent(type="text", text=result)]
     elif name == "get_forecast":
-        result = await get_forecast(arguments["latitude"], arguments["longitude"])
+        result = await get_forecast(ctx, arguments["latitude"], arguments["longitude"])
         return [TextContent(type="text", text=result)]
     raise ValueError(f"Unknown tool: {name}")
 
 
 @server.list_tools()
 async def list_tools() -> list[Tool]:
-    tools = []
-    ctx = server.request_context.lifespan_context
-
-    if ctx and "weather":
-        tools.extend(
-            [
-                Tool(
-                    name="get_alerts",
-                    description="Get weather alerts for a US state",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "state": {
-                                "type": "string",
-                                "description": "Two-letter US state code (e.g. CA, NY)",
-                            }
-                        },
-                        "required": ["state"],
+    return [
+        Tool(
+            name="get_alerts",
+            description="Get weather alerts for a US state",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "state": {
+                        "type": "string",
+                        "description": "Two-letter US state code (e.g. CA, NY)",
+                    }
+                },
+                "required": ["state"],
+            },
+        ),
+        Tool(
+            name="get_forecast",
+            description="Get weather forecast for a location",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "latitude": {
+                        "type": "number",
+                        "description": "Latitude of the location. ex. 38.8898",
                     },
-                ),
-                Tool(
-                    name="get_forecast",
-                    description="Get weather forecast for a location",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "latitude": {
-                                "type": "number",
-                                "description": "Latitude of the location. ex. 38.8898",
-                            },
-                            "longitude": {
-                                "type": "number",
-                                "description": "Longitude of the location. ex. -77.009056",
-                            },
-                        },
-                        "required": ["latitude", "longitude"],
+                    "longitude": {
+                        "type": "number",
+                        "description": "Longitude of the location. ex. -77.009056",
                     },
-                ),
-            ]
-        )
-    return tools
+                },
+                "required": ["latitude", "longitude"],
+            },
+        ),
+    ]
 
 
 async def run():
@@ -185,10 +194,14 @@ async def run():
 
 
 def main():
-    print("server is running...")
     import asyncio
 
-    asyncio.run(run())
+    listener = setup_logging()
+    logger.info("server is running...")
+    try:
+        asyncio.run(run())
+    finally:
+        listener.stop()
 
 
 if __name__ == "__main__":
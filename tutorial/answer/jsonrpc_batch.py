@@ -0,0 +1,157 @@
+"""JSON-RPC batch requests for the MCP message endpoint of the HTTP transports.
+
+The SSE transport accepts one JSON-RPC message per POST to /messages/ and
+answers it on the session's event stream. `BatchMiddleware` additionally
+accepts a JSON array of messages in one POST:
+
+    POST /messages/?session_id=...
+    [{"jsonrpc": "2.0", "id": 1, "method": "tools/call", ...},
+     {"jsonrpc": "2.0", "id": 2, "method": "tools/call", ...}]
+
+Each message is handed to the transport as if it had been posted on its
+own. The server handles requests concurrently, so every response is sent
+on the event stream as soon as its call completes, in completion order.
+A batch is accepted or rejected as a whole: when any element is not a
+valid JSON-RPC message none of them is delivered.
+"""
+
+import json
+from typing import Any
+
+from mcp.types import JSONRPCMessage
+from pydantic import ValidationError
+
+MAX_BATCH = 100
+MESSAGES_PATH = "/messages/"
+
+
+class BatchStats:
+    """Counts of batch POSTs, reported by /metrics when the server has one."""
+
+    def __init__(self):
+        self.batches = 0
+        self.messages = 0
+        self.rejected = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "messages": self.messages,
+            "rejected": self.rejected,
+            "mean_batch_size": round(self.messages / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+async def read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            return body
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            return body
+
+
+def replay(body: bytes):
+    """An ASGI receive callable delivering an already read request body."""
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return receive
+
+
+async def respond(send, status: int, text: str) -> None:
+    body = text.encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def parse_batch(body: bytes, max_batch: int) -> list[Any] | str:
+    """The batch's messages, or why it is rejected."""
+    try:
+        batch = json.loads(body)
+    except ValueError:
+        return "Could not parse batch"
+    if not batch:
+        return "Empty batch"
+    if len(batch) > max_batch:
+        return f"Batch larger than {max_batch} messages"
+    for index, element in enumerate(batch):
+        try:
+            JSONRPCMessage.model_validate(element)
+        except ValidationError:
+            return f"Could not parse message {index} of batch"
+    return batch
+
+
+class BatchMiddleware:
+    """ASGI middleware splitting batch POSTs to the message endpoint into single messages.
+
+    Everything else, single-message POSTs included, passes through untouched.
+    """
+
+    def __init__(
+        self,
+        app,
+        stats: BatchStats | None = None,
+        path: str = MESSAGES_PATH,
+        max_batch: int = MAX_BATCH,
+    ):
+        self.app = app
+        self.stats = stats or BatchStats()
+        self.path = path
+        self.max_batch = max_batch
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith(self.path):
+            await self.app(scope, receive, send)
+            return
+
+        body = await read_body(receive)
+        if not body.lstrip().startswith(b"["):
+            await self.app(scope, replay(body), send)
+            return
+
+        batch = parse_batch(body, self.max_batch)
+        if isinstance(batch, str):
+            self.stats.rejected += 1
+            await respond(send, 400, batch)
+            return
+
+        self.stats.batches += 1
+        self.stats.messages += len(batch)
+        for element in batch:
+            status, text = await self.forward(scope, json.dumps(element).encode())
+            if status >= 400:
+                # Unknown or closed session, the same answer for every element
+                await respond(send, status, text)
+                return
+        await respond(send, 202, "Accepted")
+
+    async def forward(self, scope, body: bytes) -> tuple[int, str]:
+        """Post one message to the wrapped app and return its status and body."""
+        status = 500
+        chunks = []
+
+        async def capture(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        # Routing rewrites root_path and path in the scope it is given, so every
+        # element needs its own copy
+        await self.app(dict(scope), replay(body), capture)
+        return status, b"".join(chunks).decode(errors="replace")
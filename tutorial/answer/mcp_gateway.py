@@ -0,0 +1,433 @@
+"""MCP gateway: many backend servers behind one endpoint.
+
+Every host normally spawns its own copy of every stdio server it uses. The
+gateway instead starts a pool of warm instances of each backend once, stdio
+processes or remote SSE servers, and serves all of their tools to any number
+of clients over one SSE endpoint (or stdio):
+
+    python mcp_gateway.py --config gateway.json --port 8000
+
+with a config in the same shape as a desktop host's `mcpServers`:
+
+    {
+      "mcpServers": {
+        "weather": {
+          "command": "python",
+          "args": ["implement_sse.py", "--transport", "stdio"],
+          "env": {"WEATHER_NWS_API_BASE": "http://127.0.0.1:8100"},
+          "instances": 4,
+          "concurrency": 8
+        },
+        "remote": {"url": "http://127.0.0.1:9000/sse"}
+      }
+    }
+
+Tools are exposed as `<backend>__<tool>`, e.g. `weather__get_forecast`, and
+each call goes to the least busy live instance of its backend, waiting while
+every instance is at its `concurrency`. Instances that crash or stop
+answering are restarted in the background. A backend's tool list is read
+once, from the first of its instances to start. Stdio backends inherit the
+gateway's environment plus their `env`, and run in its working directory.
+
+Only tools are forwarded; backend resources, prompts and notifications are
+not.
+"""
+
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator
+import json
+import logging
+import os
+
+import anyio
+import anyio.abc
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+from mcp.server import Server
+from mcp.shared.exceptions import McpError
+import mcp.types as types
+
+from jsonrpc_batch import BatchMiddleware
+from weather_logging import parse_module_level, setup_logging
+
+# MCP tool names only allow letters, digits, "_" and "-"
+NAMESPACE_SEPARATOR = "__"
+DEFAULT_INSTANCES = 1
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 60.0
+PING_TIMEOUT = 5.0
+# Error code of a request the client session gave up waiting for
+REQUEST_TIMEOUT = 408
+RESTART_DELAY = 1.0
+RESTART_DELAY_MAX = 30.0
+
+logger = logging.getLogger("gateway")
+
+
+@dataclass
+class BackendSpec:
+    """How to reach one backend server and how many instances of it to keep."""
+
+    command: str | None = None
+    args: list[str] = field(default_factory=list)
+    env: dict[str, str] = field(default_factory=dict)
+    url: str | None = None
+    headers: dict[str, str] = field(default_factory=dict)
+    instances: int = DEFAULT_INSTANCES
+    # Calls one instance handles at a time
+    concurrency: int = DEFAULT_CONCURRENCY
+    # Seconds to wait for any response from an instance
+    timeout: float = DEFAULT_TIMEOUT
+
+    def __post_init__(self):
+        if (self.command is None) == (self.url is None):
+            raise ValueError("needs exactly one of command or url")
+        if self.instances < 1 or self.concurrency < 1:
+            raise ValueError("instances and concurrency must be at least 1")
+
+
+def load_backends(path: Path) -> dict[str, BackendSpec]:
+    """Backends from an mcpServers config file."""
+    config = json.loads(path.read_text())
+    servers = config.get("mcpServers") if isinstance(config, dict) else None
+    if not isinstance(servers, dict) or not servers:
+        raise ValueError(f"{path}: expected a non-empty mcpServers object")
+    backends = {}
+    for name, options in servers.items():
+        if NAMESPACE_SEPARATOR in name or not name.replace("-", "").replace("_", "").isalnum():
+            raise ValueError(f"{path}: invalid backend name {name!r}")
+        try:
+            backends[name] = BackendSpec(**options)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{path}: backend {name}: {e}") from e
+    return backends
+
+
+class BackendUnavailable(Exception):
+    pass
+
+
+class BackendInstance:
+    """One warm connection to a backend, reconnected whenever it fails."""
+
+    def __init__(self, name: str, index: int, spec: BackendSpec, on_ready):
+        self.name = name
+        self.index = index
+        self.spec = spec
+        self.on_ready = on_ready
+        self.session: ClientSession | None = None
+        self.in_flight = 0
+        self.calls = 0
+        self.restarts = 0
+        self.failed: anyio.Event | None = None
+
+    @asynccontextmanager
+    async def connect(self) -> AsyncIterator[ClientSession]:
+        if self.spec.url is not None:
+            transport = sse_client(self.spec.url, self.spec.headers)
+        else:
+            parameters = StdioServerParameters(
+                command=self.spec.command,
+                args=self.spec.args,
+                env={**os.environ, **self.spec.env},
+            )
+            transport = stdio_client(parameters)
+        async with transport as (read_stream, write_stream):
+            async with ClientSession(
+                read_stream, write_stream, read_timeout_seconds=timedelta(seconds=self.spec.timeout)
+            ) as session:
+                await session.initialize()
+                yield session
+
+    async def run(self, *, task_status: anyio.abc.TaskStatus = anyio.TASK_STATUS_IGNORED) -> None:
+        """Keep the instance connected, reporting started after the first attempt."""
+        started = False
+        delay = RESTART_DELAY
+        while True:
+            self.failed = anyio.Event()
+            try:
+                async with self.connect() as session:
+                    self.session = session
+                    delay = RESTART_DELAY
+                    logger.info("Backend instance ready", extra={"backend": self.name, "instance": self.index})
+                    await self.on_ready(self)
+                    if not started:
+                        started = True
+                        task_status.started()
+                    await self.failed.wait()
+            except Exception as e:
+                logger.warning(
+                    "Backend instance failed",
+                    extra={"backend": self.name, "instance": self.index, "error": repr(e)},
+                )
+            finally:
+                self.session = None
+            if not started:
+                # Serve the other backends meanwhile, this one keeps retrying
+                started = True
+                task_status.started()
+            self.restarts += 1
+            await anyio.sleep(delay)
+            delay = min(delay * 2, RESTART_DELAY_MAX)
+
+    async def check(self) -> None:
+        """After a timed out call, restart the instance unless it still answers a ping."""
+        session = self.session
+        if session is None:
+            return
+        with anyio.move_on_after(PING_TIMEOUT):
+            try:
+                await session.send_ping()
+                return
+            except Exception:
+                pass
+        self.fail()
+
+    def fail(self) -> None:
+        if self.failed is not None:
+            self.failed.set()
+
+
+class BackendPool:
+    """The instances of one backend and the tools they provide."""
+
+    def __init__(self, name: str, spec: BackendSpec):
+        self.name = name
+        self.spec = spec
+        self.instances = [BackendInstance(name, index, spec, self.instance_ready) for index in range(spec.instances)]
+        self.tools: list[types.Tool] = []
+        self.waiting = 0
+        self.errors = 0
+        self.freed: anyio.Event | None = None
+
+    async def start(self, task_group: anyio.abc.TaskGroup) -> None:
+        """Start every instance in `task_group`, returning once each made its first attempt."""
+        async with anyio.create_task_group() as starting:
+            for instance in self.instances:
+                starting.start_soon(task_group.start, instance.run)
+
+    def running(self) -> int:
+        return sum(instance.session is not None for instance in self.instances)
+
+    async def instance_ready(self, instance: BackendInstance) -> None:
+        if not self.tools:
+            self.tools = (await instance.session.list_tools()).tools
+        self.wake()
+
+    def wake(self) -> None:
+        if self.freed is not None:
+            self.freed.set()
+
+    @asynccontextmanager
+    async def instance(self) -> AsyncIterator[BackendInstance]:
+        """The least busy live instance, once one has room for another call."""
+        while True:
+            live = [instance for instance in self.instances if instance.session is not None]
+            if not live:
+                # Waiting would only hide a backend that is down
+                raise BackendUnavailable(f"Backend {self.name} has no running instance")
+            chosen = min(live, key=lambda instance: instance.in_flight)
+            if chosen.in_flight < self.spec.concurrency:
+                break
+            if self.freed is None or self.freed.is_set():
+                self.freed = anyio.Event()
+            self.waiting += 1
+            try:
+                await self.freed.wait()
+            finally:
+                self.waiting -= 1
+        chosen.in_flight += 1
+        chosen.calls += 1
+        try:
+            yield chosen
+        finally:
+            chosen.in_flight -= 1
+            self.wake()
+
+    async def call_tool(self, tool: str, arguments: dict[str, Any]) -> types.CallToolResult:
+        async with self.instance() as instance:
+            try:
+                return await instance.session.call_tool(tool, arguments)
+            except McpError as e:
+                self.errors += 1
+                if e.error.code == REQUEST_TIMEOUT:
+                    # A dead stdio process only shows as requests timing out
+                    await instance.check()
+                raise
+            except (anyio.BrokenResourceError, anyio.ClosedResourceError, anyio.EndOfStream) as e:
+                self.errors += 1
+                instance.fail()
+                raise BackendUnavailable(f"Backend {self.name} instance {instance.index} disconnected") from e
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "tools": len(self.tools),
+            "running": self.running(),
+            "waiting": self.waiting,
+            "errors": self.errors,
+            "instances": [
+                {
+                    "running": instance.session is not None,
+                    "in_flight": instance.in_flight,
+                    "calls": instance.calls,
+                    "restarts": instance.restarts,
+                }
+                for instance in self.instances
+            ],
+        }
+
+
+@dataclass
+class GatewayContext:
+    """The backend pools, shared by every client session of the gateway."""
+
+    pools: dict[str, BackendPool]
+
+    def route(self, name: str) -> tuple[BackendPool, str]:
+        backend, separator, tool = name.partition(NAMESPACE_SEPARATOR)
+        pool = self.pools.get(backend)
+        if not separator or pool is None:
+            raise ValueError(f"Unknown tool: {name}")
+        return pool, tool
+
+
+@asynccontextmanager
+async def open_gateway_context(backends: dict[str, BackendSpec]) -> AsyncIterator[GatewayContext]:
+    """Start every backend instance, and stop them all on exit."""
+    async with anyio.create_task_group() as tg:
+        pools = {name: BackendPool(name, spec) for name, spec in backends.items()}
+        # All at once, so startup takes as long as the slowest backend
+        async with anyio.create_task_group() as starting:
+            for pool in pools.values():
+                starting.start_soon(pool.start, tg)
+        try:
+            yield GatewayContext(pools)
+        finally:
+            tg.cancel_scope.cancel()
+
+
+# Set by run_gateway for the lifetime of the process, like implement_sse's
+current_context: ContextVar[GatewayContext] = ContextVar("gateway_context")
+
+
+@asynccontextmanager
+async def server_lifespan(server: Server) -> AsyncIterator[GatewayContext]:
+    yield current_context.get()
+
+
+server = Server("gateway", lifespan=server_lifespan)
+
+
+@server.list_tools()
+async def list_tools() -> list[types.Tool]:
+    ctx: GatewayContext = server.request_context.lifespan_context
+    return [
+        types.Tool(
+            name=f"{name}{NAMESPACE_SEPARATOR}{tool.name}",
+            description=f"[{name}] {tool.description or ''}".rstrip(),
+            inputSchema=tool.inputSchema,
+        )
+        for name, pool in ctx.pools.items()
+        for tool in pool.tools
+    ]
+
+
+async def call_tool(request: types.CallToolRequest) -> types.ServerResult:
+    """Forward a call to its backend and pass the backend's result through as is.
+
+    Registered as the raw request handler rather than with @server.call_tool(),
+    which would flatten the result to content and lose the backend's isError.
+    """
+    ctx: GatewayContext = server.request_context.lifespan_context
+    try:
+        pool, tool = ctx.route(request.params.name)
+        result = await pool.call_tool(tool, request.params.arguments or {})
+    except Exception as e:
+        result = types.CallToolResult(content=[types.TextContent(type="text", text=str(e))], isError=True)
+    return types.ServerResult(result)
+
+
+server.request_handlers[types.CallToolRequest] = call_tool
+
+
+async def serve_sse(ctx: GatewayContext, host: str, port: int) -> None:
+    from mcp.server.sse import SseServerTransport
+    from starlette.applications import Starlette
+    from starlette.middleware import Middleware
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, PlainTextResponse
+    from starlette.routing import Mount, Route
+    import uvicorn
+
+    sse = SseServerTransport("/messages/")
+
+    async def handle_sse(request: Request) -> None:
+        async with sse.connect_sse(request.scope, request.receive, request._send) as streams:
+            await server.run(streams[0], streams[1], server.create_initialization_options())
+
+    async def handle_ready(request: Request) -> PlainTextResponse:
+        if not all(pool.running() for pool in ctx.pools.values()):
+            return PlainTextResponse("backends starting", status_code=503)
+        return PlainTextResponse("ready")
+
+    async def handle_metrics(request: Request) -> JSONResponse:
+        return JSONResponse({name: pool.as_dict() for name, pool in ctx.pools.items()})
+
+    starlette_app = Starlette(
+        routes=[
+            Route("/sse", endpoint=handle_sse),
+            Route("/metrics", endpoint=handle_metrics),
+            Route("/ready", endpoint=handle_ready),
+            Mount("/messages/", app=sse.handle_post_message),
+        ],
+        middleware=[Middleware(BatchMiddleware)],
+    )
+    config = uvicorn.Config(starlette_app, host=host, port=port, log_config=None)
+    await uvicorn.Server(config).serve()
+
+
+async def run_gateway(
+    backends: dict[str, BackendSpec], transport: str = "sse", host: str = "0.0.0.0", port: int = 8000  # noqa: S104
+) -> None:
+    async with open_gateway_context(backends) as ctx:
+        current_context.set(ctx)
+        logger.info("Starting gateway", extra={"transport": transport, "backends": list(backends)})
+        if transport == "sse":
+            await serve_sse(ctx, host, port)
+        else:
+            from mcp.server.stdio import stdio_server
+
+            async with stdio_server() as (read_stream, write_stream):
+                await server.run(read_stream, write_stream, server.create_initialization_options())
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the tools of many MCP servers from one endpoint")
+    parser.add_argument("--config", type=Path, required=True, help="JSON file with an mcpServers object")
+    parser.add_argument("--transport", choices=["sse", "stdio"], default="sse", help="Transport clients connect with")
+    parser.add_argument("--host", default="0.0.0.0", help="Address to listen on for SSE")  # noqa: S104
+    parser.add_argument("--port", type=int, default=8000, help="Port to use for SSE transport")
+    parser.add_argument("--log-level", default="INFO", help="Level of the gateway's own log output")
+    parser.add_argument("--log-module-level", action="append", default=[], type=parse_module_level, help="Per-logger NAME=LEVEL, repeatable")
+    args = parser.parse_args()
+
+    try:
+        backends = load_backends(args.config)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    listener = setup_logging(args.log_level, levels=dict(args.log_module_level))
+    try:
+        anyio.run(run_gateway, backends, args.transport, args.host, args.port)
+    finally:
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
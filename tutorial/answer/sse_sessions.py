@@ -0,0 +1,200 @@
+"""Lifecycle of the SSE server's connections: keep-alive, reaping and draining.
+
+`SessionReaper` wraps each SSE response in an `SseSession`, pings it with a
+comment line every keep-alive interval and closes the sessions that went
+idle, outlived their maximum lifetime or stopped reading. `Drain` carries
+the server through a graceful shutdown, closing the remaining streams with
+an explicit close event.
+"""
+
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any
+
+import anyio
+
+DRAIN_TIMEOUT = 20.0
+SSE_CLOSE_EVENT = b"event: close\ndata: server shutting down\n\n"
+SSE_IDLE_TIMEOUT = 300.0
+SSE_KEEPALIVE_INTERVAL = 15.0
+SSE_MAX_LIFETIME = 3600.0
+SSE_KEEPALIVE_COMMENT = b": keep-alive\n\n"
+SSE_SESSION_ID = re.compile(rb"session_id=([0-9a-f]+)")
+
+
+class Drain:
+    """Graceful shutdown state shared by the HTTP routes and call_tool.
+
+    Once draining, new sessions and tool calls are refused and readiness
+    fails, in-flight calls get up to `timeout` to finish, and the remaining
+    SSE streams are sent a close event and ended.
+    """
+
+    def __init__(self, timeout: float = DRAIN_TIMEOUT):
+        self.timeout = timeout
+        self.draining = False
+        self.in_flight = 0
+        # Created on first use, primitives need a running event loop
+        self.requested: anyio.Event | None = None
+        # open SSE connection -> the ASGI send of its response
+        self.sessions: dict[anyio.CancelScope, Any] = {}
+
+    def begin(self) -> None:
+        self.draining = True
+        if self.requested is not None:
+            self.requested.set()
+
+    @contextmanager
+    def track(self):
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    async def wait_idle(self) -> None:
+        with anyio.move_on_after(self.timeout):
+            while self.in_flight:
+                await anyio.sleep(0.05)
+
+    async def close_sessions(self) -> None:
+        for scope, send in list(self.sessions.items()):
+            with anyio.move_on_after(1):
+                try:
+                    await send(
+                        {"type": "http.response.body", "body": SSE_CLOSE_EVENT, "more_body": True}
+                    )
+                except Exception:
+                    pass
+            scope.cancel()
+
+    async def run(self, on_drained) -> None:
+        self.requested = anyio.Event()
+        if not self.draining:
+            await self.requested.wait()
+        await self.wait_idle()
+        await self.close_sessions()
+        on_drained()
+
+
+class SseSession:
+    """One SSE connection as the reaper sees it.
+
+    Its `send` wraps the ASGI send of the response, so keep-alive comments
+    never interleave with events, and learns the MCP session id from the
+    endpoint event, which is how POSTs to /messages/ count as activity.
+    `subscriptions` holds the resource URIs the client is subscribed to.
+    """
+
+    def __init__(self, reaper: "SessionReaper", scope: anyio.CancelScope, send):
+        self.reaper = reaper
+        self.scope = scope
+        self._send = send
+        self.lock = anyio.Lock()
+        self.session_id: str | None = None
+        self.started = False
+        self.subscriptions: set[str] = set()
+        self.opened_at = self.last_activity = time.monotonic()
+
+    async def send(self, message) -> None:
+        if message["type"] == "http.response.start":
+            self.started = True
+        elif self.session_id is None:
+            match = SSE_SESSION_ID.search(message.get("body", b""))
+            if match:
+                self.session_id = match.group(1).decode()
+                self.reaper.by_id[self.session_id] = self
+        async with self.lock:
+            await self._send(message)
+
+    async def ping(self) -> None:
+        if self.started:
+            await self.send(
+                {"type": "http.response.body", "body": SSE_KEEPALIVE_COMMENT, "more_body": True}
+            )
+
+
+class SessionReaper:
+    """Keeps SSE connections alive while used and closes them once abandoned.
+
+    Every `keepalive_interval` each session gets a comment line, so peers
+    that silently went away are noticed by the TCP stack. Sessions whose
+    client posted nothing for `idle_timeout`, that outlived `max_lifetime`
+    or whose ping did not go out within an interval are closed, which ends
+    their server task and frees their streams. A session subscribed to a
+    resource is never idle: its client is waiting for updates and has no
+    reason to post.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = SSE_IDLE_TIMEOUT,
+        keepalive_interval: float = SSE_KEEPALIVE_INTERVAL,
+        max_lifetime: float = SSE_MAX_LIFETIME,
+    ):
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.max_lifetime = max_lifetime
+        self.sessions: set[SseSession] = set()
+        self.by_id: dict[str, SseSession] = {}
+        # why -> count: idle, lifetime or unresponsive
+        self.reaped: Counter[str] = Counter()
+
+    def open(self, scope: anyio.CancelScope, send) -> SseSession:
+        session = SseSession(self, scope, send)
+        self.sessions.add(session)
+        return session
+
+    def close(self, session: SseSession) -> None:
+        self.sessions.discard(session)
+        if session.session_id is not None:
+            self.by_id.pop(session.session_id, None)
+
+    def touch(self, session_id: str) -> None:
+        session = self.by_id.get(session_id)
+        if session is not None:
+            session.last_activity = time.monotonic()
+
+    def subscribe(self, session_id: str, uri: str) -> None:
+        session = self.by_id.get(session_id)
+        if session is not None:
+            session.subscriptions.add(uri)
+
+    def unsubscribe(self, session_id: str, uri: str) -> None:
+        session = self.by_id.get(session_id)
+        if session is not None:
+            session.subscriptions.discard(uri)
+
+    def reap(self, session: SseSession, why: str) -> None:
+        self.reaped[why] += 1
+        session.scope.cancel()
+        self.close(session)
+
+    async def check(self, session: SseSession) -> None:
+        now = time.monotonic()
+        if now - session.opened_at > self.max_lifetime:
+            self.reap(session, "lifetime")
+        elif not session.subscriptions and now - session.last_activity > self.idle_timeout:
+            self.reap(session, "idle")
+        else:
+            with anyio.move_on_after(self.keepalive_interval) as timeout:
+                try:
+                    await session.ping()
+                except Exception:
+                    self.reap(session, "unresponsive")
+                    return
+            if timeout.cancelled_caught:
+                # The peer stopped reading and the socket buffer is full
+                self.reap(session, "unresponsive")
+
+    async def run(self) -> None:
+        while True:
+            await anyio.sleep(self.keepalive_interval)
+            async with anyio.create_task_group() as tg:
+                for session in list(self.sessions):
+                    tg.start_soon(self.check, session)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"open": len(self.sessions), "reaped": dict(self.reaped)}
@@ -0,0 +1,163 @@
+"""Admission of tool calls under per-tool limits and weighted fair sharing.
+
+Every tool call runs inside a `ToolScheduler.slot` for its tool name:
+
+    async with scheduler.slot("get_forecast"):
+        ...
+
+`TOOL_POLICIES` is the scheduling side of the tool registry. The scheduler
+reports queue times per tool, which the SSE server exposes on /metrics.
+"""
+
+import time
+from collections import Counter, defaultdict, deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any
+
+import anyio
+
+TOOL_CONCURRENCY = 32
+
+
+@dataclass
+class ToolPolicy:
+    """How the scheduler treats calls to one tool.
+
+    `max_concurrency` caps the tool's running calls; `weight` is its share
+    of the server-wide slots when tools compete for them.
+    """
+
+    max_concurrency: int = 8
+    weight: float = 1.0
+
+
+# The tool registry's scheduling side: cheap, latency-sensitive lookups get
+# more slots and a larger share than the NumPy summary
+TOOL_POLICIES = {
+    "get_alerts": ToolPolicy(max_concurrency=32, weight=4.0),
+    "get_alerts_at_point": ToolPolicy(max_concurrency=32, weight=4.0),
+    "get_forecast": ToolPolicy(max_concurrency=16, weight=2.0),
+    "get_forecast_summary": ToolPolicy(max_concurrency=4, weight=1.0),
+    "geocode": ToolPolicy(max_concurrency=32, weight=4.0),
+}
+# Calls to names without a policy are scheduled and counted together
+UNKNOWN_TOOL_BUCKET = "(other)"
+
+
+class QueueStats:
+    """Queue time of one tool's calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.queued = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, wait: float, queued: bool) -> None:
+        self.calls += 1
+        self.queued += queued
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "queued": self.queued,
+            "wait_mean_ms": round(self.wait_total / self.calls * 1000, 3) if self.calls else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+        }
+
+
+class ToolScheduler:
+    """Admits tool calls under per-tool limits and a shared capacity.
+
+    A call runs at once if its tool is below `max_concurrency` and a slot
+    is free. Otherwise it waits in its tool's FIFO queue; each freed slot
+    goes to the runnable queue with the earliest virtual start time
+    (start-time fair queuing). Every call moves its tool's virtual time on
+    by 1/weight, so tools with calls waiting split the slots by weight at
+    any capacity, and a flood of slow calls to one tool cannot starve the
+    others. Names without a policy share one queue and one set of stats.
+    """
+
+    def __init__(self, policies: dict[str, ToolPolicy] | None = None, capacity: int = TOOL_CONCURRENCY):
+        self.policies = TOOL_POLICIES if policies is None else policies
+        self.capacity = capacity
+        self.running = 0
+        self.running_by_tool: Counter[str] = Counter()
+        self.waiting: dict[str, deque[anyio.Event]] = defaultdict(deque)
+        # Virtual start time of each tool's next call
+        self.virtual_time: dict[str, float] = defaultdict(float)
+        # Virtual start time of the call admitted last
+        self.system_time = 0.0
+        self.stats: dict[str, QueueStats] = defaultdict(QueueStats)
+
+    def key(self, name: str) -> str:
+        return name if name in self.policies else UNKNOWN_TOOL_BUCKET
+
+    def policy(self, name: str) -> ToolPolicy:
+        return self.policies.get(name) or ToolPolicy()
+
+    def runnable(self, name: str) -> bool:
+        return self.running_by_tool[name] < self.policy(name).max_concurrency
+
+    def start(self, name: str) -> None:
+        self.system_time = self.virtual_time[name]
+        self.virtual_time[name] += 1 / self.policy(name).weight
+        self.running += 1
+        self.running_by_tool[name] += 1
+
+    def release(self, name: str) -> None:
+        self.running -= 1
+        self.running_by_tool[name] -= 1
+        while self.running < self.capacity:
+            ready = [tool for tool, queue in self.waiting.items() if queue and self.runnable(tool)]
+            if not ready:
+                break
+            tool = min(ready, key=self.virtual_time.__getitem__)
+            self.start(tool)
+            self.waiting[tool].popleft().set()
+
+    @asynccontextmanager
+    async def slot(self, name: str) -> AsyncIterator[None]:
+        name = self.key(name)
+        if not self.running_by_tool[name] and not self.waiting[name]:
+            # A tool coming back from idle does not get to spend the credit it saved
+            self.virtual_time[name] = max(self.virtual_time[name], self.system_time)
+        queued_at = time.monotonic()
+        queued = bool(self.waiting[name]) or self.running >= self.capacity or not self.runnable(name)
+        if queued:
+            admitted = anyio.Event()
+            self.waiting[name].append(admitted)
+            try:
+                await admitted.wait()
+            except BaseException:
+                if admitted.is_set():
+                    # Cancelled right after being admitted, pass the slot on
+                    self.release(name)
+                else:
+                    self.waiting[name].remove(admitted)
+                raise
+        else:
+            self.start(name)
+        self.stats[name].record(time.monotonic() - queued_at, queued)
+        try:
+            yield
+        finally:
+            self.release(name)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "running": self.running,
+            "tools": {
+                name: {
+                    **stats.as_dict(),
+                    "running": self.running_by_tool[name],
+                    "waiting": len(self.waiting[name]),
+                }
+                for name, stats in self.stats.items()
+            },
+        }
@@ -0,0 +1,69 @@
+"""Server-side filtering and ranking of NWS alerts.
+
+get_alerts narrows the alerts of a state with an `AlertFilter` before they
+are rendered, and `sort_alerts` puts the most severe, soonest first, so a
+`limit` keeps the alerts that matter most.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Sequence
+
+SEVERITY_RANK = {"Extreme": 4, "Severe": 3, "Moderate": 2, "Minor": 1, "Unknown": 0}
+URGENCIES = ("Immediate", "Expected", "Future", "Past", "Unknown")
+
+
+def alert_time(value: str | None) -> float | None:
+    """Unix time of an ISO 8601 timestamp, read as UTC when it has no offset."""
+    if not value:
+        return None
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+@dataclass
+class AlertFilter:
+    """Which alerts get_alerts keeps; every criterion left as None matches all."""
+
+    severity: str | None = None
+    event: str | None = None
+    urgency: Sequence[str] | None = None
+    since: str | None = None
+
+    def __post_init__(self):
+        if self.severity is not None and self.severity not in SEVERITY_RANK:
+            raise ValueError(f"Unknown severity: {self.severity}")
+        if isinstance(self.urgency, str):
+            self.urgency = [self.urgency]
+        self.since_time = alert_time(self.since)
+
+    def matches(self, props: dict) -> bool:
+        if self.severity is not None:
+            if SEVERITY_RANK.get(props.get("severity"), 0) < SEVERITY_RANK[self.severity]:
+                return False
+        if self.event is not None and self.event.lower() not in (props.get("event") or "").lower():
+            return False
+        if self.urgency and props.get("urgency") not in self.urgency:
+            return False
+        if self.since_time is not None:
+            sent = alert_time(props.get("sent"))
+            if sent is None or sent < self.since_time:
+                return False
+        return True
+
+    def apply(self, features: list[dict]) -> list[dict]:
+        return [feature for feature in features if self.matches(feature["properties"])]
+
+
+def sort_alerts(features: list[dict]) -> list[dict]:
+    """Most severe first, then the ones starting soonest."""
+
+    def key(feature: dict) -> tuple[int, float]:
+        props = feature["properties"]
+        onset = alert_time(props.get("onset") or props.get("effective"))
+        return -SEVERITY_RANK.get(props.get("severity"), 0), math.inf if onset is None else onset
+
+    return sorted(features, key=key)
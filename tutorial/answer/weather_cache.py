@@ -0,0 +1,113 @@
+"""Response caching and upstream rate limiting for the weather servers.
+
+Both servers keep decoded NWS responses in one `ResponseCache` per process,
+so every session and transport shares it. How long a response stays fresh
+depends on the endpoint, see `cache_ttl`. `RateLimiter` keeps the upstream
+request rate within what the NWS asks of API clients.
+"""
+
+import json
+import time
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Any
+
+import anyio
+
+UPSTREAM_RATE = 10.0  # requests per second
+UPSTREAM_BURST = 20
+ALERT_POLL_INTERVAL = 60.0
+CACHE_MAX_ENTRIES = 1024
+WARMUP_TOP_KEYS = 32
+
+
+def cache_ttl(url: str) -> float:
+    """How long a response stays fresh, by NWS endpoint."""
+    if "/points/" in url:
+        # Grid mappings practically never change
+        return 24 * 60 * 60
+    if "/alerts/" in url:
+        return ALERT_POLL_INTERVAL
+    return 15 * 60
+
+
+class ResponseCache:
+    """LRU cache of decoded NWS responses keyed by url, with per-endpoint TTLs.
+
+    It also counts how often each url is asked for, so the hottest keys can be
+    saved at shutdown and prefetched on the next start. The counts decay
+    whenever more than `max_uses` urls are tracked, which keeps them bounded
+    when every request asks for a new url.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_uses: int | None = None):
+        self.max_entries = max_entries
+        self.max_uses = max_uses or 4 * max_entries
+        # url -> (expires at, data)
+        self.entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self.uses: Counter[str] = Counter()
+
+    def get(self, url: str) -> dict[str, Any] | None:
+        self.uses[url] += 1
+        if len(self.uses) > self.max_uses:
+            self.decay_uses()
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if time.monotonic() > expires_at:
+            del self.entries[url]
+            return None
+        self.entries.move_to_end(url)
+        return data
+
+    def put(self, url: str, data: dict[str, Any]) -> None:
+        self.entries[url] = (time.monotonic() + cache_ttl(url), data)
+        self.entries.move_to_end(url)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def decay_uses(self) -> None:
+        """Halve every count, forgetting the urls asked for only once since the last decay."""
+        self.uses = Counter({url: count // 2 for url, count in self.uses.items() if count > 1})
+
+    def top_keys(self, count: int = WARMUP_TOP_KEYS) -> list[str]:
+        return [url for url, _ in self.uses.most_common(count)]
+
+    def save_keys(self, path: Path, count: int = WARMUP_TOP_KEYS) -> None:
+        keys = self.top_keys(count)
+        if keys:
+            path.write_text(json.dumps(keys))
+
+    @staticmethod
+    def load_keys(path: Path, base: str) -> list[str]:
+        """Keys saved by `save_keys`, keeping only urls of the upstream at `base`."""
+        try:
+            keys = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return []
+        return [key for key in keys if isinstance(key, str) and key.startswith(base)]
+
+
+class RateLimiter:
+    """Token bucket keeping us a polite client of the NWS API."""
+
+    def __init__(self, rate: float = UPSTREAM_RATE, burst: int = UPSTREAM_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await anyio.sleep((1 - self.tokens) / self.rate)
+
+    def release(self) -> None:
+        """Give back a token whose request was abandoned before it was sent."""
+        self.tokens = min(self.burst, self.tokens + 1)
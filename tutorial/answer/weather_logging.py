@@ -0,0 +1,219 @@
+"""Structured, non-blocking logging for the weather servers.
+
+stdout belongs to JSON-RPC on the stdio transport, so nothing here ever
+writes to it. Records are put on a queue by the calling code, which costs
+no I/O on the event loop, and a background listener thread formats and
+writes them to stderr or a file:
+
+    listener = setup_logging("INFO", levels={"weather.upstream": "DEBUG"})
+    logging.getLogger("weather.upstream").warning("request failed", extra={"url": url})
+
+`ClientLogHandler` additionally forwards records logged while serving an
+MCP request to that request's client as `notifications/message`, without
+the tool awaiting the send, once the client has asked for them.
+"""
+
+import asyncio
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Iterator
+
+REPEAT_INTERVAL = 60.0
+CLIENT_LOG_BACKLOG = 1000
+# Attributes every LogRecord has; anything else was passed through `extra`
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+# logging level -> MCP LoggingLevel
+MCP_LEVELS = {
+    logging.DEBUG: "debug",
+    logging.INFO: "info",
+    logging.WARNING: "warning",
+    logging.ERROR: "error",
+    logging.CRITICAL: "critical",
+}
+MCP_LEVEL_NUMBERS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "notice": logging.INFO + 5,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+    "alert": logging.CRITICAL + 5,
+    "emergency": logging.CRITICAL + 10,
+}
+
+
+def record_fields(record: logging.LogRecord) -> dict[str, Any]:
+    """The `extra` fields of a record."""
+    return {key: value for key, value in vars(record).items() if key not in RECORD_ATTRIBUTES}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **record_fields(record),
+        }
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with the extra fields appended as key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = " ".join(f"{key}={value}" for key, value in record_fields(record).items())
+        return f"{line} {fields}" if fields else line
+
+
+class RepeatFilter(logging.Filter):
+    """Lets a repeated warning or error through once per `interval`.
+
+    Records repeat when logger, level and unformatted message match, so an
+    outage producing the same failure for every URL logs one line a minute,
+    annotated with how many were suppressed since the previous one.
+    """
+
+    def __init__(self, interval: float = REPEAT_INTERVAL):
+        super().__init__()
+        self.interval = interval
+        # key -> (last time let through, suppressed since)
+        self.seen: dict[tuple, tuple[float, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        last, suppressed = self.seen.get(key, (None, 0))
+        if last is not None and now - last < self.interval:
+            self.seen[key] = (last, suppressed + 1)
+            return False
+        if suppressed:
+            record.suppressed = suppressed
+        self.seen[key] = (now, 0)
+        return True
+
+
+class ClientLogHandler(logging.Handler):
+    """Forwards records to the MCP client whose request produced them.
+
+    `bind(session)` marks the current task as serving that session; records
+    logged inside it are queued, and `run()` sends them from its own task,
+    so a slow or stalled client never holds up the tool that logged.
+    Nothing is sent to a session until its client picks a level with
+    logging/setLevel, see `set_level`, so clients that never ask for logs
+    get no notification traffic.
+    """
+
+    def __init__(self, backlog: int = CLIENT_LOG_BACKLOG):
+        super().__init__()
+        self.session: ContextVar[Any] = ContextVar("client_log_session", default=None)
+        self.levels: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        # Oldest records are dropped once a stalled client lets this fill up
+        self.pending: deque[tuple[Any, str, str, Any]] = deque(maxlen=backlog)
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.loop_thread: int | None = None
+        self.ready: asyncio.Event | None = None
+
+    @contextmanager
+    def bind(self, session) -> Iterator[None]:
+        token = self.session.set(session)
+        try:
+            yield
+        finally:
+            self.session.reset(token)
+
+    def set_level(self, session, level: str) -> None:
+        self.levels[session] = MCP_LEVEL_NUMBERS.get(level, logging.INFO)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        session = self.session.get()
+        if session is None or self.loop is None:
+            return
+        level = self.levels.get(session)
+        if level is None or record.levelno < level:
+            return
+        data = {"msg": record.getMessage(), **record_fields(record)}
+        item = (session, MCP_LEVELS.get(record.levelno, "info"), record.name, data)
+        if threading.get_ident() == self.loop_thread:
+            self.push(item)
+        else:
+            # Logged from a worker thread, hand the record to the loop
+            self.loop.call_soon_threadsafe(self.push, item)
+
+    def push(self, item) -> None:
+        self.pending.append(item)
+        self.ready.set()
+
+    async def run(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.ready = asyncio.Event()
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            while self.pending:
+                session, level, name, data = self.pending.popleft()
+                try:
+                    await session.send_log_message(level=level, data=data, logger=name)
+                except Exception:
+                    pass  # the session is gone, logging about it would recurse
+
+
+def setup_logging(
+    level: str = "INFO",
+    file: Path | None = None,
+    levels: dict[str, str] | None = None,
+    json_format: bool = True,
+    repeat_interval: float = REPEAT_INTERVAL,
+) -> logging.handlers.QueueListener:
+    """Route all logging through a queue to stderr or `file`.
+
+    `levels` sets per-logger levels, e.g. {"httpx": "WARNING"}. The caller
+    stops the returned listener on exit to flush what is still queued.
+    """
+    output = logging.FileHandler(file) if file is not None else logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if json_format else TextFormatter())
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    handler.addFilter(RepeatFilter(repeat_interval))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    # mcp logs every request at INFO, httpx every upstream call
+    defaults = {"mcp": "WARNING", "httpx": "WARNING", "httpcore": "WARNING"}
+    for name, module_level in {**defaults, **(levels or {})}.items():
+        logging.getLogger(name).setLevel(module_level.upper())
+
+    listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def parse_module_level(value: str) -> tuple[str, str]:
+    """NAME=LEVEL, e.g. weather.upstream=DEBUG"""
+    name, _, level = value.partition("=")
+    if not name or not isinstance(logging.getLevelName(level.upper()), int):
+        raise ValueError(f"Expected NAME=LEVEL, got {value}")
+    return name, level.upper()
@@ -0,0 +1,65 @@
+"""Output modes shared by the weather servers' tools.
+
+Every tool takes an `output` argument. "text" is the readable prose the
+tools always returned; "json" and "compact" keep only the essential fields
+of each item, see `ALERT_FIELDS` and `PERIOD_FIELDS`, and render them with
+`render_structured`.
+"""
+
+import json
+from typing import Any
+
+OUTPUT_MODES = ("text", "json", "compact")
+ALERT_FIELDS = ("event", "severity", "urgency", "areaDesc", "onset", "expires", "headline")
+PERIOD_FIELDS = (
+    "name",
+    "temperature",
+    "temperatureUnit",
+    "windSpeed",
+    "windDirection",
+    "shortForecast",
+)
+
+
+def alert_summary(feature: dict) -> dict:
+    """Keep only the essential fields of an alert feature."""
+    props = feature["properties"]
+    return {field: props.get(field) for field in ALERT_FIELDS}
+
+
+def period_summary(period: dict) -> dict:
+    """Keep only the essential fields of a forecast period."""
+    return {field: period.get(field) for field in PERIOD_FIELDS}
+
+
+def render_structured(
+    key: str, items: list[dict], output: str, next_cursor: str | None = None
+) -> str:
+    """Render summaries as minified JSON, or as a header row plus one row per item.
+
+    The compact form is pipe separated and repeats no field names, which is the
+    cheapest shape for an LLM to read.
+    """
+    if output not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode: {output}")
+    if output == "json":
+        payload: dict[str, Any] = {key: items}
+        if next_cursor:
+            payload["next_cursor"] = next_cursor
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+    if not items:
+        # A non-empty answer, so an empty result is not mistaken for a failed call
+        rows = [f"no {key}"]
+        if next_cursor:
+            rows.append(f"next_cursor:{next_cursor}")
+        return "\n".join(rows)
+    fields = list(items[0])
+    rows = ["|".join(fields)]
+    rows.extend(
+        "|".join("" if item[field] is None else str(item[field]) for field in fields)
+        for item in items
+    )
+    if next_cursor:
+        rows.append(f"next_cursor:{next_cursor}")
+    return "\n".join(rows)
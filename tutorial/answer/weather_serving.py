@@ -0,0 +1,61 @@
+"""HTTP serving profiles of the uvicorn transports.
+
+"default" is what the tutorial uses. "production" turns off debug pages
+and the access log, raises uvicorn's connection limits and, when they are
+installed, serves with httptools on a uvloop event loop.
+"""
+
+from typing import Any
+
+SERVING_PROFILES: dict[str, dict[str, Any]] = {
+    # What the tutorial uses: tracebacks in responses, access log on
+    "default": {"debug": True, "uvicorn": {}},
+    "production": {
+        "debug": False,
+        "uvicorn": {
+            "access_log": False,
+            "log_level": "warning",
+            "timeout_keep_alive": 30,
+            "backlog": 4096,
+            # SSE streams are long lived and count against this limit too
+            "limit_concurrency": 2048,
+        },
+    },
+}
+
+
+def module_available(name: str) -> bool:
+    import importlib.util
+
+    return importlib.util.find_spec(name) is not None
+
+
+def uvicorn_options(serving_profile: str) -> dict[str, Any]:
+    """uvicorn.Config keyword arguments for a serving profile."""
+    options = dict(SERVING_PROFILES[serving_profile]["uvicorn"])
+    if serving_profile == "production" and module_available("httptools"):
+        options["http"] = "httptools"
+    return options
+
+
+def event_loop(serving_profile: str) -> str:
+    """The event loop a serving profile runs on, uvloop when production can have it."""
+    if serving_profile == "production" and module_available("uvloop"):
+        return "uvloop"
+    return "asyncio"
+
+
+def run_with_profile(main_coroutine, serving_profile: str = "default") -> None:
+    """Run the server on uvloop for the production profile when it is installed.
+
+    uvicorn's own `loop` option only applies to uvicorn.run(), and we serve
+    from an event loop we already own, so the loop is picked here.
+    """
+    import asyncio
+
+    if event_loop(serving_profile) == "uvloop":
+        import uvloop
+
+        uvloop.run(main_coroutine)
+    else:
+        asyncio.run(main_coroutine)
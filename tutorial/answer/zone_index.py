@@ -0,0 +1,242 @@
+"""Offline spatial index over NWS forecast and county zone polygons.
+
+The index is a single binary file that is memory-mapped at startup, so
+resolving a latitude/longitude to its UGC zone codes (e.g. CAZ006, CAC075)
+is a local lookup with no upstream call.
+
+Build it once from GeoJSON exports of the NWS zone shapefiles
+(https://www.weather.gov/gis/PublicZones, https://www.weather.gov/gis/Counties),
+for example converted with `ogr2ogr -f GeoJSON z_05mr24.json z_05mr24.shp`:
+
+    python zone_index.py build z_05mr24.json c_05mr24.json -o zones.idx
+    python zone_index.py lookup zones.idx 38.8898 -77.009056
+"""
+
+import json
+import math
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Iterator
+
+MAGIC = b"NWSZ"
+VERSION = 1
+DEFAULT_CELL_SIZE = 0.25  # degrees
+ZONE_ID_SIZE = 8
+
+# magic, version, cell size, min lon, min lat, columns, rows, zones, rings,
+# vertices, grid entries
+HEADER = struct.Struct("<4sIdddIIIIII")
+# zone id, bbox (min lon, min lat, max lon, max lat), first ring, ring count
+ZONE = struct.Struct(f"<{ZONE_ID_SIZE}s4fII")
+# first vertex, vertex count
+RING = struct.Struct("<II")
+
+
+def zone_id(properties: dict) -> str | None:
+    """UGC code of a zone feature from an NWS shapefile or API export."""
+    if properties.get("id"):
+        return properties["id"]
+    state = properties.get("STATE")
+    if state and properties.get("ZONE"):
+        return f"{state}Z{properties['ZONE']}"
+    if state and properties.get("FIPS"):
+        return f"{state}C{str(properties['FIPS'])[-3:]}"
+    return None
+
+
+def polygon_rings(geometry: dict) -> Iterator[list[list[float]]]:
+    if geometry["type"] == "Polygon":
+        yield from geometry["coordinates"]
+    elif geometry["type"] == "MultiPolygon":
+        for polygon in geometry["coordinates"]:
+            yield from polygon
+
+
+def build(sources: list[Path], output: Path, cell_size: float = DEFAULT_CELL_SIZE) -> int:
+    """Write the index for every zone polygon in `sources`, returning the zone count."""
+    zones: list[tuple[str, list[list[list[float]]]]] = []
+    for source in sources:
+        collection = json.loads(Path(source).read_text())
+        for feature in collection["features"]:
+            ugc = zone_id(feature.get("properties") or {})
+            if ugc and feature.get("geometry"):
+                zones.append((ugc, list(polygon_rings(feature["geometry"]))))
+    if not zones:
+        raise ValueError("No zone polygons found")
+
+    min_lon = math.floor(min(x for _, rings in zones for ring in rings for x, _ in ring))
+    min_lat = math.floor(min(y for _, rings in zones for ring in rings for _, y in ring))
+    max_lon = math.ceil(max(x for _, rings in zones for ring in rings for x, _ in ring))
+    max_lat = math.ceil(max(y for _, rings in zones for ring in rings for _, y in ring))
+    columns = max(1, math.ceil((max_lon - min_lon) / cell_size))
+    rows = max(1, math.ceil((max_lat - min_lat) / cell_size))
+
+    zone_table = bytearray()
+    ring_table = bytearray()
+    vertices = bytearray()
+    cells: list[list[int]] = [[] for _ in range(columns * rows)]
+    ring_count = vertex_count = 0
+    for index, (ugc, rings) in enumerate(zones):
+        xs = [x for ring in rings for x, _ in ring]
+        ys = [y for ring in rings for _, y in ring]
+        bbox = (min(xs), min(ys), max(xs), max(ys))
+        zone_table += ZONE.pack(ugc.encode("ascii"), *bbox, ring_count, len(rings))
+        for ring in rings:
+            ring_table += RING.pack(vertex_count, len(ring))
+            vertices += struct.pack(f"<{len(ring) * 2}f", *(c for point in ring for c in point[:2]))
+            vertex_count += len(ring)
+        ring_count += len(rings)
+
+        first_col = int((bbox[0] - min_lon) / cell_size)
+        last_col = min(columns - 1, int((bbox[2] - min_lon) / cell_size))
+        first_row = int((bbox[1] - min_lat) / cell_size)
+        last_row = min(rows - 1, int((bbox[3] - min_lat) / cell_size))
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                cells[row * columns + col].append(index)
+
+    # CSR layout: cell i owns entries[offsets[i]:offsets[i + 1]]
+    offsets = [0]
+    for cell in cells:
+        offsets.append(offsets[-1] + len(cell))
+    entries = [index for cell in cells for index in cell]
+
+    tmp = Path(output).with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                cell_size,
+                min_lon,
+                min_lat,
+                columns,
+                rows,
+                len(zones),
+                ring_count,
+                vertex_count,
+                len(entries),
+            )
+        )
+        f.write(zone_table)
+        f.write(ring_table)
+        f.write(vertices)
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(struct.pack(f"<{len(entries)}I", *entries))
+    # Readers keep their old mapping until they reopen, never a torn file
+    os.replace(tmp, output)
+    return len(zones)
+
+
+class ZoneIndex:
+    """Read-only, memory-mapped view of an index written by `build`.
+
+    Nothing is parsed up front; each lookup only touches the pages of the
+    grid cell, the candidate zones and their vertices.
+    """
+
+    def __init__(self, path: Path | str):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            self.cell_size,
+            self.min_lon,
+            self.min_lat,
+            self.columns,
+            self.rows,
+            self.zone_count,
+            ring_count,
+            vertex_count,
+            entry_count,
+        ) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not a zone index: {path}")
+
+        view = memoryview(self._mmap)
+        self._zones_at = HEADER.size
+        self._rings_at = self._zones_at + self.zone_count * ZONE.size
+        vertices_at = self._rings_at + ring_count * RING.size
+        offsets_at = vertices_at + vertex_count * 8
+        entries_at = offsets_at + (self.columns * self.rows + 1) * 4
+        self._vertices = view[vertices_at:offsets_at].cast("f")
+        self._offsets = view[offsets_at:entries_at].cast("I")
+        self._entries = view[entries_at : entries_at + entry_count * 4].cast("I")
+
+    def close(self) -> None:
+        for name in ("_vertices", "_offsets", "_entries"):
+            if hasattr(self, name):
+                getattr(self, name).release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "ZoneIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _contains(self, first_ring: int, ring_count: int, lon: float, lat: float) -> bool:
+        """Even-odd test over all rings, which handles holes and multipolygons."""
+        inside = False
+        vertices = self._vertices
+        for ring in range(first_ring, first_ring + ring_count):
+            start, count = RING.unpack_from(self._mmap, self._rings_at + ring * RING.size)
+            j = start + count - 1
+            for i in range(start, start + count):
+                xi, yi = vertices[2 * i], vertices[2 * i + 1]
+                xj, yj = vertices[2 * j], vertices[2 * j + 1]
+                if (yi > lat) != (yj > lat) and lon < (xj - xi) * (lat - yi) / (yj - yi) + xi:
+                    inside = not inside
+                j = i
+        return inside
+
+    def lookup(self, latitude: float, longitude: float) -> list[str]:
+        """UGC codes of every zone containing the point."""
+        col = int((longitude - self.min_lon) / self.cell_size)
+        row = int((latitude - self.min_lat) / self.cell_size)
+        if not (0 <= col < self.columns and 0 <= row < self.rows):
+            return []
+        cell = row * self.columns + col
+        matches = []
+        for position in range(self._offsets[cell], self._offsets[cell + 1]):
+            index = self._entries[position]
+            ugc, x0, y0, x1, y1, first_ring, ring_count = ZONE.unpack_from(
+                self._mmap, self._zones_at + index * ZONE.size
+            )
+            if not (x0 <= longitude <= x1 and y0 <= latitude <= y1):
+                continue
+            if self._contains(first_ring, ring_count, longitude, latitude):
+                matches.append(ugc.rstrip(b"\0").decode("ascii"))
+        return matches
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or query the NWS zone index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="Build an index from zone GeoJSON files")
+    build_parser.add_argument("sources", nargs="+", type=Path, help="Zone GeoJSON files")
+    build_parser.add_argument("-o", "--output", type=Path, default=Path("zones.idx"))
+    build_parser.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE, help="Grid cell size in degrees")
+    lookup_parser = commands.add_parser("lookup", help="Print the zones containing a point")
+    lookup_parser.add_argument("index", type=Path)
+    lookup_parser.add_argument("latitude", type=float)
+    lookup_parser.add_argument("longitude", type=float)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build(args.sources, args.output, args.cell_size)
+        print(f"Indexed {count} zones into {args.output}")
+    else:
+        with ZoneIndex(args.index) as index:
+            print(" ".join(index.lookup(args.latitude, args.longitude)))
+
+
+if __name__ == "__main__":
+    main()
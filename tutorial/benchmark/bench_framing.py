@@ -0,0 +1,151 @@
+"""Microbenchmark of stdio framing: the SDK's stdio_server against fast_stdio.
+
+Runs each transport in-process over a pair of OS pipes with a trivial
+echo server on top, so only the transport's own work is measured: reading
+and splitting stdin, parsing every request, serializing every reply and
+writing it out. A feeder thread writes tools/call requests keeping at most
+`--depth` without a reply; `--depth 1` is a host waiting for every answer,
+larger depths a host pipelining many calls.
+
+    python bench_framing.py --messages 20000 --depth 1
+    python bench_framing.py --messages 20000 --depth 64 --output framing.json
+
+CPU time is the whole process', including the feeder and reader threads,
+which do the same work for both transports.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from io import TextIOWrapper
+from pathlib import Path
+from typing import Any
+
+import anyio
+import anyio.to_thread
+import mcp.types as types
+from mcp.server.stdio import stdio_server as sdk_stdio_server
+from mcp.shared.message import SessionMessage
+
+from harness import ANSWER_DIR, write_report
+
+sys.path.insert(0, str(ANSWER_DIR))
+from fast_stdio import stdio_server as fast_stdio_server  # noqa: E402
+
+FRAMINGS = ("default", "fast")
+# Roughly the size of a formatted five period forecast
+REPLY_TEXT = "Tonight: Mostly clear, with a low around 45. West wind around 5 mph.\n" * 20
+
+
+def request_line(message_id: int) -> bytes:
+    message = {
+        "jsonrpc": "2.0",
+        "id": message_id,
+        "method": "tools/call",
+        "params": {"name": "get_forecast", "arguments": {"latitude": 38.8898, "longitude": -77.0091}},
+    }
+    return json.dumps(message).encode() + b"\n"
+
+
+def reply(request: types.JSONRPCRequest) -> types.JSONRPCMessage:
+    result = {"content": [{"type": "text", "text": REPLY_TEXT}], "isError": False}
+    return types.JSONRPCMessage(types.JSONRPCResponse(jsonrpc="2.0", id=request.id, result=result))
+
+
+def open_transport(framing: str, stdin_fd: int, stdout_fd: int):
+    if framing == "fast":
+        return fast_stdio_server(
+            open(stdin_fd, "rb", buffering=0, closefd=False),
+            open(stdout_fd, "wb", buffering=0, closefd=False),
+        )
+    # What stdio_server builds around sys.stdin and sys.stdout by itself
+    return sdk_stdio_server(
+        anyio.wrap_file(TextIOWrapper(open(stdin_fd, "rb", closefd=False), encoding="utf-8")),
+        anyio.wrap_file(TextIOWrapper(open(stdout_fd, "wb", closefd=False), encoding="utf-8")),
+    )
+
+
+async def run_framing(framing: str, messages: int, depth: int) -> dict[str, Any]:
+    """Push `messages` requests through one transport and time it."""
+    stdin_read, stdin_write = os.pipe()
+    stdout_read, stdout_write = os.pipe()
+    in_flight = threading.Semaphore(depth)
+    lines = [request_line(message_id) for message_id in range(messages)]
+
+    def feed() -> None:
+        for line in lines:
+            in_flight.acquire()
+            os.write(stdin_write, line)
+        os.close(stdin_write)
+
+    def drain() -> None:
+        replies = 0
+        while replies < messages:
+            chunk = os.read(stdout_read, 1 << 16)
+            if not chunk:
+                break
+            for _ in range(chunk.count(b"\n")):
+                replies += 1
+                in_flight.release()
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    drainer = threading.Thread(target=drain, daemon=True)
+    errors = handled = 0
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+    feeder.start()
+    drainer.start()
+    async with open_transport(framing, stdin_read, stdout_write) as (read_stream, write_stream):
+        async for message in read_stream:
+            if isinstance(message, Exception):
+                errors += 1
+                continue
+            await write_stream.send(SessionMessage(reply(message.message.root)))
+            handled += 1
+            if handled + errors == messages:
+                break
+        await anyio.to_thread.run_sync(drainer.join)
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu_before
+        # The transport's reader is at EOF by now, closing ends its writer
+        await write_stream.aclose()
+    for fd in (stdin_read, stdout_read, stdout_write):
+        os.close(fd)
+
+    return {
+        "framing": framing,
+        "messages": handled,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "messages_per_s": round(handled / elapsed, 1) if elapsed else 0.0,
+        "cpu_per_message_us": round(cpu / handled * 1e6, 2) if handled else None,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare the SDK's stdio framing with fast_stdio")
+    parser.add_argument("--messages", type=int, default=20000, help="Requests per transport")
+    parser.add_argument("--warmup", type=int, default=1000, help="Unmeasured requests per transport, sent first")
+    parser.add_argument("--depth", type=int, default=1, help="Requests in flight without a reply")
+    parser.add_argument("--framing", action="append", choices=FRAMINGS, help="Transport to run, repeatable, default both")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    results = []
+    for framing in args.framing or FRAMINGS:
+        anyio.run(run_framing, framing, args.warmup, args.depth)
+        results.append(anyio.run(run_framing, framing, args.messages, args.depth))
+    report = {
+        "benchmark": "bench_framing",
+        "config": {"messages": args.messages, "warmup": args.warmup, "depth": args.depth},
+        "framings": results,
+    }
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Benchmark matrix: the same workload across implementation × transport.
+
+Cells:
+
+    implement_weather  low-level Server             stdio
+    implement_sse      low-level Server + SSE       stdio, sse
+    fastmcp_weather    FastMCP                      stdio, sse
+
+Every cell starts its server fresh against the same NWS stub and runs the
+same seeded sequence of get_forecast/get_alerts calls, the tools all three
+implement. Per cell we record startup time (spawn until an initialized MCP
+session), per-call latency and server CPU per call, and RSS after startup
+and at the end.
+
+    python bench_matrix.py --calls 500 --concurrency 4 --output matrix.json
+    python bench_matrix.py --only implement_sse:sse --only fastmcp_weather:sse
+"""
+
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+import anyio
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+from bench_stdio import SERVERS as STDIO_SERVERS, StdioDriver
+from harness import (
+    ANSWER_DIR,
+    Workload,
+    cpu_seconds,
+    latency_summary,
+    parse_mix,
+    rss_bytes,
+    server_environment,
+    start_server,
+    stop_server,
+    write_report,
+)
+from nws_stub import DEFAULT_PORT as STUB_PORT, running_stub
+
+MATRIX_MIX = "get_forecast=1,get_alerts=1"
+SSE_SERVERS = {
+    "implement_sse": ANSWER_DIR / "implement_sse.py",
+    "fastmcp_weather": ANSWER_DIR / "fastmcp_weather.py",
+}
+CELLS = [
+    ("implement_weather", "stdio"),
+    ("implement_sse", "stdio"),
+    ("implement_sse", "sse"),
+    ("fastmcp_weather", "stdio"),
+    ("fastmcp_weather", "sse"),
+]
+
+
+def cell_result(
+    startup: float,
+    latencies: list[float],
+    errors: int,
+    elapsed: float,
+    cpu: float | None,
+    rss_started: int | None,
+    rss_end: int | None,
+) -> dict[str, Any]:
+    calls = len(latencies)
+    return {
+        "startup_s": round(startup, 3),
+        "calls": calls,
+        "errors": errors,
+        "calls_per_s": round(calls / elapsed, 2) if elapsed else 0.0,
+        "latency": latency_summary(latencies),
+        "cpu_per_call_us": round(cpu / calls * 1e6, 2) if cpu is not None and calls else None,
+        "rss_started_bytes": rss_started,
+        "rss_end_bytes": rss_end,
+    }
+
+
+@asynccontextmanager
+async def sse_session(url: str, process: subprocess.Popen, timeout: float) -> AsyncIterator[ClientSession]:
+    """An initialized session, retrying the connection until the server listens."""
+    deadline = time.monotonic() + timeout
+    async with AsyncExitStack() as stack:
+        while True:
+            try:
+                streams = await stack.enter_async_context(sse_client(url))
+                break
+            except Exception:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise
+                await anyio.sleep(0.05)
+        session = await stack.enter_async_context(ClientSession(*streams))
+        await session.initialize()
+        yield session
+
+
+async def run_stdio_cell(implementation: str, nws_base: str, workdir: Path, args) -> dict[str, Any]:
+    script, server_args = STDIO_SERVERS[implementation]
+    if implementation == "implement_sse":
+        server_args = [*server_args, "--cache-keys", str(workdir / "cache_keys.json")]
+    workload = Workload(parse_mix(MATRIX_MIX), args.seed)
+
+    started = time.perf_counter()
+    process = await anyio.open_process(
+        [sys.executable, str(script), *server_args],
+        env=server_environment(nws_base, workdir),
+        cwd=workdir,
+        stderr=subprocess.DEVNULL,
+    )
+    driver = StdioDriver(process)
+    async with process, anyio.create_task_group() as tg:
+        tg.start_soon(driver.read_replies)
+        with anyio.fail_after(args.timeout):
+            await driver.handshake()
+            startup = time.perf_counter() - started
+            rss_started = rss_bytes(process.pid)
+            await driver.pipeline(workload, 1, args.warmup, args.concurrency)
+        driver.reset()
+
+        cpu_before = cpu_seconds(process.pid)
+        began = time.perf_counter()
+        with anyio.fail_after(args.timeout):
+            await driver.pipeline(workload, 1 + args.warmup, args.calls, args.concurrency)
+        elapsed = time.perf_counter() - began
+        cpu_after = cpu_seconds(process.pid)
+        rss_end = rss_bytes(process.pid)
+
+        await process.stdin.aclose()
+        tg.cancel_scope.cancel()
+
+    latencies = [latency for values in driver.latencies.values() for latency in values]
+    cpu = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+    return cell_result(
+        startup, latencies, sum(driver.errors.values()), elapsed, cpu, rss_started, rss_end
+    )
+
+
+async def run_sse_cell(implementation: str, nws_base: str, workdir: Path, args) -> dict[str, Any]:
+    server_args = ["--transport", "sse", "--port", str(args.port)]
+    if implementation == "implement_sse":
+        server_args += ["--cache-keys", str(workdir / "cache_keys.json")]
+    workload = Workload(parse_mix(MATRIX_MIX), args.seed)
+    url = f"http://127.0.0.1:{args.port}/sse"
+
+    started = time.perf_counter()
+    process = start_server(
+        SSE_SERVERS[implementation], server_args, server_environment(nws_base, workdir), workdir
+    )
+    try:
+        async with sse_session(url, process, args.timeout) as session:
+            startup = time.perf_counter() - started
+            rss_started = rss_bytes(process.pid)
+            latencies: list[float] = []
+            errors = 0
+            slots = anyio.Semaphore(args.concurrency)
+
+            async def call(name: str, arguments: dict, record: bool) -> None:
+                nonlocal errors
+                sent = time.perf_counter()
+                try:
+                    failed = (await session.call_tool(name, arguments)).isError
+                except Exception:
+                    failed = True
+                finally:
+                    slots.release()
+                if record:
+                    latencies.append(time.perf_counter() - sent)
+                    errors += failed
+
+            async def run_calls(count: int, record: bool) -> None:
+                # Same in-flight limit as the stdio pipeline
+                async with anyio.create_task_group() as tg:
+                    for _ in range(count):
+                        await slots.acquire()
+                        tg.start_soon(call, *workload.next_call(), record)
+
+            with anyio.fail_after(args.timeout):
+                await run_calls(args.warmup, False)
+            cpu_before = cpu_seconds(process.pid)
+            began = time.perf_counter()
+            with anyio.fail_after(args.timeout):
+                await run_calls(args.calls, True)
+            elapsed = time.perf_counter() - began
+            cpu_after = cpu_seconds(process.pid)
+            rss_end = rss_bytes(process.pid)
+    finally:
+        stop_server(process)
+
+    cpu = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+    return cell_result(startup, latencies, errors, elapsed, cpu, rss_started, rss_end)
+
+
+def parse_cell(value: str) -> tuple[str, str]:
+    implementation, _, transport = value.partition(":")
+    if (implementation, transport) not in CELLS:
+        raise ValueError(f"Unknown cell: {value}")
+    return implementation, transport
+
+
+def format_table(cells: list[dict[str, Any]]) -> str:
+    rows = [
+        ("implementation", "transport", "startup s", "calls/s", "p50 ms", "p99 ms", "cpu/call us", "rss MiB")
+    ]
+    for cell in cells:
+        rss = cell["rss_end_bytes"]
+        rows.append(
+            (
+                cell["implementation"],
+                cell["transport"],
+                f"{cell['startup_s']:.3f}",
+                f"{cell['calls_per_s']:.1f}",
+                f"{cell['latency']['p50_ms']:.2f}",
+                f"{cell['latency']['p99_ms']:.2f}",
+                "-" if cell["cpu_per_call_us"] is None else f"{cell['cpu_per_call_us']:.0f}",
+                "-" if rss is None else f"{rss / 2**20:.1f}",
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join("  ".join(value.ljust(width) for value, width in zip(row, widths)) for row in rows)
+
+
+async def main_async(args) -> dict[str, Any]:
+    cells = []
+    with running_stub(args.stub_port, args.stub_latency / 1000) as nws_base:
+        for implementation, transport in args.only or CELLS:
+            # A fresh directory per cell, so no cell inherits another's caches
+            with tempfile.TemporaryDirectory() as tmp:
+                run_cell = run_sse_cell if transport == "sse" else run_stdio_cell
+                result = await run_cell(implementation, nws_base, Path(tmp), args)
+            cells.append({"implementation": implementation, "transport": transport, **result})
+    return {
+        "benchmark": "bench_matrix",
+        "config": {
+            "calls": args.calls,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "mix": parse_mix(MATRIX_MIX),
+            "stub_latency_ms": args.stub_latency,
+            "seed": args.seed,
+        },
+        "cells": cells,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare the answer servers across implementation and transport")
+    parser.add_argument("--calls", type=int, default=500, help="Measured tool calls per cell")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured tool calls per cell, sent first")
+    parser.add_argument("--concurrency", type=int, default=1, help="Tool calls kept in flight")
+    parser.add_argument("--only", action="append", type=parse_cell, help="Run only IMPLEMENTATION:TRANSPORT, repeatable")
+    parser.add_argument("--port", type=int, default=8000, help="Port for SSE servers under test")
+    parser.add_argument("--stub-port", type=int, default=STUB_PORT, help="Port for the NWS stub")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="Added NWS stub delay, in milliseconds")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the call sequence")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Give up after this many seconds per phase")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = anyio.run(main_async, args)
+    print(format_table(report["cells"]), file=sys.stderr)
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
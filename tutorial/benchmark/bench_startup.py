@@ -0,0 +1,204 @@
+"""Startup benchmark for the answer servers as launched by MCP hosts.
+
+Hosts spawn a stdio server when a conversation first needs it and the
+user waits until it answers `initialize`. For each server this measures:
+
+- import time: `python -X importtime` of the server module, its total and
+  its slowest direct imports, to see what startup is spent on;
+- time to initialize: spawn until the initialize response arrives, over
+  `--runs` fresh processes;
+- for servers that warm their cache at startup, time to initialize again
+  with a populated cache keys file whose urls a second stub answers only
+  after `--stall-ms`, so a handshake that waits on upstream shows up.
+
+Every median time to initialize has to stay under `--budget-ms`, otherwise
+the script exits with status 1, so it can guard against startup
+regressions:
+
+    python bench_startup.py --runs 10 --budget-ms 1500
+    python bench_startup.py --server fastmcp_weather --output startup.json
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import anyio
+
+from bench_stdio import SERVERS, StdioDriver
+from harness import POINTS, STATES, server_environment, write_report
+from nws_stub import DEFAULT_PORT as STUB_PORT, running_stub
+
+DEFAULT_BUDGET_MS = 1500.0
+# Well over the budget, so waiting on the stalled stub cannot go unnoticed
+DEFAULT_STALL_MS = 5000.0
+SLOWEST_IMPORTS = 10
+
+
+def parse_importtime(output: str, module: str) -> tuple[int | None, list[tuple[str, int]]]:
+    """Cumulative microseconds of `module` and of each of its direct imports.
+
+    -X importtime prints an import after everything it imported, indented
+    two spaces per level, so the direct imports of a top-level module are
+    the level one entries listed just before it.
+    """
+    children: list[tuple[str, int]] = []
+    for line in output.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # the header and anything else on stderr
+        cumulative = int(fields[1])
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((name.strip(), cumulative))
+        elif depth == 0:
+            if name.strip() == module:
+                return cumulative, children
+            children = []
+    return None, []
+
+
+def import_time(script: Path, env: dict[str, str]) -> dict[str, Any]:
+    """Import the server module in a fresh interpreter and break down where the time went."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {script.stem}"],
+        env=env,
+        cwd=script.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total, imports = parse_importtime(result.stderr, script.stem)
+    slowest = sorted(imports, key=lambda entry: entry[1], reverse=True)[:SLOWEST_IMPORTS]
+    return {
+        "module_ms": round(total / 1000, 2) if total is not None else None,
+        "slowest": [{"module": name, "cumulative_ms": round(cumulative / 1000, 2)} for name, cumulative in slowest],
+    }
+
+
+async def time_to_initialize(
+    script: Path, server_args: list[str], env: dict[str, str], workdir: Path, timeout: float
+) -> float:
+    """Seconds from spawning the server until its initialize response."""
+    started = time.perf_counter()
+    process = await anyio.open_process(
+        [sys.executable, str(script), *server_args],
+        env=env,
+        cwd=workdir,
+        stderr=subprocess.DEVNULL,
+    )
+    driver = StdioDriver(process)
+    async with process, anyio.create_task_group() as tg:
+        tg.start_soon(driver.read_replies)
+        with anyio.fail_after(timeout):
+            await driver.handshake()
+        elapsed = time.perf_counter() - started
+        await process.stdin.aclose()
+        tg.cancel_scope.cancel()
+    return elapsed
+
+
+def hot_keys(nws_base: str) -> list[str]:
+    """A cache keys file's worth of urls, as a previous run would have saved."""
+    return [f"{nws_base}/alerts/active/area/{state}" for state in STATES] + [
+        f"{nws_base}/points/{latitude},{longitude}" for latitude, longitude in POINTS
+    ]
+
+
+def startup_summary(startups: list[float]) -> dict[str, float]:
+    return {
+        "median": round(statistics.median(startups) * 1000, 2),
+        "min": round(min(startups) * 1000, 2),
+        "max": round(max(startups) * 1000, 2),
+    }
+
+
+async def measure_server(name: str, nws_base: str, stalled_base: str, args) -> dict[str, Any]:
+    script, server_args = SERVERS[name]
+    warms_up = script.stem == "implement_sse"
+    startups = []
+    warm_startups = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        env = server_environment(nws_base, workdir)
+        cache_keys = workdir / "cache_keys.json"
+        if warms_up:
+            server_args = [*server_args, "--cache-keys", str(cache_keys)]
+        imports = import_time(script, env)
+        for _ in range(args.runs):
+            startups.append(await time_to_initialize(script, server_args, env, workdir, args.timeout))
+        if warms_up:
+            stalled_env = server_environment(stalled_base, workdir)
+            for _ in range(args.runs):
+                # Servers rewrite the file on exit, start every run from the same keys
+                cache_keys.write_text(json.dumps(hot_keys(stalled_base)))
+                warm_startups.append(
+                    await time_to_initialize(script, server_args, stalled_env, workdir, args.timeout)
+                )
+    medians = [statistics.median(runs) * 1000 for runs in (startups, warm_startups) if runs]
+    return {
+        "server": name,
+        "imports": imports,
+        "initialize_ms": startup_summary(startups),
+        "initialize_with_cache_keys_ms": startup_summary(warm_startups) if warm_startups else None,
+        "budget_ms": args.budget_ms,
+        "within_budget": max(medians) <= args.budget_ms,
+    }
+
+
+async def main_async(args) -> dict[str, Any]:
+    with (
+        running_stub(args.stub_port) as nws_base,
+        running_stub(args.stall_port, args.stall_ms / 1000) as stalled_base,
+    ):
+        servers = [await measure_server(name, nws_base, stalled_base, args) for name in args.server or SERVERS]
+    return {
+        "benchmark": "bench_startup",
+        "config": {
+            "runs": args.runs,
+            "budget_ms": args.budget_ms,
+            "stall_ms": args.stall_ms,
+            "python": sys.version.split()[0],
+        },
+        "servers": servers,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure import time and time to initialize of the answer servers")
+    parser.add_argument("--server", action="append", choices=list(SERVERS), help="Server to measure, repeatable, default all")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes started per server")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Allowed median time to initialize")
+    parser.add_argument("--stub-port", type=int, default=STUB_PORT, help="Port for the NWS stub")
+    parser.add_argument("--stall-port", type=int, default=STUB_PORT + 1, help="Port for the stalling NWS stub")
+    parser.add_argument("--stall-ms", type=float, default=DEFAULT_STALL_MS, help="Delay per response of the stalling stub, in milliseconds")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Give up on a server after this many seconds")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = anyio.run(main_async, args)
+    write_report(report, args.output)
+    over = [server for server in report["servers"] if not server["within_budget"]]
+    for server in over:
+        for key, label in (("initialize_ms", ""), ("initialize_with_cache_keys_ms", " with cache keys")):
+            median = (server[key] or {}).get("median", 0.0)
+            if median > args.budget_ms:
+                print(
+                    f"{server['server']}: median time to initialize{label} {median} ms"
+                    f" exceeds the {args.budget_ms} ms budget",
+                    file=sys.stderr,
+                )
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Throughput benchmark for the stdio transport of the answer servers.
+
+Launches a server the way desktop hosts do, as a child process speaking
+newline-delimited JSON-RPC over its stdin/stdout, and drives it with raw
+pipelined `tools/list` and `tools/call` messages, keeping up to
+`--pipeline` requests in flight. Upstream calls go to the NWS stub and,
+after the warm-up, mostly hit the server's cache, so the numbers are
+dominated by framing, serialization and dispatch.
+
+    python bench_stdio.py --server implement_sse --messages 5000 --pipeline 32
+    python bench_stdio.py --server implement_sse_fast --messages 5000 --pipeline 32
+    python bench_stdio.py --server fastmcp_weather --mix tools/list=1 --output stdio.json
+
+Reports messages per second, per-message latency (overall and per method)
+and the server's CPU time per message.
+"""
+
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+import anyio
+import anyio.abc
+
+from harness import (
+    ANSWER_DIR,
+    Workload,
+    cpu_seconds,
+    latency_summary,
+    parse_mix,
+    rss_bytes,
+    server_environment,
+    write_report,
+)
+from nws_stub import DEFAULT_PORT as STUB_PORT, running_stub
+
+DEFAULT_STDIO_MIX = "tools/list=1,get_forecast=2,get_alerts=2"
+PROTOCOL_VERSION = "2024-11-05"
+SERVERS = {
+    "implement_sse": (ANSWER_DIR / "implement_sse.py", ["--transport", "stdio"]),
+    "implement_sse_fast": (ANSWER_DIR / "implement_sse.py", ["--transport", "stdio", "--stdio-framing", "fast"]),
+    "implement_weather": (ANSWER_DIR / "implement_weather.py", []),
+    "fastmcp_weather": (ANSWER_DIR / "fastmcp_weather.py", ["--transport", "stdio"]),
+}
+
+
+def request(message_id: int, method: str, params: dict | None = None) -> bytes:
+    message: dict[str, Any] = {"jsonrpc": "2.0", "id": message_id, "method": method}
+    if params is not None:
+        message["params"] = params
+    return json.dumps(message).encode() + b"\n"
+
+
+def workload_message(message_id: int, name: str, arguments: dict) -> tuple[str, bytes]:
+    """The label latencies are grouped under, and the encoded request."""
+    if name == "tools/list":
+        return name, request(message_id, "tools/list", {})
+    return name, request(message_id, "tools/call", {"name": name, "arguments": arguments})
+
+
+class StdioDriver:
+    """Writes requests to a server's stdin and matches replies read from its stdout."""
+
+    def __init__(self, process: anyio.abc.Process):
+        self.process = process
+        self.buffer = b""
+        self.pending: dict[int, tuple[str, float]] = {}
+        self.replies: dict[int, anyio.Event] = {}
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.stray_lines = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    async def send(self, message_id: int, label: str, data: bytes) -> anyio.Event:
+        done = self.replies[message_id] = anyio.Event()
+        self.pending[message_id] = (label, time.perf_counter())
+        await self.process.stdin.send(data)
+        self.bytes_sent += len(data)
+        return done
+
+    async def read_replies(self) -> None:
+        async for chunk in self.process.stdout:
+            self.bytes_received += len(chunk)
+            self.buffer += chunk
+            *lines, self.buffer = self.buffer.split(b"\n")
+            for line in lines:
+                self.handle_line(line)
+
+    def handle_line(self, line: bytes) -> None:
+        try:
+            message = json.loads(line)
+        except ValueError:
+            # Anything printed to stdout besides JSON-RPC breaks real hosts
+            self.stray_lines += 1
+            return
+        message_id = message.get("id") if isinstance(message, dict) else None
+        if message_id not in self.pending:
+            return  # notifications and log messages
+        label, sent = self.pending.pop(message_id)
+        self.latencies[label].append(time.perf_counter() - sent)
+        if "error" in message or (message.get("result") or {}).get("isError"):
+            self.errors[label] += 1
+        self.replies.pop(message_id).set()
+
+    async def handshake(self) -> None:
+        done = await self.send(
+            0,
+            "initialize",
+            request(
+                0,
+                "initialize",
+                {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "bench_stdio", "version": "1.0"},
+                },
+            ),
+        )
+        await done.wait()
+        notification = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+        await self.process.stdin.send(json.dumps(notification).encode() + b"\n")
+
+    async def pipeline(self, workload: Workload, first_id: int, count: int, depth: int) -> None:
+        """Send `count` requests, never more than `depth` awaiting a reply."""
+        slots = anyio.Semaphore(depth)
+
+        async def release(done: anyio.Event) -> None:
+            await done.wait()
+            slots.release()
+
+        async with anyio.create_task_group() as tg:
+            for message_id in range(first_id, first_id + count):
+                await slots.acquire()
+                label, data = workload_message(message_id, *workload.next_call())
+                tg.start_soon(release, await self.send(message_id, label, data))
+
+    def reset(self) -> None:
+        self.latencies.clear()
+        self.errors.clear()
+        self.bytes_sent = self.bytes_received = 0
+
+
+async def main_async(args) -> dict[str, Any]:
+    script, server_args = SERVERS[args.server]
+    workload = Workload(parse_mix(args.mix), args.seed)
+    with running_stub(args.stub_port) as nws_base, tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        if script.stem == "implement_sse":
+            server_args = [*server_args, "--cache-keys", str(workdir / "cache_keys.json")]
+        process = await anyio.open_process(
+            [sys.executable, str(script), *server_args],
+            env=server_environment(nws_base, workdir),
+            cwd=workdir,
+            stderr=subprocess.DEVNULL,
+        )
+        driver = StdioDriver(process)
+        async with process, anyio.create_task_group() as tg:
+            tg.start_soon(driver.read_replies)
+            with anyio.fail_after(args.timeout):
+                await driver.handshake()
+                await driver.pipeline(workload, 1, args.warmup, args.pipeline)
+            driver.reset()
+
+            cpu_before = cpu_seconds(process.pid)
+            started = time.perf_counter()
+            with anyio.fail_after(args.timeout):
+                await driver.pipeline(workload, 1 + args.warmup, args.messages, args.pipeline)
+            elapsed = time.perf_counter() - started
+            cpu_after = cpu_seconds(process.pid)
+            rss = rss_bytes(process.pid)
+
+            await process.stdin.aclose()
+            tg.cancel_scope.cancel()
+
+    every = [latency for latencies in driver.latencies.values() for latency in latencies]
+    cpu = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+    return {
+        "benchmark": "bench_stdio",
+        "config": {
+            "server": args.server,
+            "messages": args.messages,
+            "warmup": args.warmup,
+            "pipeline": args.pipeline,
+            "mix": parse_mix(args.mix),
+            "seed": args.seed,
+        },
+        "messages": len(every),
+        "errors": sum(driver.errors.values()),
+        "stray_lines": driver.stray_lines,
+        "elapsed_s": round(elapsed, 3),
+        "messages_per_s": round(len(every) / elapsed, 2) if elapsed else 0.0,
+        "latency": latency_summary(every),
+        "methods": {
+            label: {
+                "messages": len(latencies),
+                "errors": driver.errors[label],
+                "latency": latency_summary(latencies),
+            }
+            for label, latencies in driver.latencies.items()
+        },
+        "server_cpu_s": round(cpu, 4) if cpu is not None else None,
+        "cpu_per_message_us": round(cpu / len(every) * 1e6, 2) if cpu is not None and every else None,
+        "bytes_sent_per_message": round(driver.bytes_sent / len(every), 1) if every else 0.0,
+        "bytes_received_per_message": round(driver.bytes_received / len(every), 1) if every else 0.0,
+        "server_rss_bytes": rss,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the stdio transport of an answer server")
+    parser.add_argument("--server", choices=list(SERVERS), default="implement_sse", help="Answer server to launch")
+    parser.add_argument("--messages", type=int, default=2000, help="Measured requests to send")
+    parser.add_argument("--warmup", type=int, default=100, help="Unmeasured requests sent first, to fill caches")
+    parser.add_argument("--pipeline", type=int, default=16, help="Requests kept in flight")
+    parser.add_argument("--mix", default=DEFAULT_STDIO_MIX, help="Weighted mix of tools/list and tool names")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the message sequence")
+    parser.add_argument("--stub-port", type=int, default=STUB_PORT, help="Port for the NWS stub")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Give up after this many seconds per phase")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    write_report(anyio.run(main_async, args), args.output)
+
+
+if __name__ == "__main__":
+    main()
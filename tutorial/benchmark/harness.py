@@ -0,0 +1,213 @@
+"""Pieces shared by the benchmark scripts: workloads, server processes and reports."""
+
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import anyio
+import httpx
+
+ANSWER_DIR = Path(__file__).resolve().parent.parent / "answer"
+DEFAULT_MIX = "get_forecast=4,get_alerts=4,get_forecast_summary=1"
+POINTS = (
+    (38.8898, -77.0091),
+    (40.7128, -74.0060),
+    (41.8781, -87.6298),
+    (34.0522, -118.2437),
+    (47.6062, -122.3321),
+    (29.7604, -95.3698),
+    (39.7392, -104.9903),
+    (25.7617, -80.1918),
+)
+STATES = ("CA", "NY", "TX", "FL", "WA", "IL", "CO", "VA")
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    """Parse "tool=weight,tool=weight" into a weight per tool."""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.strip().partition("=")
+        weights[name] = int(weight or 1)
+    if not weights or min(weights.values()) < 0 or not sum(weights.values()):
+        raise ValueError(f"Invalid tool mix: {mix}")
+    return weights
+
+
+def tool_arguments(name: str, rng: random.Random) -> dict[str, Any]:
+    if name == "tools/list":
+        return {}
+    if name == "get_alerts":
+        return {"state": rng.choice(STATES)}
+    latitude, longitude = rng.choice(POINTS)
+    return {"latitude": latitude, "longitude": longitude}
+
+
+class Workload:
+    """Deterministic stream of (tool, arguments) calls drawn from a weighted mix."""
+
+    def __init__(self, mix: dict[str, int], seed: int = 0):
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.rng = random.Random(seed)
+
+    def next_call(self) -> tuple[str, dict[str, Any]]:
+        name = self.rng.choices(self.names, self.weights)[0]
+        return name, tool_arguments(name, self.rng)
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_summary(latencies: list[float]) -> dict[str, float]:
+    """p50/p95/p99, mean and max of latencies in seconds, reported in milliseconds."""
+    ordered = sorted(latencies)
+    if not ordered:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0, "max_ms": 0.0}
+    return {
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def rss_bytes(pid: int) -> int | None:
+    """Resident set size of a process, from /proc or psutil when available."""
+    status = Path(f"/proc/{pid}/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+        return None
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process(pid).memory_info().rss
+
+
+def cpu_seconds(pid: int) -> float | None:
+    """User plus system CPU time a process has used so far."""
+    stat = Path(f"/proc/{pid}/stat")
+    if stat.exists():
+        # The command name may contain spaces, so split after its closing paren
+        fields = stat.read_text().rpartition(")")[2].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    try:
+        import psutil
+    except ImportError:
+        return None
+    times = psutil.Process(pid).cpu_times()
+    return times.user + times.system
+
+
+class RssSampler:
+    """Samples a process' RSS every `interval` seconds while `run` is active."""
+
+    def __init__(self, pid: int, interval: float = 1.0):
+        self.pid = pid
+        self.interval = interval
+        self.samples: list[dict[str, float]] = []
+
+    async def run(self) -> None:
+        started = time.perf_counter()
+        while True:
+            rss = rss_bytes(self.pid)
+            if rss is not None:
+                self.samples.append({"t": round(time.perf_counter() - started, 3), "rss_bytes": rss})
+            await anyio.sleep(self.interval)
+
+    def summary(self) -> dict[str, Any]:
+        values = [sample["rss_bytes"] for sample in self.samples]
+        return {
+            "start_bytes": values[0] if values else None,
+            "peak_bytes": max(values) if values else None,
+            "end_bytes": values[-1] if values else None,
+            "samples": self.samples,
+        }
+
+
+def build_zone_index(workdir: Path) -> Path:
+    """Build the index of the stub's zones in `workdir`, once, with the zone_index.py CLI."""
+    from nws_stub import zone_collection
+
+    index = workdir / "zones.idx"
+    if not index.exists():
+        source = workdir / "zones.json"
+        source.write_text(json.dumps(zone_collection()))
+        subprocess.run(
+            [sys.executable, str(ANSWER_DIR / "zone_index.py"), "build", str(source), "-o", str(index)],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+    return index
+
+
+def server_environment(nws_base: str, workdir: Path) -> dict[str, str]:
+    """Environment pointing a server at the NWS stub and keeping its files in `workdir`.
+
+    The zone index over the stub's zones is built there first, so
+    get_alerts_at_point is served and resolves the same zones as /points.
+    """
+    env = dict(os.environ)
+    env["WEATHER_NWS_API_BASE"] = nws_base
+    env["WEATHER_GRIDPOINT_STORE"] = str(workdir / "gridpoints")
+    env["WEATHER_ZONE_INDEX"] = str(build_zone_index(workdir))
+    env["WEATHER_GAZETTEER"] = str(workdir / "places.idx")
+    return env
+
+
+def start_server(script: Path, args: list[str], env: dict[str, str], workdir: Path) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, str(script), *args],
+        env=env,
+        cwd=workdir,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    """Poll `url` until it answers 200, failing early if the server exits."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {process.returncode}")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await anyio.sleep(0.1)
+    raise TimeoutError(f"Server not ready after {timeout}s: {url}")
+
+
+def stop_server(process: subprocess.Popen, timeout: float = 30.0) -> None:
+    """SIGTERM, which the servers treat as a graceful drain, then kill."""
+    process.terminate()
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def write_report(report: dict[str, Any], output: Path | None) -> None:
+    """Write the JSON report to `output`, or to stdout when it is None."""
+    text = json.dumps(report, indent=2)
+    if output is None:
+        print(text)
+    else:
+        output.write_text(text + "\n")
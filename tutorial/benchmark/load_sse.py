@@ -0,0 +1,200 @@
+"""Load test for the SSE transport of implement_sse.py.
+
+Starts the NWS stub and the server, opens N MCP client sessions over SSE
+and issues tool calls from a weighted mix at a fixed rate. Calls are
+scheduled open-loop: latency is measured from when a call was due, so a
+server that falls behind shows it in the tail instead of hiding it by
+slowing the load down.
+
+    python load_sse.py --sessions 50 --rate 200 --duration 30 --output sse.json
+    python load_sse.py --serving-profile production --mix get_forecast=1
+
+The JSON report holds throughput, p50/p95/p99 latency overall and per tool,
+error rates, the server's RSS over time and its /metrics at the end.
+"""
+
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Any
+
+import anyio
+import httpx
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+from harness import (
+    ANSWER_DIR,
+    DEFAULT_MIX,
+    RssSampler,
+    Workload,
+    latency_summary,
+    parse_mix,
+    server_environment,
+    start_server,
+    stop_server,
+    wait_ready,
+    write_report,
+)
+from nws_stub import DEFAULT_PORT as STUB_PORT, running_stub
+
+SERVER_SCRIPT = ANSWER_DIR / "implement_sse.py"
+
+
+class Recorder:
+    """Latency and outcome of every call, grouped by tool."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.error_samples: list[str] = []
+
+    def record(self, name: str, latency: float, error: str | None) -> None:
+        self.latencies[name].append(latency)
+        if error is not None:
+            self.errors[name] += 1
+            if len(self.error_samples) < 10:
+                self.error_samples.append(f"{name}: {error}")
+
+    def report(self, elapsed: float) -> dict[str, Any]:
+        every = [latency for latencies in self.latencies.values() for latency in latencies]
+        calls = len(every)
+        errors = sum(self.errors.values())
+        return {
+            "calls": calls,
+            "errors": errors,
+            "error_rate": round(errors / calls, 4) if calls else 0.0,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(calls / elapsed, 2) if elapsed else 0.0,
+            "latency": latency_summary(every),
+            "tools": {
+                name: {
+                    "calls": len(latencies),
+                    "errors": self.errors[name],
+                    "latency": latency_summary(latencies),
+                }
+                for name, latencies in self.latencies.items()
+            },
+            "error_samples": self.error_samples,
+        }
+
+
+async def call(session: ClientSession, name: str, arguments: dict, due: float, recorder: Recorder) -> None:
+    error = None
+    try:
+        result = await session.call_tool(name, arguments)
+        if result.isError:
+            error = result.content[0].text if result.content else "tool error"
+    except Exception as e:
+        error = repr(e)
+    recorder.record(name, time.perf_counter() - due, error)
+
+
+async def run_load(
+    url: str,
+    sessions: int,
+    rate: float,
+    duration: float,
+    workload: Workload,
+    recorder: Recorder,
+) -> float:
+    """Drive the load and return the elapsed wall time."""
+    async with AsyncExitStack() as stack:
+        clients = []
+        for _ in range(sessions):
+            streams = await stack.enter_async_context(sse_client(url))
+            session = await stack.enter_async_context(ClientSession(*streams))
+            await session.initialize()
+            clients.append(session)
+
+        total = int(rate * duration)
+        started = time.perf_counter()
+        async with anyio.create_task_group() as tg:
+            for i in range(total):
+                due = started + i / rate
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await anyio.sleep(delay)
+                name, arguments = workload.next_call()
+                tg.start_soon(call, clients[i % sessions], name, arguments, due, recorder)
+        return time.perf_counter() - started
+
+
+async def main_async(args) -> dict[str, Any]:
+    workload = Workload(parse_mix(args.mix), args.seed)
+    recorder = Recorder()
+    base = f"http://127.0.0.1:{args.port}"
+    with running_stub(args.stub_port, args.stub_latency / 1000) as nws_base, tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        server_args = [
+            "--transport",
+            "sse",
+            "--port",
+            str(args.port),
+            "--serving-profile",
+            args.serving_profile,
+            "--cache-keys",
+            str(workdir / "cache_keys.json"),
+        ]
+        if args.compress:
+            server_args.append("--compress")
+        process = start_server(args.server, server_args, server_environment(nws_base, workdir), workdir)
+        try:
+            await wait_ready(f"{base}/ready", process)
+            sampler = RssSampler(process.pid, args.rss_interval)
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(sampler.run)
+                elapsed = await run_load(
+                    f"{base}/sse", args.sessions, args.rate, args.duration, workload, recorder
+                )
+                tg.cancel_scope.cancel()
+            async with httpx.AsyncClient() as client:
+                server_metrics = (await client.get(f"{base}/metrics")).json()
+        finally:
+            stop_server(process)
+
+    return {
+        "benchmark": "load_sse",
+        "config": {
+            "server": str(args.server),
+            "serving_profile": args.serving_profile,
+            "compress": args.compress,
+            "sessions": args.sessions,
+            "target_rate_rps": args.rate,
+            "duration_s": args.duration,
+            "mix": parse_mix(args.mix),
+            "stub_latency_ms": args.stub_latency,
+            "seed": args.seed,
+        },
+        **recorder.report(elapsed),
+        "rss": sampler.summary(),
+        "server_metrics": server_metrics,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load test the SSE weather server")
+    parser.add_argument("--server", type=Path, default=SERVER_SCRIPT, help="Server script to start")
+    parser.add_argument("--port", type=int, default=8000, help="Port for the server under test")
+    parser.add_argument("--stub-port", type=int, default=STUB_PORT, help="Port for the NWS stub")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="Added NWS stub delay, in milliseconds")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent MCP client sessions")
+    parser.add_argument("--rate", type=float, default=50.0, help="Target tool calls per second, across sessions")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to keep issuing calls")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted tool mix, e.g. get_forecast=3,get_alerts=1")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the call sequence")
+    parser.add_argument("--serving-profile", choices=["default", "production"], default="default", help="Server serving profile")
+    parser.add_argument("--compress", action="store_true", help="Start the server with --compress")
+    parser.add_argument("--rss-interval", type=float, default=1.0, help="Seconds between server RSS samples")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    write_report(anyio.run(main_async, args), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Local stand-in for the parts of api.weather.gov the weather servers use.
+
+Responses are generated, shaped like the real API and deterministic per
+location, so benchmark runs measure our servers instead of the network or
+the NWS rate limits. Point a server at it with WEATHER_NWS_API_BASE:
+
+    python nws_stub.py --port 8100 --latency 50
+    WEATHER_NWS_API_BASE=http://127.0.0.1:8100 python ../answer/implement_sse.py --transport sse
+
+The stub also serves the polygons of its made-up forecast and county zones,
+which /points refers to, for building a matching zone index:
+
+    curl -o zones.json http://127.0.0.1:8100/stub/zones
+    python ../answer/zone_index.py build zones.json -o zones.idx
+"""
+
+import random
+import string
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+import anyio
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+DEFAULT_PORT = 8100
+ALERTS_PER_STATE = 8
+FORECAST_PERIODS = 14
+HOURLY_PERIODS = 156
+EVENTS = ("Flood Warning", "Wind Advisory", "Winter Storm Watch", "Heat Advisory")
+SEVERITIES = ("Minor", "Moderate", "Severe", "Extreme")
+URGENCIES = ("Immediate", "Expected", "Future")
+# Zones tile this lon/lat box: 8 degree "states", 2 degree forecast zones
+# and 1 degree counties, all whole numbers of degrees
+ZONE_AREA = (-125, 24, -67, 50)
+STATE_SIZE = 8
+FORECAST_ZONE_SIZE = 2
+
+
+def hour_start(offset: int = 0) -> datetime:
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return now + timedelta(hours=offset)
+
+
+def grid_cell(latitude: float, longitude: float) -> tuple[str, int, int]:
+    """A made-up but stable office and 2.5km grid cell for a point."""
+    office = "ABC"[int(abs(longitude)) % 3] + "XY"
+    return office, int(abs(longitude) * 40) % 200, int(abs(latitude) * 40) % 200
+
+
+def zone_codes(latitude: float, longitude: float) -> tuple[str, str] | None:
+    """The forecast zone and county UGC codes containing a point, if inside the area."""
+    min_lon, min_lat, max_lon, max_lat = ZONE_AREA
+    if not (min_lon <= longitude < max_lon and min_lat <= latitude < max_lat):
+        return None
+    x, y = int(longitude - min_lon), int(latitude - min_lat)
+    state = string.ascii_uppercase[y // STATE_SIZE] + string.ascii_uppercase[x // STATE_SIZE]
+    per_row = STATE_SIZE // FORECAST_ZONE_SIZE
+    zone = y % STATE_SIZE // FORECAST_ZONE_SIZE * per_row + x % STATE_SIZE // FORECAST_ZONE_SIZE
+    county = y % STATE_SIZE * STATE_SIZE + x % STATE_SIZE
+    return f"{state}Z{zone:03d}", f"{state}C{county:03d}"
+
+
+def zone_collection() -> dict:
+    """GeoJSON of every forecast zone and county, shaped like the NWS /zones features."""
+    min_lon, min_lat, max_lon, max_lat = ZONE_AREA
+    features = []
+    for kind, size, pick in (("public", FORECAST_ZONE_SIZE, 0), ("county", 1, 1)):
+        for lat in range(min_lat, max_lat, size):
+            for lon in range(min_lon, max_lon, size):
+                ring = [[lon, lat], [lon + size, lat], [lon + size, lat + size], [lon, lat + size], [lon, lat]]
+                features.append(
+                    {
+                        "type": "Feature",
+                        "properties": {"id": zone_codes(lat + 0.5, lon + 0.5)[pick], "type": kind},
+                        "geometry": {"type": "Polygon", "coordinates": [ring]},
+                    }
+                )
+    return {"type": "FeatureCollection", "features": features}
+
+
+def alerts(state: str, revision: int = 0) -> dict:
+    """The state's alerts; each revision re-issues them with a later sent time."""
+    rng = random.Random(state)
+    features = []
+    for i in range(ALERTS_PER_STATE):
+        onset = hour_start(rng.randint(-6, 24))
+        features.append(
+            {
+                "id": f"urn:oid:stub.{state}.{i}",
+                "properties": {
+                    "id": f"urn:oid:stub.{state}.{i}",
+                    "event": rng.choice(EVENTS),
+                    "severity": rng.choice(SEVERITIES),
+                    "urgency": rng.choice(URGENCIES),
+                    "areaDesc": f"{state} County {i}",
+                    "geocode": {"UGC": [f"{state}Z{i:03d}", f"{state}C{i:03d}"]},
+                    "sent": (onset - timedelta(hours=1) + timedelta(minutes=revision)).isoformat(),
+                    "onset": onset.isoformat(),
+                    "expires": (onset + timedelta(hours=12)).isoformat(),
+                    "headline": f"{rng.choice(EVENTS)} issued for {state} County {i}",
+                    "description": "Stub alert description. " * 20,
+                    "instruction": "Stub alert instruction. " * 5,
+                },
+            }
+        )
+    return {"type": "FeatureCollection", "features": features}
+
+
+def forecast_periods(count: int, hours: int, seed: str) -> list[dict]:
+    rng = random.Random(seed)
+    periods = []
+    for i in range(count):
+        start = hour_start(i * hours)
+        periods.append(
+            {
+                "number": i + 1,
+                "name": start.strftime("%A %H:%M"),
+                "startTime": start.isoformat(),
+                "endTime": (start + timedelta(hours=hours)).isoformat(),
+                "temperature": rng.randint(20, 90),
+                "temperatureUnit": "F",
+                "probabilityOfPrecipitation": {"unitCode": "wmoUnit:percent", "value": rng.randint(0, 100)},
+                "windSpeed": f"{rng.randint(0, 10)} to {rng.randint(10, 30)} mph",
+                "windDirection": rng.choice(("N", "E", "S", "W")),
+                "shortForecast": "Partly Cloudy",
+                "detailedForecast": "Partly cloudy, with a stub forecast. " * 3,
+            }
+        )
+    return periods
+
+
+def gridpoint_layers(seed: str) -> dict:
+    rng = random.Random(seed)
+
+    def layer(uom: str, low: float, high: float) -> dict:
+        values = []
+        hour = -6
+        while hour < HOURLY_PERIODS:
+            run = rng.choice((1, 2, 3, 6))
+            values.append(
+                {
+                    "validTime": f"{hour_start(hour).isoformat()}/PT{run}H",
+                    "value": round(rng.uniform(low, high), 1),
+                }
+            )
+            hour += run
+        return {"uom": uom, "values": values}
+
+    return {
+        "temperature": layer("wmoUnit:degC", -10, 35),
+        "probabilityOfPrecipitation": layer("wmoUnit:percent", 0, 100),
+        "quantitativePrecipitation": layer("wmoUnit:mm", 0, 5),
+        "windSpeed": layer("wmoUnit:km_h-1", 0, 50),
+        "windGust": layer("wmoUnit:km_h-1", 0, 80),
+        "relativeHumidity": layer("wmoUnit:percent", 10, 100),
+        "skyCover": layer("wmoUnit:percent", 0, 100),
+    }
+
+
+def create_app(latency: float = 0.0, gzip: bool = False) -> Starlette:
+    """The stub ASGI app; every response waits `latency` seconds first.
+
+    With `gzip`, responses are gzipped for clients that accept it, as
+    api.weather.gov does.
+
+    POST /stub/alerts/{state}/reissue re-issues a state's alerts, so tests
+    can watch subscribers get notified.
+    """
+    revisions: dict[str, int] = {}
+
+    async def delay() -> None:
+        if latency:
+            await anyio.sleep(latency)
+
+    async def handle_points(request: Request) -> JSONResponse:
+        await delay()
+        latitude, longitude = (float(part) for part in request.path_params["point"].split(","))
+        office, x, y = grid_cell(latitude, longitude)
+        base = f"{request.base_url}gridpoints/{office}/{x},{y}"
+        properties = {
+            "gridId": office,
+            "gridX": x,
+            "gridY": y,
+            "forecast": f"{base}/forecast",
+            "forecastHourly": f"{base}/forecast/hourly",
+            "forecastGridData": base,
+        }
+        codes = zone_codes(latitude, longitude)
+        if codes is not None:
+            properties["forecastZone"] = f"{request.base_url}zones/forecast/{codes[0]}"
+            properties["county"] = f"{request.base_url}zones/county/{codes[1]}"
+        return JSONResponse({"properties": properties})
+
+    async def handle_forecast(request: Request) -> JSONResponse:
+        await delay()
+        seed = request.url.path
+        return JSONResponse({"properties": {"periods": forecast_periods(FORECAST_PERIODS, 12, seed)}})
+
+    async def handle_hourly(request: Request) -> JSONResponse:
+        await delay()
+        seed = request.url.path
+        return JSONResponse({"properties": {"periods": forecast_periods(HOURLY_PERIODS, 1, seed)}})
+
+    async def handle_gridpoints(request: Request) -> Response:
+        await delay()
+        last_modified = hour_start().strftime("%a, %d %b %Y %H:%M:%S GMT")
+        if request.headers.get("if-modified-since") == last_modified:
+            return Response(status_code=304)
+        return JSONResponse(
+            {"properties": gridpoint_layers(request.url.path)},
+            headers={"Last-Modified": last_modified},
+        )
+
+    async def handle_alerts(request: Request) -> JSONResponse:
+        await delay()
+        state = request.path_params["state"].upper()
+        return JSONResponse(alerts(state, revisions.get(state, 0)))
+
+    async def handle_zones(request: Request) -> JSONResponse:
+        return JSONResponse(zone_collection())
+
+    async def handle_reissue(request: Request) -> JSONResponse:
+        state = request.path_params["state"].upper()
+        revisions[state] = revisions.get(state, 0) + 1
+        return JSONResponse({"state": state, "revision": revisions[state]})
+
+    return Starlette(
+        routes=[
+            Route("/points/{point}", endpoint=handle_points),
+            Route("/gridpoints/{office}/{cell}/forecast", endpoint=handle_forecast),
+            Route("/gridpoints/{office}/{cell}/forecast/hourly", endpoint=handle_hourly),
+            Route("/gridpoints/{office}/{cell}", endpoint=handle_gridpoints),
+            Route("/alerts/active/area/{state}", endpoint=handle_alerts),
+            Route("/stub/zones", endpoint=handle_zones),
+            Route("/stub/alerts/{state}/reissue", endpoint=handle_reissue, methods=["POST"]),
+        ],
+        middleware=[Middleware(GZipMiddleware)] if gzip else [],
+    )
+
+
+@contextmanager
+def running_stub(port: int = DEFAULT_PORT, latency: float = 0.0, gzip: bool = False) -> Iterator[str]:
+    """Serve the stub from a background thread, yielding its base URL."""
+    import uvicorn
+
+    config = uvicorn.Config(create_app(latency, gzip), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"NWS stub failed to start on port {port}")
+        time.sleep(0.05)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def main():
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for api.weather.gov")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=0.0, help="Added delay per response, in milliseconds")
+    parser.add_argument("--gzip", action="store_true", help="Gzip responses like api.weather.gov does")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency / 1000, args.gzip), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()